@@ -1,10 +1,12 @@
-from flask import Flask
+from flask import Flask, jsonify
 from .extensions import ma, limiter, cache
 from .models import db
 from .blueprints.customers import customers_bp
 from .blueprints.mechanics import mechanics_bp
 from .blueprints.tickets import tickets_bp
 from .blueprints.inventory import inventory_bp
+from .blueprints.vehicles import vehicles_bp
+from .utils.passwords import PasswordPoolBusy
 from flask_migrate import Migrate
 from flask_swagger_ui import get_swaggerui_blueprint
 
@@ -21,7 +23,8 @@ swaggerui_blueprint = get_swaggerui_blueprint(
 
 def create_app(config_name):
     app = Flask(__name__)
-    app.config.from_object(f"config.{config_name}")
+    # A name from config.py, or a config class (tests and benchmarks subclass TestingConfig)
+    app.config.from_object(f"config.{config_name}" if isinstance(config_name, str) else config_name)
 
 
     # Initialize extensions
@@ -36,6 +39,18 @@ def create_app(config_name):
     app.register_blueprint(mechanics_bp, url_prefix='/mechanics')
     app.register_blueprint(tickets_bp, url_prefix='/tickets')
     app.register_blueprint(inventory_bp, url_prefix='/inventory')
+    app.register_blueprint(vehicles_bp, url_prefix='/vehicles')
     app.register_blueprint(swaggerui_blueprint, url_prefix=SWAGGER_URL)  # Registering Swagger UI blueprint
 
+    # GET '/health' - Liveness probe for the load balancer; exempt so probes never use up the default limits
+    @app.route('/health')
+    @limiter.exempt
+    def health():
+        return jsonify({"status": "ok"}), 200
+
+    # Password hashing pool is saturated (login burst): shed the request instead of queueing it
+    @app.errorhandler(PasswordPoolBusy)
+    def password_pool_busy(e):
+        return jsonify({"error": "Too many password checks in progress, try again shortly."}), 503, {'Retry-After': '1'}
+
     return app
\ No newline at end of file
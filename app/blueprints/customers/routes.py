@@ -1,11 +1,19 @@
 from .schemas import customer_schema, customers_schema, login_schema
-from flask import request, jsonify
+from flask import request, jsonify, g
 from marshmallow import ValidationError
 from sqlalchemy import select
-from app.models import db, Customer
+from app.models import db, Customer, Ticket, Inventory
 from . import customers_bp
-from app.extensions import cache, limiter
+from app.extensions import cache, limiter, invalidate_tags, tagged_cache_key, TAGGED_CACHE_TIMEOUT
+from app.blueprints.tickets.routes import ticket_list_query
+from app.blueprints.tickets.schemas import tickets_with_totals_schema
+from app.blueprints.inventory.schemas import inventories_schema
+from app.utils.catalog import CATALOG_TAG
 from app.utils.util import encode_token, token_required
+from app.utils.revocation import revoke_token, revoke_subject, prune_revoked_tokens
+from app.utils.pagination import keyset_paginate, paginated_response
+from app.utils.passwords import check_login, hash_password_field
+from app.utils.conditional import conditional, row_validators, list_validators
 
 # Login Route
 # This route allows a customer to log in using their email and password.
@@ -21,7 +29,9 @@ def login():
     query = select(Customer).where(Customer.email == username)
     customer = db.session.execute(query).scalar_one_or_none() #Query customer table for a customer with this email
 
-    if customer and customer.password == password: #if we have a customer associated with the username, validate the password
+    # Verifies on the hashing pool and upgrades legacy/outdated hashes (503 via PasswordPoolBusy when saturated)
+    if check_login(customer, password):
+        db.session.commit()  # Persist a rehash, if one happened
         auth_token = encode_token(customer.id)
 
         response = {
@@ -33,6 +43,18 @@ def login():
     else:
         return jsonify({'messages': "Invalid email or password"}), 401
 
+# Logout Route
+# Revokes the presented token until it expires; other sessions stay logged in.
+@customers_bp.route("/logout", methods=['POST'])
+@token_required
+def logout(token_customer_id=None):
+    if not g.token_claims.get('jti'):
+        return jsonify({"error": "This token cannot be revoked individually; it expires within the hour."}), 400
+    revoke_token(g.token_claims)
+    prune_revoked_tokens()  # Housekeeping: drop revocations whose tokens have expired anyway
+    db.session.commit()
+    return jsonify({"status": "success", "message": "Successfully Logged Out"}), 200
+
 
 # Customer Routes
 # Create a customer
@@ -49,27 +71,66 @@ def create_customer():
     if existing_customer:
         return jsonify({"error": "Email already associated with an account."}), 400
 
-    new_customer = Customer(**customer_data)
+    new_customer = Customer(**hash_password_field(customer_data))
     db.session.add(new_customer)
     db.session.commit()
     return customer_schema.jsonify(new_customer), 201
 
 #GET ALL customers
+# Cursor paginated: ?per_page=N&cursor=<X-Next-Cursor from the previous page>
 @customers_bp.route("/", methods=['GET'])
+@conditional(list_validators(Customer))  # ETag / 304 from the table's cache tag
 def get_customers():
     try:
-        page = int(request.args.get('page'))
-        per_page = int(request.args.get('per_page'))
-        query = select(Customer)
-        customers = db.paginate(query, page=page, per_page=per_page, error_out=False).items
-        return customers_schema.jsonify(customers), 200
-    except:
-        query = select(Customer)
-        customers = db.session.execute(query).scalars().all()
-        return customers_schema.jsonify(customers)
+        customers, next_cursor = keyset_paginate(select(Customer), [Customer.id])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return paginated_response(customers_schema, customers, next_cursor), 200
+
+DASHBOARD_TICKET_LIMIT = 50  # Most recent tickets included in /me/dashboard
+
+# GET '/me/dashboard' - Everything the customer portal shows, in one response
+@customers_bp.route("/me/dashboard", methods=['GET'])
+@token_required
+@cache.cached(timeout=TAGGED_CACHE_TIMEOUT,
+              make_cache_key=tagged_cache_key(lambda token_customer_id=None, **_: f"customer:{token_customer_id}", 'mechanics', CATALOG_TAG))
+def get_my_dashboard(token_customer_id=None):
+    """
+    Profile, the most recent tickets (with mechanics, parts and parts_total) and
+    the parts they reference, replacing the profile / my-tickets / per-ticket
+    mechanics waterfall. Five queries whatever the ticket count; cached per
+    customer and dropped by any write to that customer or their tickets, and by
+    any committed Inventory write (the catalog tag), since full part rows are embedded.
+    """
+    customer = db.session.get(Customer, int(token_customer_id))
+    if not customer:
+        return jsonify({"error": "Customer not found."}), 404
+
+    query = (
+        ticket_list_query()
+        .where(Ticket.customer_id == customer.id)
+        .order_by(Ticket.ticket_date.desc(), Ticket.id.desc())
+        .limit(DASHBOARD_TICKET_LIMIT + 1)  # One extra row tells us whether older tickets exist
+    )
+    tickets = db.session.execute(query).scalars().unique().all()
+    has_more = len(tickets) > DASHBOARD_TICKET_LIMIT
+    tickets = tickets[:DASHBOARD_TICKET_LIMIT]
+
+    inventory_ids = {line.inventory_id for ticket in tickets for line in ticket.ticket_parts}
+    parts = []
+    if inventory_ids:
+        parts = db.session.execute(select(Inventory).where(Inventory.id.in_(inventory_ids)).order_by(Inventory.id)).scalars().all()
+
+    return jsonify({
+        "customer": customer_schema.dump(customer),
+        "tickets": tickets_with_totals_schema.dump(tickets),
+        "parts": inventories_schema.dump(parts),
+        "has_more_tickets": has_more,
+    }), 200
 
 #GET SPECIFIC customer
 @customers_bp.route("/<int:customer_id>", methods=['GET'])
+@conditional(row_validators(Customer, 'customer_id'))  # ETag / 304 from the row version
 def get_customer(customer_id):
     customer = db.session.get(Customer, customer_id)
 
@@ -94,10 +155,13 @@ def update_customer(customer_id, token_customer_id=None):
     except ValidationError as e:
         return jsonify(e.messages), 400
 
-    for key, value in customer_data.items():
+    if customer_data.get('password'):
+        revoke_subject('customer', customer_id)  # Sessions opened with the old password end here
+    for key, value in hash_password_field(customer_data).items():
         setattr(customer, key, value)
 
     db.session.commit()
+    invalidate_tags(f"customer:{customer_id}")  # Profile is embedded in the cached dashboard
     return customer_schema.jsonify(customer), 200
 
 #PATCH SPECIFIC customer
@@ -117,10 +181,13 @@ def patch_customer(customer_id, token_customer_id=None):
     except ValidationError as e:
         return jsonify(e.messages), 400
 
-    for key, value in customer_data.items():
+    if customer_data.get('password'):
+        revoke_subject('customer', customer_id)  # Sessions opened with the old password end here
+    for key, value in hash_password_field(customer_data).items():
         setattr(customer, key, value)
 
     db.session.commit()
+    invalidate_tags(f"customer:{customer_id}")  # Profile is embedded in the cached dashboard
     return customer_schema.jsonify(customer), 200
 
 #DELETE SPECIFIC customer
@@ -135,6 +202,8 @@ def delete_customer(customer_id, token_customer_id=None):
     if not customer:
         return jsonify({"error": "Customer not found."}), 404
 
+    revoke_subject('customer', customer_id)
     db.session.delete(customer)
     db.session.commit()
+    invalidate_tags(f"customer:{customer_id}")
     return jsonify({"message": f'Customer id: {customer_id}, successfully deleted.'}), 200
@@ -7,6 +7,8 @@ from marshmallow import Schema, fields
 class CustomerSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Customer
+        load_only = ('password',)  # Stored hashed; never serialized
+        dump_only = ('version', 'updated_at')  # Maintained by the database
 
 customer_schema = CustomerSchema()
 customers_schema = CustomerSchema(many=True)
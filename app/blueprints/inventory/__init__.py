@@ -1,5 +1,5 @@
 from flask import Blueprint
 
-inventory_bp = Blueprint('inventory_bp', __name__)
+inventory_bp = Blueprint('inventory_bp', __name__, cli_group='inventory')  # CLI: flask inventory <command>
 
 from . import routes  # Import routes to register them with the blueprint
\ No newline at end of file
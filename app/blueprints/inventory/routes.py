@@ -1,10 +1,33 @@
+import click
+from datetime import date, datetime
 from flask import request, jsonify
 from marshmallow import ValidationError
 from sqlalchemy import select
 from app.models import db, Inventory, TicketInventory
 from .schemas import inventory_schema, inventories_schema
 from . import inventory_bp
-from app.extensions import limiter
+from app.extensions import limiter, invalidate_tags
+from app.utils.totals import apply_price_change
+from app.utils.vehicles import refresh_vehicles_for_part
+from app.utils.mechanic_stats import refresh_daily_stats_for_part
+from app.utils.part_usage import refresh_part_usage_for_parts, delete_part_usage, rebuild_part_usage, top_parts, month_key, month_label, add_months
+from app.utils.conditional import conditional, row_validators, list_etag
+from app.utils.catalog import get_catalog, catalog_response
+from app.utils.stock import low_stock_query, LOW_STOCK_DEFAULT_THRESHOLD, LOW_STOCK_ORDER
+from app.utils.pagination import keyset_paginate, paginated_response
+from app.utils.inventory_import import import_inventory_csv, IMPORT_CHUNK_SIZE, IMPORT_COMMIT_EVERY
+
+TOP_PARTS_DEFAULT_LIMIT = 10
+TOP_PARTS_MAX_LIMIT = 100
+TOP_PARTS_DEFAULT_MONTHS = 12
+TOP_PARTS_ORDERS = ('quantity', 'revenue')
+
+def supplier_sku_taken(sku, part_id=None):
+    """True when another part already carries this supplier SKU (the column is unique)."""
+    if not sku:
+        return False
+    query = select(Inventory.id).where(Inventory.supplier_sku == sku, Inventory.id != part_id)
+    return db.session.execute(query).first() is not None
 
 # --- CRUD Routes for Inventory ---
 
@@ -16,21 +39,78 @@ def create_inventory():
         part_data = inventory_schema.load(request.json)
     except ValidationError as e:
         return jsonify(e.messages), 400
+    if supplier_sku_taken(part_data.get('supplier_sku')):
+        return jsonify({"error": "Supplier SKU already in use."}), 400
 
     new_part = Inventory(**part_data)
     db.session.add(new_part)
     db.session.commit()
     return inventory_schema.jsonify(new_part), 201
 
-# Get all parts
+# Get all parts, served from the cached catalog snapshot (no database query when warm)
+# ?q= filters by name (case-insensitive substring); cursor paginated by id like the other lists
+# Inventory writes drop the snapshot on commit (see app/utils/catalog.py)
 @inventory_bp.route('/', methods=['GET'])
+@conditional(lambda **_: list_etag(get_catalog(inventory_schema).state))  # ETag / 304 from the snapshot's count, sum(version), max(updated_at)
 def get_inventory():
-    query = select(Inventory)
-    parts = db.session.execute(query).scalars().all()
-    return inventories_schema.jsonify(parts), 200
+    try:
+        return catalog_response(inventory_schema), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+# Get stock-tracked parts at or below a threshold
+# ?threshold=N (default 5); scarcest first, served from ix_inventory_stock_on_hand
+# Cursor paginated on (stock_on_hand, id), so a large threshold never returns the whole table
+@inventory_bp.route('/low-stock', methods=['GET'])
+def get_low_stock():
+    try:
+        threshold = int(request.args.get('threshold', LOW_STOCK_DEFAULT_THRESHOLD))
+    except ValueError:
+        return jsonify({"error": "threshold must be an integer."}), 400
+    try:
+        parts, next_cursor = keyset_paginate(low_stock_query(threshold), LOW_STOCK_ORDER)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return paginated_response(inventories_schema, parts, next_cursor), 200
+
+# GET '/analytics/top-parts' - Most used parts, with per-month and per-mechanic breakdowns
+# ?from=YYYY-MM&to=YYYY-MM (inclusive; default the last 12 months) &limit=N (default 10, max 100)
+# &by=quantity|revenue (default quantity) &mechanic_id=N (only that mechanic's tickets)
+@inventory_bp.route('/analytics/top-parts', methods=['GET'])
+def get_top_parts():
+    """Served from the monthly rollups in app/utils/part_usage.py, never from ticket_inventory."""
+    bounds = {}
+    for param in ('from', 'to'):
+        try:
+            bounds[param] = month_key(datetime.strptime(request.args[param], '%Y-%m')) if request.args.get(param) else None
+        except ValueError:
+            return jsonify({"error": f"'{param}' must be a month in YYYY-MM format."}), 400
+    end = bounds['to'] or month_key(date.today())
+    start = bounds['from'] or add_months(end, 1 - TOP_PARTS_DEFAULT_MONTHS)
+    if start > end:
+        return jsonify({"error": "'from' must not be after 'to'."}), 400
+    by = request.args.get('by', 'quantity')
+    if by not in TOP_PARTS_ORDERS:
+        return jsonify({"error": f"by must be one of: {', '.join(TOP_PARTS_ORDERS)}."}), 400
+    try:
+        limit = int(request.args.get('limit', TOP_PARTS_DEFAULT_LIMIT))
+        mechanic_id = int(request.args['mechanic_id']) if request.args.get('mechanic_id') else None
+    except ValueError:
+        return jsonify({"error": "limit and mechanic_id must be integers."}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be at least 1."}), 400
+
+    return jsonify({
+        "from": month_label(start),
+        "to": month_label(end),
+        "by": by,
+        "mechanic_id": mechanic_id,
+        "parts": top_parts(start, end, min(limit, TOP_PARTS_MAX_LIMIT), by, mechanic_id),
+    }), 200
 
 # Get a specific part
 @inventory_bp.route('/<int:part_id>', methods=['GET'])
+@conditional(row_validators(Inventory, 'part_id'))  # ETag / 304 from the row version
 def get_inventory_part(part_id):
     part = db.session.get(Inventory, part_id)
     if not part:
@@ -48,9 +128,20 @@ def update_inventory(part_id):
         part_data = inventory_schema.load(request.json)
     except ValidationError as e:
         return jsonify(e.messages), 400
+    if supplier_sku_taken(part_data.get('supplier_sku'), part_id):
+        return jsonify({"error": "Supplier SKU already in use."}), 400
+    old_price = part.price
     for key, value in part_data.items():
         setattr(part, key, value)
+    price_changed = part.price != old_price
+    if price_changed:
+        apply_price_change(part_id, part.price - old_price)  # Keep ticket totals in step with the new price
+        refresh_vehicles_for_part(part_id)
+        refresh_daily_stats_for_part(part_id)
+        refresh_part_usage_for_parts([part_id])
     db.session.commit()
+    if price_changed:
+        invalidate_tags('inventory')  # Parts and totals are embedded in cached ticket lists
     return inventory_schema.jsonify(part), 200
 
 # Patch a part (for partial updates)
@@ -64,9 +155,20 @@ def patch_inventory(part_id):
         part_data = inventory_schema.load(request.json, partial=True)
     except ValidationError as e:
         return jsonify(e.messages), 400
+    if supplier_sku_taken(part_data.get('supplier_sku'), part_id):
+        return jsonify({"error": "Supplier SKU already in use."}), 400
+    old_price = part.price
     for key, value in part_data.items():
         setattr(part, key, value)
+    price_changed = part.price != old_price
+    if price_changed:
+        apply_price_change(part_id, part.price - old_price)  # Keep ticket totals in step with the new price
+        refresh_vehicles_for_part(part_id)
+        refresh_daily_stats_for_part(part_id)
+        refresh_part_usage_for_parts([part_id])
     db.session.commit()
+    if price_changed:
+        invalidate_tags('inventory')  # Parts and totals are embedded in cached ticket lists
     return inventory_schema.jsonify(part), 200
 
 # Delete a part
@@ -76,7 +178,35 @@ def delete_inventory(part_id):
     part = db.session.get(Inventory, part_id)
     if not part:
         return jsonify({"error": "Part not found."}), 404
+    apply_price_change(part_id, -part.price)  # Its ticket_inventory rows go with it
+    refresh_vehicles_for_part(part_id)
+    refresh_daily_stats_for_part(part_id)
+    delete_part_usage(part_id)
     db.session.delete(part)
     db.session.commit()
+    invalidate_tags('inventory')  # Parts and totals are embedded in cached ticket lists
     return jsonify({"message": f"Part id {part_id} deleted"}), 200
 
+# CLI: flask inventory rebuild-usage - rebuild the parts usage rollups from scratch
+@inventory_bp.cli.command('rebuild-usage')
+def rebuild_usage_command():
+    """Rebuild part_monthly_usage and part_mechanic_monthly_usage from ticket_inventory."""
+    rebuild_part_usage()
+    db.session.commit()
+    click.echo("Parts usage rollups rebuilt.")
+
+# CLI: flask inventory import <file.csv> - upsert a supplier price list by supplier_sku
+@inventory_bp.cli.command('import')
+@click.argument('csv_file', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--chunk-size', default=IMPORT_CHUNK_SIZE, type=click.IntRange(min=1), show_default=True, help="Rows validated and written per batch.")
+@click.option('--commit-every', default=IMPORT_COMMIT_EVERY, type=click.IntRange(min=1), show_default=True, help="Rows per transaction.")
+def import_command(csv_file, chunk_size, commit_every):
+    """Stream a CSV (supplier_sku,name,price[,stock_on_hand]) into the parts catalog."""
+    try:
+        report = import_inventory_csv(csv_file, inventory_schema, chunk_size, commit_every)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    for line, messages in report.errors:
+        click.echo(f"line {line}: {messages}", err=True)
+    click.echo(f"Imported {report.rows} rows in {report.elapsed:.2f}s ({report.rows_per_second:.0f} rows/sec): "
+               f"{report.inserted} inserted, {report.updated} updated, {report.rejected} rejected.")
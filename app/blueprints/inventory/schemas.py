@@ -1,11 +1,13 @@
 from app.extensions import ma
 from app.models import Inventory, TicketInventory
-from marshmallow import fields
+from marshmallow import fields, validate
 
 # Auto-generates schema from Inventory model
 class InventorySchema(ma.SQLAlchemyAutoSchema):
+    stock_on_hand = fields.Int(allow_none=True, validate=validate.Range(min=0))
     class Meta:
         model = Inventory
+        dump_only = ('version', 'updated_at')  # Maintained by the database
 
 inventory_schema = InventorySchema()
 inventories_schema = InventorySchema(many=True)
@@ -1,5 +1,5 @@
 from flask import Blueprint
 
-mechanics_bp = Blueprint('mechanics_bp', __name__)
+mechanics_bp = Blueprint('mechanics_bp', __name__, cli_group='mechanics')  # CLI: flask mechanics <command>
 
 from . import routes  # Import routes to register them with the blueprint
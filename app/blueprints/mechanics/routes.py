@@ -1,11 +1,28 @@
-from flask import request, jsonify
+import click
+from datetime import date, timedelta
+from flask import request, jsonify, g
 from marshmallow import ValidationError
-from sqlalchemy import select
-from app.models import db, Mechanic
+from sqlalchemy import select, delete, func
+from app.models import db, Mechanic, MechanicDailyStats, MechanicDailyVehicle, PartMechanicMonthlyUsage
 from .schemas import mechanic_schema, mechanics_schema, mechanic_login_schema
 from . import mechanics_bp
-from app.extensions import cache, limiter
+from app.extensions import cache, limiter, invalidate_tags
 from app.utils.util import encode_mechanic_token, mechanic_token_required
+from app.utils.revocation import revoke_token, revoke_subject, prune_revoked_tokens
+from app.utils.pagination import keyset_paginate, paginated_response
+from app.utils.mechanic_stats import recount_ticket_counts, rebuild_daily_stats
+from app.utils.search import search_mechanics, SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT
+from app.utils.passwords import check_login, hash_password_field
+from app.utils.conditional import conditional, row_validators, list_validators
+
+POPULAR_DEFAULT_LIMIT = 10
+POPULAR_MAX_LIMIT = 100
+STATS_DEFAULT_DAYS = 30  # Range used by /<id>/stats when 'from' is omitted
+STATS_GROUPS = {
+    'day': lambda day: day.isoformat(),
+    'week': lambda day: (day - timedelta(days=day.weekday())).isoformat(),  # Monday of the ISO week
+    'month': lambda day: day.strftime('%Y-%m'),
+}
 
 # ---------- NEW: Mechanic Login Route ----------
 @mechanics_bp.route('/login', methods=['POST'])
@@ -24,7 +41,9 @@ def mechanic_login():
     query = select(Mechanic).where(Mechanic.email == email)
     mechanic = db.session.execute(query).scalar_one_or_none()
 
-    if mechanic and mechanic.password == password:
+    # Verifies on the hashing pool and upgrades legacy/outdated hashes (503 via PasswordPoolBusy when saturated)
+    if check_login(mechanic, password):
+        db.session.commit()  # Persist a rehash, if one happened
         auth_token = encode_mechanic_token(mechanic.id)
         response = {
             "status": "success",
@@ -35,15 +54,26 @@ def mechanic_login():
     else:
         return jsonify({'messages': "Invalid email or password"}), 401
 
+# POST '/logout' - Revoke the presented mechanic token until it expires
+@mechanics_bp.route('/logout', methods=['POST'])
+@mechanic_token_required
+def mechanic_logout(token_mechanic_id=None):
+    if not g.token_claims.get('jti'):
+        return jsonify({"error": "This token cannot be revoked individually; it expires within the hour."}), 400
+    revoke_token(g.token_claims)
+    prune_revoked_tokens()  # Housekeeping: drop revocations whose tokens have expired anyway
+    db.session.commit()
+    return jsonify({"status": "success", "message": "Successfully Logged Out"}), 200
+
 # --- Example: Protect a route so only mechanics can use it ---
 @mechanics_bp.route('/protected', methods=['GET'])
 @mechanic_token_required
-def mechanic_protected(mechanic_id):
+def mechanic_protected(token_mechanic_id=None):
     """
     Example protected route for mechanics only.
-    mechanic_id is passed from the decorator.
+    token_mechanic_id is passed from the decorator.
     """
-    return jsonify({"message": f"Mechanic {mechanic_id} accessed this route!"}), 200
+    return jsonify({"message": f"Mechanic {token_mechanic_id} accessed this route!"}), 200
 
 
 # POST '/' : Creates a new Mechanic
@@ -61,27 +91,25 @@ def create_mechanic():
     if existing:
         return jsonify({"error": "Email already in use."}), 400
 
-    new_mechanic = Mechanic(**mechanic_data)
+    new_mechanic = Mechanic(**hash_password_field(mechanic_data))
     db.session.add(new_mechanic)
     db.session.commit()
     return mechanic_schema.jsonify(new_mechanic), 201
 
 # GET '/': Retrieves all Mechanics
+# Cursor paginated: ?per_page=N&cursor=<X-Next-Cursor from the previous page>
 @mechanics_bp.route('/', methods=['GET'])
+@conditional(list_validators(Mechanic))  # ETag / 304 from the table's cache tag
 def get_mechanics():
     try:
-        page = int(request.args.get('page'))
-        per_page = int(request.args.get('per_page'))
-        query = select(Mechanic)
-        mechanics = db.paginate(query, page=page, per_page=per_page, error_out=False).items
-        return mechanics_schema.jsonify(mechanics), 200
-    except:
-        query = select(Mechanic)
-        mechanics = db.session.execute(query).scalars().all()
-        return mechanics_schema.jsonify(mechanics)
+        mechanics, next_cursor = keyset_paginate(select(Mechanic), [Mechanic.id])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return paginated_response(mechanics_schema, mechanics, next_cursor), 200
 
 # GET '/<int:id>': Retrieve a single mechanic
 @mechanics_bp.route('/<int:id>', methods=['GET'])
+@conditional(row_validators(Mechanic))  # ETag / 304 from the row version
 def get_mechanic(id):
     mechanic = db.session.get(Mechanic, id)
     if not mechanic:
@@ -105,10 +133,13 @@ def update_mechanic(id, token_mechanic_id=None):
     except ValidationError as e:
         return jsonify(e.messages), 400
 
-    for key, value in mechanic_data.items():
+    if mechanic_data.get('password'):
+        revoke_subject('mechanic', id)  # Sessions opened with the old password end here
+    for key, value in hash_password_field(mechanic_data).items():
         setattr(mechanic, key, value)
 
     db.session.commit()
+    invalidate_tags('mechanics')  # Mechanics are embedded in cached ticket responses
     return mechanic_schema.jsonify(mechanic), 200
 
 # PATCH '/<int:id>': Partially updates a specific Mechanic
@@ -128,10 +159,13 @@ def patch_mechanic(id, token_mechanic_id=None):
     except ValidationError as e:
         return jsonify(e.messages), 400
 
-    for key, value in mechanic_data.items():
+    if mechanic_data.get('password'):
+        revoke_subject('mechanic', id)  # Sessions opened with the old password end here
+    for key, value in hash_password_field(mechanic_data).items():
         setattr(mechanic, key, value)
 
     db.session.commit()
+    invalidate_tags('mechanics')  # Mechanics are embedded in cached ticket responses
     return mechanic_schema.jsonify(mechanic), 200
 
 # DELETE '/<int:id>': Deletes a specific Mechanic
@@ -146,26 +180,128 @@ def delete_mechanic(id, token_mechanic_id=None):
     if str(id) != str(token_mechanic_id):
         return jsonify({"error": "You can only delete your own mechanic account."}), 403
 
+    revoke_subject('mechanic', id)  # A removed mechanic's live tokens stop working immediately
+    db.session.execute(delete(MechanicDailyStats).where(MechanicDailyStats.mechanic_id == id))
+    db.session.execute(delete(MechanicDailyVehicle).where(MechanicDailyVehicle.mechanic_id == id))
+    db.session.execute(delete(PartMechanicMonthlyUsage).where(PartMechanicMonthlyUsage.mechanic_id == id))
     db.session.delete(mechanic)
     db.session.commit()
+    invalidate_tags('mechanics')
     return jsonify({"message": f"Mechanic id: {id}, successfully deleted."})
 
 # GET '/popular' - Get popular mechanics
+# ?limit=N (default 10, max 100); ordered by the maintained ticket_count via ix_mechanics_ticket_count
 @mechanics_bp.route('/popular', methods=['GET'])
 def popular_mechanics():
-    query = select(Mechanic)
+    try:
+        limit = int(request.args.get('limit', POPULAR_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer."}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be at least 1."}), 400
+
+    query = (
+        select(Mechanic)
+        .order_by(Mechanic.ticket_count.desc(), Mechanic.id)
+        .limit(min(limit, POPULAR_MAX_LIMIT))
+    )
     mechanics = db.session.execute(query).scalars().all()
+    return mechanics_schema.jsonify(mechanics), 200
 
-    mechanics.sort(key=lambda mechanic: len(mechanic.tickets), reverse=True)
+# CLI: flask mechanics recount - rebuild ticket_count from ticket_mechanic
+@mechanics_bp.cli.command('recount')
+def recount_command():
+    """Rebuild every mechanic's ticket_count from a GROUP BY over ticket_mechanic."""
+    recount_ticket_counts()
+    db.session.commit()
+    click.echo("Mechanic ticket counts rebuilt.")
 
-    return mechanics_schema.jsonify(mechanics), 200
+# CLI: flask mechanics rebuild-stats - rebuild mechanic_daily_stats from scratch
+@mechanics_bp.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Rebuild the per-mechanic daily rollups (stats and vehicles) from ticket_mechanic and tickets."""
+    rebuild_daily_stats()
+    db.session.commit()
+    click.echo("Mechanic daily stats rebuilt.")
+
+# GET '/<id>/stats' - Tickets handled, distinct vehicles and parts revenue for one mechanic
+# ?from=YYYY-MM-DD&to=YYYY-MM-DD (inclusive; default the last 30 days) &group=day|week|month (default day)
+@mechanics_bp.route('/<int:id>/stats', methods=['GET'])
+def get_mechanic_stats(id):
+    """
+    Reads one mechanic_daily_stats row per active day in the range (a primary-key
+    range scan) and folds tickets and revenue into periods. Distinct counts do not
+    add up across days: by day, vehicles is the rollup's own column; week and month
+    periods and the totals count VINs from mechanic_daily_vehicles, another
+    primary-key range scan, so tickets are never read here.
+    """
+    if not db.session.get(Mechanic, id):
+        return jsonify({"error": "Mechanic not found."}), 404
+
+    bounds = {}
+    for param in ('from', 'to'):
+        try:
+            bounds[param] = date.fromisoformat(request.args[param]) if request.args.get(param) else None
+        except ValueError:
+            return jsonify({"error": f"'{param}' must be a date in YYYY-MM-DD format."}), 400
+    end = bounds['to'] or date.today()
+    start = bounds['from'] or end - timedelta(days=STATS_DEFAULT_DAYS - 1)
+    if start > end:
+        return jsonify({"error": "'from' must not be after 'to'."}), 400
+    group = request.args.get('group', 'day')
+    if group not in STATS_GROUPS:
+        return jsonify({"error": f"group must be one of: {', '.join(STATS_GROUPS)}."}), 400
+
+    query = (
+        select(MechanicDailyStats)
+        .where(MechanicDailyStats.mechanic_id == id, MechanicDailyStats.day.between(start, end))
+        .order_by(MechanicDailyStats.day)
+    )
+    periods, totals = {}, {"tickets": 0, "vehicles": 0, "parts_revenue": 0.0}
+    for row in db.session.execute(query).scalars():
+        period = periods.setdefault(STATS_GROUPS[group](row.day), {"tickets": 0, "vehicles": 0, "parts_revenue": 0.0})
+        if group == 'day':
+            period["vehicles"] = row.vehicles
+        for bucket in (period, totals):
+            bucket["tickets"] += row.tickets
+            bucket["parts_revenue"] += row.parts_revenue
+
+    in_range = (MechanicDailyVehicle.mechanic_id == id, MechanicDailyVehicle.day.between(start, end))
+    if group == 'day':
+        totals["vehicles"] = db.session.execute(
+            select(func.count(func.distinct(MechanicDailyVehicle.vin))).where(*in_range)
+        ).scalar()
+    else:
+        vins, all_vins = {}, set()
+        for day, vin in db.session.execute(select(MechanicDailyVehicle.day, MechanicDailyVehicle.vin).where(*in_range)):
+            vins.setdefault(STATS_GROUPS[group](day), set()).add(vin)
+            all_vins.add(vin)
+        for key, period in periods.items():
+            period["vehicles"] = len(vins.get(key, ()))
+        totals["vehicles"] = len(all_vins)
+
+    return jsonify({
+        "mechanic_id": id,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "group": group,
+        "totals": totals,
+        "periods": [{"period": key, **values} for key, values in periods.items()],
+    }), 200
 
 # GET '/search' - Search for mechanics by name
+# ?name=<words>&limit=N: every word matches as a name prefix, best matches first (see app/utils/search.py)
 @mechanics_bp.route('/search', methods=['GET'])
 def search_mechanic():
-    name = request.args.get('name')
-
-    query = select(Mechanic).where(Mechanic.name.like(f"%{name}%"))
-    mechanics = db.session.execute(query).scalars().all()
+    name = (request.args.get('name') or '').strip()
+    if not name:
+        return jsonify({"error": "name is required."}), 400
+    try:
+        limit = int(request.args.get('limit', SEARCH_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer."}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be at least 1."}), 400
 
-    return mechanics_schema.jsonify(mechanics)
\ No newline at end of file
+    mechanics = search_mechanics(name, min(limit, SEARCH_MAX_LIMIT))
+    return mechanics_schema.jsonify(mechanics), 200
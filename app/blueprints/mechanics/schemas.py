@@ -5,6 +5,8 @@ from app.models import Mechanic
 class MechanicSchema(ma.SQLAlchemyAutoSchema):
     class Meta:
         model = Mechanic
+        dump_only = ('ticket_count', 'version', 'updated_at')  # Maintained by the server, never accepted from clients
+        load_only = ('password',)  # Stored hashed; never serialized
 
 mechanic_schema = MechanicSchema()
 mechanics_schema = MechanicSchema(many=True)
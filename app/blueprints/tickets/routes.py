@@ -1,13 +1,73 @@
-from flask import request, jsonify
+import csv
+import io
+import json
+from datetime import date
+from flask import request, jsonify, Response, stream_with_context
 from marshmallow import ValidationError
-from sqlalchemy import select
-from app.models import db, Ticket, Mechanic, Inventory, TicketInventory
+from sqlalchemy import select, insert, delete, and_
+from sqlalchemy.orm import joinedload, selectinload
+from app.models import db, Ticket, Mechanic, Inventory, TicketInventory, Customer, ticket_mechanic
 from app.blueprints.inventory.schemas import inventory_schema
-from .schemas import ticket_schema, tickets_schema, edit_ticket_schema
+from .schemas import ticket_schema, tickets_schema, tickets_with_totals_schema, edit_ticket_schema, bulk_ticket_assignment_schema, ticket_part_schema, ticket_parts_schema, auto_assign_schema
 from app.blueprints.mechanics.schemas import mechanics_schema  # <-- import here
 from . import tickets_bp
-from app.extensions import cache, limiter
+from app.extensions import cache, limiter, invalidate_tags, tagged_cache_key, TAGGED_CACHE_TIMEOUT
 from app.utils.util import token_required
+from app.utils.pagination import keyset_paginate, paginated_response
+from app.utils.conditional import conditional, tagged_list_etag, touch
+from app.utils.stock import reserve_stock
+from app.utils.totals import add_parts_to_total, recompute_ticket_totals, invoice_lines
+from app.utils.vehicles import refresh_vehicle_summaries
+from app.utils.upsert import increment_upsert
+from app.utils.part_usage import add_part_usage, part_usage_keys, refresh_part_usage_for_tickets, refresh_part_usage_for_mechanics
+from app.utils.mechanic_stats import adjust_ticket_counts, get_load_heap, daily_stats_keys, refresh_daily_stats, refresh_daily_stats_for_tickets
+
+def ticket_list_query():
+    """
+    Base SELECT for ticket listings.
+    Mechanics, parts and the customer are loaded up front (one extra query per
+    relationship) so serializing N tickets never lazy-loads per row.
+    """
+    return select(Ticket).options(
+        selectinload(Ticket.mechanics),
+        selectinload(Ticket.ticket_parts),
+        joinedload(Ticket.customer),
+    )
+
+def ticket_filter_clauses(args):
+    """
+    Translate ticket filter query params into WHERE clauses.
+    Supported: vin, from / to (YYYY-MM-DD, inclusive), customer_id and mechanic_id.
+    Each maps onto an index: ix_tickets_vin, ix_tickets_customer_id_ticket_date
+    and ix_ticket_mechanic_mechanic_id.
+    Raises ValueError with a client-facing message on malformed values.
+    """
+    clauses = []
+    if args.get('vin'):
+        clauses.append(Ticket.vin == args['vin'].strip())
+    for param, build in (('from', lambda d: Ticket.ticket_date >= d), ('to', lambda d: Ticket.ticket_date <= d)):
+        if args.get(param):
+            try:
+                clauses.append(build(date.fromisoformat(args[param])))
+            except ValueError:
+                raise ValueError(f"'{param}' must be a date in YYYY-MM-DD format.")
+    for param, build in (
+        ('customer_id', lambda value: Ticket.customer_id == value),
+        ('mechanic_id', lambda value: Ticket.id.in_(
+            select(ticket_mechanic.c.ticket_id).where(ticket_mechanic.c.mechanic_id == value))),
+    ):
+        if args.get(param):
+            try:
+                clauses.append(build(int(args[param])))
+            except ValueError:
+                raise ValueError(f"'{param}' must be an integer.")
+    return clauses
+
+def invalidate_ticket_caches(ticket_ids=(), customer_ids=()):
+    """Drop cached ticket lists plus the per-ticket and per-customer views touched by a write."""
+    invalidate_tags('tickets',
+                    *[f"ticket:{ticket_id}" for ticket_id in ticket_ids],
+                    *[f"customer:{customer_id}" for customer_id in customer_ids if customer_id is not None])
 
 # POST '/' - Create ticket
 @tickets_bp.route('/', methods=['POST'])
@@ -28,29 +88,314 @@ def create_ticket():
 
     new_ticket = Ticket(**ticket_data)
     db.session.add(new_ticket)
+    refresh_vehicle_summaries([new_ticket.vin])
     db.session.commit()
+    invalidate_ticket_caches([new_ticket.id], [new_ticket.customer_id])
     return ticket_schema.jsonify(new_ticket), 201
 
-# GET '/' - Get all tickets
+BULK_MAX_TICKETS = 500  # Upper bound on items accepted by POST /tickets/bulk
+
+def existing_ids(model, ids):
+    """Return the subset of ids present in model's table, using a single IN (...) query."""
+    if not ids:
+        return set()
+    return set(db.session.execute(select(model.id).where(model.id.in_(ids))).scalars())
+
+def upsert_ticket_parts(ticket_id, quantities):
+    """
+    Add {inventory_id: quantity} to a ticket with one INSERT ... ON CONFLICT /
+    ON DUPLICATE KEY UPDATE quantity = quantity + new quantity (executemany).
+    The increment happens inside the database, so concurrent adds never lose
+    updates. Caller commits.
+    """
+    rows = [{'ticket_id': ticket_id, 'inventory_id': inventory_id, 'quantity': quantity}
+            for inventory_id, quantity in quantities.items()]
+    increment_upsert(TicketInventory, [TicketInventory.ticket_id, TicketInventory.inventory_id], rows, ['quantity'])
+    add_parts_to_total(ticket_id, quantities)
+    add_part_usage(rows)
+
+def auto_assign_mechanics(ticket_ids):
+    """
+    Give each ticket the least-loaded mechanic not already on it, using the
+    in-process load heap (no aggregate query). Tickets are served in order, so a
+    batch spreads across mechanics. Returns {ticket_id: mechanic_id or None}.
+    Caller refreshes the daily rollup and commits.
+    """
+    ticket_ids = list(dict.fromkeys(ticket_ids))
+    current = {ticket_id: set() for ticket_id in ticket_ids}
+    rows = db.session.execute(
+        select(ticket_mechanic.c.ticket_id, ticket_mechanic.c.mechanic_id)
+        .where(ticket_mechanic.c.ticket_id.in_(ticket_ids))
+    )
+    for ticket_id, mechanic_id in rows:
+        current[ticket_id].add(mechanic_id)
+
+    picks = dict(zip(ticket_ids, get_load_heap().pick([current[ticket_id] for ticket_id in ticket_ids])))
+    rows = [{'ticket_id': ticket_id, 'mechanic_id': mechanic_id}
+            for ticket_id, mechanic_id in picks.items() if mechanic_id is not None]
+    if rows:
+        db.session.execute(insert(ticket_mechanic), rows)
+        deltas = {}
+        for row in rows:
+            deltas[row['mechanic_id']] = deltas.get(row['mechanic_id'], 0) + 1
+        adjust_ticket_counts(deltas)
+    return picks
+
+# POST '/bulk' - Create many tickets in one transaction
+@tickets_bp.route('/bulk', methods=['POST'])
+def create_tickets_bulk():
+    """
+    Create many service tickets at once.
+    Expected JSON: a list of ticket payloads, each optionally carrying assignments:
+    [
+        {
+            "vin": "string",
+            "ticket_date": "YYYY-MM-DD",
+            "customer_id": int,
+            "mechanic_ids": [int],                              (optional)
+            "parts": [{"inventory_id": int, "quantity": int}]   (optional)
+        }
+    ]
+    With ?auto_assign=true, tickets sent without mechanic_ids get the
+    least-loaded mechanic (see auto_assign_mechanics).
+    Valid items are inserted in one transaction; invalid items are skipped and
+    reported under "errors", keyed by their index in the request.
+    """
+    payloads = request.get_json(silent=True)
+    if not isinstance(payloads, list) or not payloads:
+        return jsonify({"error": "Expected a non-empty JSON array of tickets."}), 400
+    if len(payloads) > BULK_MAX_TICKETS:
+        return jsonify({"error": f"At most {BULK_MAX_TICKETS} tickets per request."}), 400
+
+    errors = {}
+    ticket_payloads, assignments = [], []
+    for index, payload in enumerate(payloads):
+        extras = {}
+        if isinstance(payload, dict):
+            payload = dict(payload)
+            extras = {key: payload.pop(key) for key in ('mechanic_ids', 'parts') if key in payload}
+        try:
+            assignments.append(bulk_ticket_assignment_schema.load(extras))
+        except ValidationError as e:
+            errors[index] = e.messages
+            assignments.append(None)
+        ticket_payloads.append(payload)
+
+    try:
+        ticket_data = ticket_schema.load(ticket_payloads, many=True)
+    except ValidationError as e:
+        ticket_data = e.valid_data
+        for index, messages in e.messages.items():
+            errors.setdefault(index, {}).update(messages)
+
+    # Resolve every referenced id with one IN (...) query per table
+    valid = [index for index in range(len(payloads)) if index not in errors]
+    customer_ids = existing_ids(Customer, {ticket_data[i]['customer_id'] for i in valid})
+    mechanic_ids = existing_ids(Mechanic, {m for i in valid for m in assignments[i]['mechanic_ids']})
+    inventory_ids = existing_ids(Inventory, {p['inventory_id'] for i in valid for p in assignments[i]['parts']})
+    for index in valid:
+        item_errors = {}
+        if ticket_data[index]['customer_id'] not in customer_ids:
+            item_errors['customer_id'] = ["Customer not found."]
+        missing = sorted(set(assignments[index]['mechanic_ids']) - mechanic_ids)
+        if missing:
+            item_errors['mechanic_ids'] = [f"Mechanic(s) not found: {missing}"]
+        missing = sorted({p['inventory_id'] for p in assignments[index]['parts']} - inventory_ids)
+        if missing:
+            item_errors['parts'] = [f"Part(s) not found: {missing}"]
+        if item_errors:
+            errors[index] = item_errors
+    valid = [index for index in valid if index not in errors]
+
+    # Reserve stock for all valid items in one statement. Items needing a part that ran
+    # short fail; the reservation is rolled back and retried for the rest.
+    while valid:
+        totals = {}
+        for index in valid:
+            for part in assignments[index]['parts']:
+                totals[part['inventory_id']] = totals.get(part['inventory_id'], 0) + part['quantity']
+        short = set(reserve_stock(totals))
+        if not short:
+            break
+        db.session.rollback()
+        for index in valid:
+            missing = sorted(short & {part['inventory_id'] for part in assignments[index]['parts']})
+            if missing:
+                errors[index] = {'parts': [f"Insufficient stock for part(s): {missing}"]}
+        valid = [index for index in valid if index not in errors]
+
+    if not valid:
+        db.session.rollback()
+        return jsonify({"created": [], "errors": {str(i): m for i, m in sorted(errors.items())}}), 400
+
+    new_tickets = [Ticket(**ticket_data[index]) for index in valid]
+    db.session.add_all(new_tickets)
+    db.session.flush()  # Batched multi-row INSERT; populates the new ticket ids
+
+    mechanic_rows, part_rows = [], []
+    for index, ticket in zip(valid, new_tickets):
+        for mechanic_id in dict.fromkeys(assignments[index]['mechanic_ids']):
+            mechanic_rows.append({'ticket_id': ticket.id, 'mechanic_id': mechanic_id})
+        quantities = {}
+        for part in assignments[index]['parts']:
+            quantities[part['inventory_id']] = quantities.get(part['inventory_id'], 0) + part['quantity']
+        part_rows.extend({'ticket_id': ticket.id, 'inventory_id': inventory_id, 'quantity': quantity}
+                         for inventory_id, quantity in quantities.items())
+    # executemany for the junction rows
+    if mechanic_rows:
+        db.session.execute(insert(ticket_mechanic), mechanic_rows)
+        deltas = {}
+        for row in mechanic_rows:
+            deltas[row['mechanic_id']] = deltas.get(row['mechanic_id'], 0) + 1
+        adjust_ticket_counts(deltas)
+    if request.args.get('auto_assign') == 'true':
+        auto_assign_mechanics([ticket.id for index, ticket in zip(valid, new_tickets)
+                               if not assignments[index]['mechanic_ids']])
+    if part_rows:
+        db.session.execute(insert(TicketInventory), part_rows)
+        recompute_ticket_totals({row['ticket_id'] for row in part_rows})
+        add_part_usage(part_rows)
+    customer_ids = {ticket.customer_id for ticket in new_tickets}
+    refresh_vehicle_summaries({ticket.vin for ticket in new_tickets})
+    refresh_daily_stats_for_tickets([ticket.id for ticket in new_tickets])
+    db.session.commit()
+
+    ids = [ticket.id for ticket in new_tickets]
+    invalidate_ticket_caches(ids, customer_ids)
+    created = db.session.execute(ticket_list_query().where(Ticket.id.in_(ids)).order_by(Ticket.id)).scalars().all()
+    return jsonify({
+        "created": tickets_schema.dump(created),
+        "errors": {str(i): m for i, m in sorted(errors.items())},
+    }), 201
+
+def ticket_list_validators(token_customer_id=None, **_):
+    """
+    ETag for ticket lists from the tags their cached bodies are keyed on (tickets
+    or the customer, plus the embedded mechanics and parts), so a 304 costs no
+    query. Bad filters fall through to the view's 400.
+    """
+    try:
+        ticket_filter_clauses(request.args)
+    except ValueError:
+        return None
+    owner = 'tickets' if token_customer_id is None else f"customer:{token_customer_id}"
+    return tagged_list_etag(owner, 'mechanics', 'inventory')
+
+def list_schema():
+    """Ticket list schema, adding the stored parts_total when the client asks for ?include=totals."""
+    includes = request.args.get('include', '').split(',')
+    return tickets_with_totals_schema if 'totals' in includes else tickets_schema
+
+# GET '/' - Get all tickets, cursor paginated by (ticket_date, id)
+# Optional filters: ?vin=&from=&to=&customer_id=&mechanic_id=
 @tickets_bp.route('/', methods=['GET'])
-@cache.cached(timeout=60)  # Cache the response for 60 seconds
+@conditional(ticket_list_validators)
+@cache.cached(timeout=TAGGED_CACHE_TIMEOUT, make_cache_key=tagged_cache_key('tickets', 'mechanics', 'inventory'))
 def get_tickets():
-    query = select(Ticket)
-    tickets = db.session.execute(query).scalars().all()
-    return tickets_schema.jsonify(tickets), 200
+    try:
+        query = ticket_list_query().where(*ticket_filter_clauses(request.args))
+        tickets, next_cursor = keyset_paginate(query, [Ticket.ticket_date, Ticket.id])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return paginated_response(list_schema(), tickets, next_cursor), 200
 
 # --- ADDED: Get tickets related to the authenticated customer ---
 @tickets_bp.route('/my-tickets', methods=['GET'])
 @token_required
+@conditional(ticket_list_validators)
+@cache.cached(timeout=TAGGED_CACHE_TIMEOUT,
+              make_cache_key=tagged_cache_key(lambda token_customer_id=None, **_: f"customer:{token_customer_id}", 'mechanics', 'inventory'))
 def get_my_tickets(token_customer_id=None):
-    tickets = db.session.query(Ticket).filter_by(customer_id=token_customer_id).all()
-    return tickets_schema.jsonify(tickets), 200
+    query = ticket_list_query().where(Ticket.customer_id == token_customer_id)
+    try:
+        tickets, next_cursor = keyset_paginate(query, [Ticket.ticket_date, Ticket.id])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return paginated_response(list_schema(), tickets, next_cursor), 200
+
+EXPORT_BATCH_SIZE = 500  # Rows fetched (and relationships eager-loaded) per server-side cursor batch
+EXPORT_CSV_FIELDS = ['id', 'vin', 'ticket_date', 'customer_id', 'mechanic_ids', 'parts']
+
+def export_row(ticket):
+    return {
+        'id': ticket.id,
+        'vin': ticket.vin,
+        'ticket_date': ticket.ticket_date.isoformat() if ticket.ticket_date else None,
+        'customer_id': ticket.customer_id,
+        'mechanic_ids': [mechanic.id for mechanic in ticket.mechanics],
+        'parts': [{'inventory_id': part.inventory_id, 'quantity': part.quantity} for part in ticket.ticket_parts],
+    }
+
+# GET '/export' - Stream every matching ticket as NDJSON (default) or CSV
+@tickets_bp.route('/export', methods=['GET'])
+def export_tickets():
+    """
+    Streams tickets with their mechanics and parts.
+    Query params: format=ndjson|csv plus the GET /tickets filters (vin, from, to, customer_id, mechanic_id).
+    Rows are pulled with yield_per and written one at a time, so memory stays
+    flat no matter how many tickets match.
+    """
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({"error": "format must be 'ndjson' or 'csv'."}), 400
+    try:
+        clauses = ticket_filter_clauses(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    query = (
+        select(Ticket)
+        .options(selectinload(Ticket.mechanics), selectinload(Ticket.ticket_parts))
+        .where(*clauses)
+        .order_by(Ticket.ticket_date, Ticket.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+
+    def generate_ndjson():
+        for ticket in db.session.execute(query).scalars():
+            yield json.dumps(export_row(ticket)) + '\n'
+
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_CSV_FIELDS)
+        writer.writeheader()
+        for ticket in db.session.execute(query).scalars():
+            row = export_row(ticket)
+            row['mechanic_ids'] = ';'.join(str(mechanic_id) for mechanic_id in row['mechanic_ids'])
+            row['parts'] = ';'.join(f"{part['inventory_id']}:{part['quantity']}" for part in row['parts'])
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        yield buffer.getvalue()
+
+    if export_format == 'csv':
+        response = Response(stream_with_context(generate_csv()), mimetype='text/csv')
+        response.headers['Content-Disposition'] = 'attachment; filename=tickets.csv'
+        return response
+    return Response(stream_with_context(generate_ndjson()), mimetype='application/x-ndjson')
+
+# GET '/<ticket_id>/invoice' - Priced parts and total for one ticket
+@tickets_bp.route('/<int:ticket_id>/invoice', methods=['GET'])
+def get_ticket_invoice(ticket_id):
+    ticket = db.session.get(Ticket, ticket_id)
+    if not ticket:
+        return jsonify({"error": "Ticket not found."}), 404
+
+    lines = invoice_lines(ticket_id)
+    return jsonify({
+        "ticket_id": ticket_id,
+        "lines": lines,
+        "total": round(sum(line['line_total'] for line in lines), 2),
+    }), 200
 
 # GET '/<ticket_id>/mechanics' - Get all mechanics for a specific ticket
 @tickets_bp.route('/<int:ticket_id>/mechanics', methods=['GET'])
-@cache.cached(timeout=60)  # Cache the response for 60 seconds
+@cache.cached(timeout=TAGGED_CACHE_TIMEOUT,
+              make_cache_key=tagged_cache_key(lambda ticket_id, **_: f"ticket:{ticket_id}", 'mechanics'))
 def get_ticket_mechanics(ticket_id):
-    ticket = db.session.get(Ticket, ticket_id)
+    query = select(Ticket).options(selectinload(Ticket.mechanics)).where(Ticket.id == ticket_id)
+    ticket = db.session.execute(query).scalar_one_or_none()
     if not ticket:
         return jsonify({"error": "Ticket not found."}), 404
 
@@ -69,7 +414,12 @@ def assign_mechanic(ticket_id, mechanic_id):
 
     if mechanic not in ticket.mechanics:
         ticket.mechanics.append(mechanic)
+        adjust_ticket_counts({mechanic_id: 1})
+        refresh_daily_stats({(mechanic_id, ticket.ticket_date)})
+        refresh_part_usage_for_mechanics([(ticket_id, mechanic_id)])
+        touch(Ticket, [ticket_id])
         db.session.commit()
+        invalidate_ticket_caches([ticket_id], [ticket.customer_id])
     return ticket_schema.jsonify(ticket), 200
 
 # PUT '/<ticket_id>/remove-mechanic/<mechanic_id>' - Remove mechanic from ticket
@@ -85,11 +435,60 @@ def remove_mechanic(ticket_id, mechanic_id):
 
     if mechanic in ticket.mechanics:
         ticket.mechanics.remove(mechanic)
+        adjust_ticket_counts({mechanic_id: -1})
+        refresh_daily_stats({(mechanic_id, ticket.ticket_date)})
+        refresh_part_usage_for_mechanics([(ticket_id, mechanic_id)])
+        touch(Ticket, [ticket_id])
         db.session.commit()
+        invalidate_ticket_caches([ticket_id], [ticket.customer_id])
         return jsonify({"message": f"Successfully removed mechanic {mechanic_id}: {mechanic.name} from ticket {ticket_id}."}), 200
     else:
         return jsonify({"error": f"Mechanic {mechanic_id}: {mechanic.name} is not assigned to ticket {ticket_id}."}), 404
 
+# POST '/<ticket_id>/auto-assign' - Assign the least-loaded mechanic to a ticket
+@tickets_bp.route('/<int:ticket_id>/auto-assign', methods=['POST'])
+def auto_assign_mechanic(ticket_id):
+    ticket = db.session.get(Ticket, ticket_id)
+    if not ticket:
+        return jsonify({"error": "Ticket not found."}), 404
+
+    mechanic_id = auto_assign_mechanics([ticket_id])[ticket_id]
+    if mechanic_id is None:
+        return jsonify({"error": "No mechanic available for this ticket."}), 409
+    refresh_daily_stats({(mechanic_id, ticket.ticket_date)})
+    refresh_part_usage_for_mechanics([(ticket_id, mechanic_id)])
+    touch(Ticket, [ticket_id])
+    db.session.commit()
+    invalidate_ticket_caches([ticket_id], [ticket.customer_id])
+    return ticket_schema.jsonify(ticket), 200
+
+# POST '/auto-assign' - Assign the least-loaded mechanic to each ticket in a batch
+# Expected JSON: {"ticket_ids": [int]}; responds with {"assigned": {ticket_id: mechanic_id}, "errors": {ticket_id: message}}
+@tickets_bp.route('/auto-assign', methods=['POST'])
+def auto_assign_mechanics_batch():
+    try:
+        data = auto_assign_schema.load(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+
+    ticket_ids = list(dict.fromkeys(data['ticket_ids']))
+    found = existing_ids(Ticket, ticket_ids)
+    errors = {str(ticket_id): "Ticket not found." for ticket_id in ticket_ids if ticket_id not in found}
+    picks = auto_assign_mechanics([ticket_id for ticket_id in ticket_ids if ticket_id in found])
+    assigned = {}
+    for ticket_id, mechanic_id in picks.items():
+        if mechanic_id is None:
+            errors[str(ticket_id)] = "No mechanic available for this ticket."
+        else:
+            assigned[str(ticket_id)] = mechanic_id
+    customer_ids = set(db.session.execute(select(Ticket.customer_id).where(Ticket.id.in_(found))).scalars())
+    refresh_daily_stats_for_tickets([int(ticket_id) for ticket_id in assigned])
+    refresh_part_usage_for_mechanics([(int(ticket_id), mechanic_id) for ticket_id, mechanic_id in assigned.items()])
+    touch(Ticket, [int(ticket_id) for ticket_id in assigned])
+    db.session.commit()
+    invalidate_ticket_caches(found, customer_ids)
+    return jsonify({"assigned": assigned, "errors": errors}), 200 if assigned or not errors else 409
+
 # PATCH '/<ticket_id>' - Partially update a ticket
 @tickets_bp.route('/<int:ticket_id>', methods=['PATCH'])
 @limiter.limit("5 per day")  # Rate limit to 5 requests per day
@@ -114,6 +513,9 @@ def patch_ticket(ticket_id):
     except ValidationError as e:
         return jsonify(e.messages), 400
 
+    old_customer_id, old_vin = ticket.customer_id, ticket.vin
+    old_stats_keys = daily_stats_keys([ticket_id])  # The ticket date may move to another day
+    old_usage_keys = part_usage_keys([ticket_id])  # ... or another month
     updated = False
     for key, value in ticket_data.items():
         if hasattr(ticket, key):
@@ -123,7 +525,11 @@ def patch_ticket(ticket_id):
     if not updated:
         return jsonify({"error": "No valid fields provided for update."}), 400
 
+    refresh_vehicle_summaries([old_vin, ticket.vin])  # VIN or date may have changed
+    refresh_daily_stats_for_tickets([ticket_id], old_stats_keys)
+    refresh_part_usage_for_tickets([ticket_id], old_usage_keys)
     db.session.commit()
+    invalidate_ticket_caches([ticket_id], [old_customer_id, ticket.customer_id])
     return ticket_schema.jsonify(ticket), 200
 
 @tickets_bp.route('/<int:ticket_id>', methods=['PUT'])
@@ -134,24 +540,40 @@ def update_ticket(ticket_id):
         return jsonify(e.messages), 400
 
 
-    query = select(Ticket).where(Ticket.id == ticket_id)
-    ticket = db.session.execute(query).scalars().first()
+    ticket = db.session.get(Ticket, ticket_id)
+    if not ticket:
+        return jsonify({"error": "Ticket not found."}), 404
 
-    # Add or remove mechanics based on the provided IDs
-    for mechanic_id in ticket_edits['add_mechanic_ids']:
-        query = select(Mechanic).where(Mechanic.id == mechanic_id)
-        mechanic = db.session.execute(query).scalars().first()
-        if mechanic and mechanic not in ticket.mechanics:
-            ticket.mechanics.append(mechanic)
+    add_ids = set(ticket_edits['add_mechanic_ids'])
+    remove_ids = set(ticket_edits['remove_mechanic_ids'])
 
-    # Remove mechanics based on the provided IDs
-    for mechanic_id in ticket_edits['remove_mechanic_ids']:
-        query = select(Mechanic).where(Mechanic.id == mechanic_id)
-        mechanic = db.session.execute(query).scalars().first()
-        if mechanic and mechanic in ticket.mechanics:
-            ticket.mechanics.remove(mechanic)
+    # One IN (...) lookup: which requested mechanics exist, and which of them are already on this ticket
+    assigned = {}
+    if add_ids | remove_ids:
+        query = (
+            select(Mechanic.id, ticket_mechanic.c.ticket_id)
+            .outerjoin(ticket_mechanic, and_(ticket_mechanic.c.mechanic_id == Mechanic.id,
+                                             ticket_mechanic.c.ticket_id == ticket_id))
+            .where(Mechanic.id.in_(add_ids | remove_ids))
+        )
+        assigned = {mechanic_id: link is not None for mechanic_id, link in db.session.execute(query)}
+
+    # Unknown ids are ignored, as before
+    to_add = {m for m in add_ids - remove_ids if m in assigned and not assigned[m]}
+    to_remove = {m for m in remove_ids if assigned.get(m)}
+    if to_add:
+        db.session.execute(insert(ticket_mechanic), [{'ticket_id': ticket_id, 'mechanic_id': m} for m in to_add])
+    if to_remove:
+        db.session.execute(delete(ticket_mechanic).where(ticket_mechanic.c.ticket_id == ticket_id,
+                                                         ticket_mechanic.c.mechanic_id.in_(to_remove)))
+    adjust_ticket_counts({**{m: 1 for m in to_add}, **{m: -1 for m in to_remove}})
+    refresh_daily_stats({(m, ticket.ticket_date) for m in to_add | to_remove})
+    refresh_part_usage_for_mechanics([(ticket_id, m) for m in to_add | to_remove])
+    if to_add or to_remove:
+        touch(Ticket, [ticket_id])
 
     db.session.commit()
+    invalidate_ticket_caches([ticket_id], [ticket.customer_id])
     return ticket_schema.jsonify(ticket), 200
 
 # --- Add Part to Service Ticket ---
@@ -169,20 +591,63 @@ def add_part_to_ticket(ticket_id):
     if not ticket:
         return jsonify({"error": "Ticket not found"}), 404
 
-    inventory_id = request.json.get('inventory_id')
-    quantity = request.json.get('quantity', 1)
+    try:
+        line = ticket_part_schema.load(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+    inventory_id, quantity = line['inventory_id'], line['quantity']
 
     part = db.session.get(Inventory, inventory_id)
     if not part:
         return jsonify({"error": "Part not found"}), 404
 
-    # Check if already exists
-    junction = db.session.query(TicketInventory).filter_by(ticket_id=ticket_id, inventory_id=inventory_id).first()
-    if junction:
-        junction.quantity += quantity
-    else:
-        junction = TicketInventory(ticket_id=ticket_id, inventory_id=inventory_id, quantity=quantity)
-        db.session.add(junction)
+    if reserve_stock({inventory_id: quantity}):
+        db.session.rollback()
+        return jsonify({"error": f"Insufficient stock for part {inventory_id}."}), 409
+    upsert_ticket_parts(ticket_id, {inventory_id: quantity})
+    refresh_vehicle_summaries([ticket.vin])
+    refresh_daily_stats_for_tickets([ticket_id])  # Revenue follows parts_total
+    db.session.commit()
+    invalidate_ticket_caches([ticket_id], [ticket.customer_id])
+    return jsonify({"message": f"Added {quantity} of part {part.name} to ticket {ticket_id}"}), 200
+
+# POST '/<ticket_id>/parts' - Add several parts to a ticket in one statement
+@tickets_bp.route('/<int:ticket_id>/parts', methods=['POST'])
+def add_parts_to_ticket(ticket_id):
+    """
+    Adds a list of parts to a ticket, incrementing quantities that already exist.
+    JSON format:
+    [
+        {"inventory_id": int, "quantity": int (optional, default 1)}
+    ]
+    """
+    try:
+        parts = ticket_parts_schema.load(request.json)
+    except ValidationError as e:
+        return jsonify(e.messages), 400
+    if not parts:
+        return jsonify({"error": "No parts provided."}), 400
 
+    ticket = db.session.get(Ticket, ticket_id)
+    if not ticket:
+        return jsonify({"error": "Ticket not found"}), 404
+
+    quantities = {}
+    for part in parts:
+        quantities[part['inventory_id']] = quantities.get(part['inventory_id'], 0) + part['quantity']
+    missing = sorted(set(quantities) - existing_ids(Inventory, set(quantities)))
+    if missing:
+        return jsonify({"error": f"Part(s) not found: {missing}"}), 404
+
+    short = reserve_stock(quantities)
+    if short:
+        db.session.rollback()  # All or nothing: undo the parts that were reserved
+        return jsonify({"error": f"Insufficient stock for part(s): {short}"}), 409
+    upsert_ticket_parts(ticket_id, quantities)
+    refresh_vehicle_summaries([ticket.vin])
+    refresh_daily_stats_for_tickets([ticket_id])  # Revenue follows parts_total
     db.session.commit()
-    return jsonify({"message": f"Added {quantity} of part {part.name} to ticket {ticket_id}"}), 200
\ No newline at end of file
+    invalidate_ticket_caches([ticket_id], [ticket.customer_id])
+
+    query = select(TicketInventory).where(TicketInventory.ticket_id == ticket_id).order_by(TicketInventory.inventory_id)
+    return ticket_parts_schema.jsonify(db.session.execute(query).scalars().all()), 200
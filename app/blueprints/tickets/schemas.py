@@ -1,13 +1,19 @@
-from marshmallow import fields
+from marshmallow import fields, validate
 from app.extensions import ma
 from app.models import Ticket
 
+class TicketPartSchema(ma.Schema):
+    inventory_id = fields.Int(required=True)
+    quantity = fields.Int(load_default=1, validate=validate.Range(min=1))
+
 class TicketSchema(ma.SQLAlchemyAutoSchema):
     customers = fields.Nested('CustomerSchema')
     mechanics = fields.Nested('MechanicSchema', many=True)
+    parts = fields.Nested(TicketPartSchema, many=True, attribute='ticket_parts', dump_only=True)
     class Meta:
         model = Ticket
         include_fk = True  # Include foreign keys in the schema
+        dump_only = ('parts_total', 'version', 'updated_at')  # Maintained by the server, never accepted from clients
         
 class EditTicketSchema(ma.Schema):
     add_mechanic_ids = fields.List(fields.Int(), required=True)
@@ -15,7 +21,21 @@ class EditTicketSchema(ma.Schema):
     class Meta:
         fields = ("add_mechanic_ids", "remove_mechanic_ids")
 
-ticket_schema = TicketSchema()
-tickets_schema = TicketSchema(many=True)
+# Optional assignments carried alongside each ticket in POST /tickets/bulk
+class BulkTicketAssignmentSchema(ma.Schema):
+    mechanic_ids = fields.List(fields.Int(), load_default=list)
+    parts = fields.List(fields.Nested(TicketPartSchema), load_default=list)
+
+class AutoAssignSchema(ma.Schema):
+    ticket_ids = fields.List(fields.Int(), required=True, validate=validate.Length(min=1, max=500))  # Same cap as POST /tickets/bulk
+
+# parts_total is only serialized by tickets_with_totals_schema: ticket lists with ?include=totals, the customer dashboard and vehicle history
+ticket_schema = TicketSchema(exclude=('parts_total',))
+tickets_schema = TicketSchema(many=True, exclude=('parts_total',))
+tickets_with_totals_schema = TicketSchema(many=True)
 edit_ticket_schema = EditTicketSchema()
+bulk_ticket_assignment_schema = BulkTicketAssignmentSchema()
+ticket_part_schema = TicketPartSchema()
+ticket_parts_schema = TicketPartSchema(many=True)
+auto_assign_schema = AutoAssignSchema()
 
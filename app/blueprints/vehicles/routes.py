@@ -0,0 +1,25 @@
+from flask import jsonify
+from app.models import db, Ticket, Vehicle
+from app.blueprints.tickets.routes import ticket_list_query
+from app.blueprints.tickets.schemas import tickets_with_totals_schema
+from .schemas import vehicle_schema
+from . import vehicles_bp
+
+# GET '/<vin>/history' - Service history for one vehicle
+@vehicles_bp.route('/<string:vin>/history', methods=['GET'])
+def get_vehicle_history(vin):
+    """
+    Returns the stored summary (visit_count, last_visit, parts_spend) plus every
+    ticket for the VIN with its mechanics and parts. The summary is a primary-key
+    read and the tickets come from ix_tickets_vin, so the query count is fixed.
+    """
+    vehicle = db.session.get(Vehicle, vin)
+    if not vehicle:
+        return jsonify({"error": "Vehicle not found."}), 404
+
+    query = ticket_list_query().where(Ticket.vin == vin).order_by(Ticket.ticket_date, Ticket.id)
+    tickets = db.session.execute(query).scalars().all()
+    return jsonify({
+        "summary": vehicle_schema.dump(vehicle),
+        "tickets": tickets_with_totals_schema.dump(tickets),
+    }), 200
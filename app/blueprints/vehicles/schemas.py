@@ -0,0 +1,8 @@
+from app.extensions import ma
+from app.models import Vehicle
+
+class VehicleSchema(ma.SQLAlchemyAutoSchema):
+    class Meta:
+        model = Vehicle
+
+vehicle_schema = VehicleSchema()
@@ -1,12 +1,56 @@
+from urllib.parse import urlencode
+import uuid
+from flask import request
 from flask_caching import Cache
 from flask_marshmallow import Marshmallow
-from flask_limiter.util import get_remote_address
 from flask_limiter import Limiter
+from app.utils.ratelimit import rate_limit_key, rate_limit_tier  # Also registers the sqlite:// storage scheme
 
 
 ma = Marshmallow()  # Initialize Marshmallow for serialization and deserialization
 # MARK: 
-# NOTE: increase Daily Global Limit to prevent Render deployment lockout
-# ? Can health checks trigger additional traffic to app even though no requests were made?
-limiter=Limiter(key_func=get_remote_address, default_limits=['100/day', '100/hour', '500/month'])  # Initialize Limiter for rate limiting
+# Health checks go to GET /health, which is exempt. Counters live in RATELIMIT_STORAGE_URI
+# (see app/utils/ratelimit.py) so all workers share them and they survive a deploy.
+# Requests are keyed by token role:sub (anonymous ones by IP), and the default limits are
+# the caller's RATELIMIT_TIERS entry from config.py, counted per route and method.
+limiter=Limiter(key_func=rate_limit_key, default_limits=[rate_limit_tier], default_limits_per_method=True)  # Initialize Limiter for rate limiting
 cache=Cache(config={'CACHE_TYPE': 'SimpleCache', 'CACHE_DEFAULT_TIMEOUT': 300})  # Initialize Cache for caching responses
+
+# MARK: Tagged cache keys
+# Every cached view key embeds the current version of the tags it depends on
+# (e.g. "tickets", "ticket:7", "customer:3"). Writes call invalidate_tags(), which
+# drops those versions; the next read mints new ones, so stale entries become
+# unreachable immediately and simply age out. This lets TTLs be long.
+TAGGED_CACHE_TIMEOUT = 60 * 60 * 6  # 6 hours; correctness comes from invalidation, not expiry
+
+def _tag_key(tag):
+    return f"tag:{tag}"
+
+def tag_versions(tags):
+    """Current version token for each tag, minting one for tags that have none yet."""
+    keys = [_tag_key(tag) for tag in tags]
+    versions = cache.get_many(*keys)
+    for index, (key, version) in enumerate(zip(keys, versions)):
+        if version is None:
+            cache.add(key, uuid.uuid4().hex[:12], timeout=0)  # add() keeps whichever token another worker stored first
+            versions[index] = cache.get(key)
+    return versions
+
+def invalidate_tags(*tags):
+    """Invalidate every cached response that depends on any of the given tags."""
+    # One delete per tag: SimpleCache.delete_many stops at the first key that is missing
+    for tag in tags:
+        cache.delete(_tag_key(tag))
+
+def tagged_cache_key(*tags):
+    """
+    make_cache_key for cache.cached(). Each tag is a string or a callable that
+    receives the view's kwargs and returns a tag (e.g. lambda ticket_id, **_: f"ticket:{ticket_id}").
+    The key covers the path, the sorted query string and the tag versions.
+    """
+    def make_cache_key(*args, **kwargs):
+        names = [tag(**kwargs) if callable(tag) else tag for tag in tags]
+        versions = ','.join(f"{name}@{version}" for name, version in zip(names, tag_versions(names)))
+        query = urlencode(sorted(request.args.items(multi=True)))
+        return f"view/{request.path}?{query}#{versions}"
+    return make_cache_key
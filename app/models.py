@@ -1,7 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase, mapped_column, Mapped, relationship
-from datetime import date
-from typing import List
+from datetime import date, datetime, timezone
+from typing import List, Optional
 
 
 # Create a base class for our models
@@ -12,9 +12,20 @@ class Base(DeclarativeBase):
 db = SQLAlchemy(model_class=Base)
 
 
+def utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)  # Stored naive, always UTC
+
+# Row version and modification time, bumped by every UPDATE (ORM flush or bulk update()).
+# They back the ETag / Last-Modified headers in app/utils/conditional.py.
+class Versioned:
+    version: Mapped[int] = mapped_column(db.Integer, nullable=False, default=1, server_default='1',
+                                         onupdate=db.literal_column('version') + 1)
+    updated_at: Mapped[datetime] = mapped_column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow,
+                                                 server_default=db.func.current_timestamp())
+
 # Define the models
 
-class Customer(Base):
+class Customer(Versioned, Base):
     __tablename__ = 'customers'
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -29,16 +40,21 @@ ticket_mechanic = db.Table(
     'ticket_mechanic',
     Base.metadata,
     db.Column('ticket_id', db.ForeignKey('tickets.id')),
-    db.Column('mechanic_id', db.ForeignKey('mechanics.id'))
+    db.Column('mechanic_id', db.ForeignKey('mechanics.id'), index=True)  # "tickets for mechanic" lookups
 )
 
-class Ticket(Base):
+class Ticket(Versioned, Base):
     __tablename__ = 'tickets'
+    __table_args__ = (
+        db.Index('ix_tickets_customer_id_ticket_date', 'customer_id', 'ticket_date'),  # Customer history by date range
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    vin: Mapped[str] = mapped_column(db.String(255), nullable=False)
+    vin: Mapped[str] = mapped_column(db.String(255), nullable=False, index=True)
     ticket_date: Mapped[date] = mapped_column(db.Date)
     customer_id: Mapped[int] = mapped_column(db.ForeignKey('customers.id'))
+    # Denormalized sum of price * quantity over ticket_inventory, maintained by app/utils/totals.py
+    parts_total: Mapped[float] = mapped_column(db.Float, nullable=False, default=0, server_default='0')
 
     customer: Mapped['Customer'] = db.relationship(back_populates='tickets')
     mechanics: Mapped[List['Mechanic']] = db.relationship(secondary=ticket_mechanic, back_populates='tickets')
@@ -49,8 +65,10 @@ class Ticket(Base):
         secondary='ticket_inventory',
         back_populates='tickets'
     )
+    # Junction rows (inventory_id + quantity) for serializing parts without a per-ticket lookup
+    ticket_parts: Mapped[List['TicketInventory']] = db.relationship(viewonly=True)
     
-class Mechanic(Base):
+class Mechanic(Versioned, Base):
     __tablename__ = "mechanics"
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -59,6 +77,8 @@ class Mechanic(Base):
     phone: Mapped[str] = mapped_column(db.String(255), nullable=False)
     salary: Mapped[float] = mapped_column(db.Float, nullable=False)
     password: Mapped[str] = mapped_column(db.String(255), nullable=False)
+    # Number of tickets assigned; maintained by app/utils/mechanic_stats.py so /mechanics/popular is an index read
+    ticket_count: Mapped[int] = mapped_column(db.Integer, nullable=False, default=0, server_default='0', index=True)
     
     tickets: Mapped[List['Ticket']] = db.relationship(secondary=ticket_mechanic, back_populates='mechanics')
 
@@ -71,11 +91,15 @@ class TicketInventory(Base):
     quantity: Mapped[int] = mapped_column(db.Integer, nullable=False, default=1)
 
 # --- Inventory Model ---
-class Inventory(Base):
+class Inventory(Versioned, Base):
     __tablename__ = 'inventory'
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str] = mapped_column(db.String(255), nullable=False)
     price: Mapped[float] = mapped_column(db.Float, nullable=False)
+    # Units in stock; NULL means the part is not stock-tracked. Reserved by app/utils/stock.py
+    stock_on_hand: Mapped[Optional[int]] = mapped_column(db.Integer, index=True)
+    # Supplier's part number; unique, so price-list imports upsert on it (flask inventory import)
+    supplier_sku: Mapped[Optional[str]] = mapped_column(db.String(64), unique=True, index=True)
 
     # Relationship to tickets through the junction table
     tickets: Mapped[List['Ticket']] = db.relationship(
@@ -83,3 +107,71 @@ class Inventory(Base):
         secondary='ticket_inventory',
         back_populates='parts'
     )
+
+# --- Vehicle Summary ---
+# One row per VIN, derived from tickets (visit count, last visit, lifetime parts spend).
+# Refreshed by app/utils/vehicles.py whenever a ticket for the VIN is written.
+class Vehicle(Base):
+    __tablename__ = 'vehicles'
+    vin: Mapped[str] = mapped_column(db.String(255), primary_key=True)
+    visit_count: Mapped[int] = mapped_column(db.Integer, nullable=False, default=0)
+    last_visit: Mapped[Optional[date]] = mapped_column(db.Date)
+    parts_spend: Mapped[float] = mapped_column(db.Float, nullable=False, default=0)
+
+# --- Mechanic Daily Stats ---
+# One row per mechanic per ticket day: tickets handled, distinct vehicles and parts revenue.
+# Rebuilt per (mechanic, day) by app/utils/mechanic_stats.py whenever an assignment or ticket total changes.
+class MechanicDailyStats(Base):
+    __tablename__ = 'mechanic_daily_stats'
+    mechanic_id: Mapped[int] = mapped_column(db.ForeignKey('mechanics.id'), primary_key=True)
+    day: Mapped[date] = mapped_column(db.Date, primary_key=True)
+    tickets: Mapped[int] = mapped_column(db.Integer, nullable=False, default=0)
+    vehicles: Mapped[int] = mapped_column(db.Integer, nullable=False, default=0)
+    parts_revenue: Mapped[float] = mapped_column(db.Float, nullable=False, default=0)
+
+# One row per distinct vehicle a mechanic worked on per day. Distinct counts do not add
+# up across days, so week, month and range totals count VINs here instead of joining tickets.
+# Refreshed for the same (mechanic, day) keys as MechanicDailyStats.
+class MechanicDailyVehicle(Base):
+    __tablename__ = 'mechanic_daily_vehicles'
+    mechanic_id: Mapped[int] = mapped_column(db.ForeignKey('mechanics.id'), primary_key=True)
+    day: Mapped[date] = mapped_column(db.Date, primary_key=True)
+    vin: Mapped[str] = mapped_column(db.String(255), primary_key=True)
+
+# --- Parts Usage Rollups ---
+# Quantity and revenue (quantity * current price) per part per month, overall and per
+# assigned mechanic. month is yyyymm as an integer so every backend can derive it from
+# ticket_date with EXTRACT. Maintained by app/utils/part_usage.py.
+class PartMonthlyUsage(Base):
+    __tablename__ = 'part_monthly_usage'
+    __table_args__ = (
+        db.Index('ix_part_monthly_usage_month', 'month'),  # Top parts over a month range
+    )
+    inventory_id: Mapped[int] = mapped_column(db.ForeignKey('inventory.id'), primary_key=True)
+    month: Mapped[int] = mapped_column(db.Integer, primary_key=True)
+    quantity: Mapped[int] = mapped_column(db.Integer, nullable=False, default=0)
+    revenue: Mapped[float] = mapped_column(db.Float, nullable=False, default=0)
+
+class PartMechanicMonthlyUsage(Base):
+    __tablename__ = 'part_mechanic_monthly_usage'
+    __table_args__ = (
+        db.Index('ix_part_mechanic_monthly_usage_mechanic_month', 'mechanic_id', 'month'),  # One mechanic's parts
+    )
+    inventory_id: Mapped[int] = mapped_column(db.ForeignKey('inventory.id'), primary_key=True)
+    mechanic_id: Mapped[int] = mapped_column(db.ForeignKey('mechanics.id'), primary_key=True)
+    month: Mapped[int] = mapped_column(db.Integer, primary_key=True)
+    quantity: Mapped[int] = mapped_column(db.Integer, nullable=False, default=0)
+    revenue: Mapped[float] = mapped_column(db.Float, nullable=False, default=0)
+
+# --- Revoked Tokens ---
+# A row revokes one token (jti, e.g. on logout) or every token of a subject ("customer:3")
+# issued before revoked_at (password change, account deleted). Times are epoch seconds in
+# a double so sub-second ordering against the token's iat survives every backend. Rows
+# stop mattering at expires_at. Mirrored in memory by app/utils/revocation.py.
+class RevokedToken(Base):
+    __tablename__ = 'revoked_tokens'
+    id: Mapped[int] = mapped_column(primary_key=True)
+    jti: Mapped[Optional[str]] = mapped_column(db.String(64), unique=True)
+    subject: Mapped[Optional[str]] = mapped_column(db.String(64))
+    revoked_at: Mapped[float] = mapped_column(db.Double, nullable=False)
+    expires_at: Mapped[float] = mapped_column(db.Double, nullable=False, index=True)
@@ -0,0 +1,114 @@
+# app/utils/catalog.py
+import bisect
+import threading
+from flask import current_app, has_app_context, request
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app.models import db, Inventory
+from app.extensions import tag_versions, invalidate_tags
+from app.utils.pagination import get_per_page, encode_cursor, decode_cursor, NEXT_CURSOR_HEADER
+
+# MARK: Inventory catalog snapshot
+# GET /inventory/ serves the whole parts catalog from an in-process snapshot: every
+# part pre-serialized to JSON, ordered by id. The snapshot is stamped with the
+# version of the "catalog" cache tag; any committed Inventory write drops that tag,
+# so the next read (in this worker or any other sharing the cache) sees a new
+# version and rebuilds. Filtering (?q=) and cursor pagination run on the snapshot,
+# so a warm read never touches the database.
+CATALOG_TAG = 'catalog'
+
+class CatalogSnapshot:
+    """
+    One immutable build of the catalog: pre-serialized parts, ids and lowercased
+    names in id order, the (count, sum(version), newest updated_at) triple for ETags and the tag version it
+    was built from. A rebuild makes a new snapshot, so readers holding this one
+    never see ids from one build paired with items from another.
+    """
+    __slots__ = ('token', 'ids', 'names', 'items', 'state')
+
+    def __init__(self, token=None, ids=(), names=(), items=(), state=(0, 0, None)):
+        self.token = token
+        self.ids = tuple(ids)
+        self.names = tuple(names)
+        self.items = tuple(items)
+        self.state = state
+
+    def page(self, q=None, after=None, per_page=None):
+        """Serialized items matching q (case-insensitive substring) with id > after; returns (items, next_cursor)."""
+        start = bisect.bisect_right(self.ids, after) if after is not None else 0
+        needle = q.lower() if q else None
+        chosen = []
+        for index in range(start, len(self.ids)):
+            if needle and needle not in self.names[index]:
+                continue
+            if len(chosen) == per_page:
+                return [self.items[i] for i in chosen], encode_cursor([self.ids[chosen[-1]]])
+            chosen.append(index)
+        return [self.items[i] for i in chosen], None
+
+class InventoryCatalog:
+    """Holds the current CatalogSnapshot; a rebuild swaps it in with one assignment."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot = CatalogSnapshot()
+
+    def current(self, schema):
+        token = tag_versions([CATALOG_TAG])[0]  # Read before querying so a concurrent write forces another rebuild
+        snapshot = self.snapshot
+        if token != snapshot.token:
+            with self.lock:
+                snapshot = self.snapshot
+                if token != snapshot.token:
+                    snapshot = self.snapshot = self._build(schema, token)
+        return snapshot
+
+    def _build(self, schema, token):
+        parts = db.session.execute(select(Inventory).order_by(Inventory.id)).scalars().all()
+        dumps = current_app.json.dumps
+        newest = max((part.updated_at for part in parts if part.updated_at), default=None)
+        return CatalogSnapshot(
+            token,
+            ids=[part.id for part in parts],
+            names=[(part.name or '').lower() for part in parts],
+            items=[dumps(row) for row in schema.dump(parts, many=True)],
+            state=(len(parts), sum(part.version for part in parts), newest),
+        )
+
+def get_catalog(schema):
+    """The current CatalogSnapshot, rebuilt first if the catalog tag moved."""
+    return current_app.extensions.setdefault('inventory_catalog', InventoryCatalog()).current(schema)
+
+def catalog_response(schema):
+    """
+    Page of the catalog for the current request (?q=, ?per_page=, ?cursor=) as a
+    JSON list with X-Next-Cursor, assembled from the pre-serialized items.
+    Raises ValueError on a bad per_page or cursor.
+    """
+    per_page = get_per_page()
+    token = request.args.get('cursor')
+    after = decode_cursor(token, [Inventory.id])[0] if token else None
+    items, next_cursor = get_catalog(schema).page(request.args.get('q'), after, per_page)
+    response = current_app.response_class('[' + ','.join(items) + ']', mimetype='application/json')
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
+
+def mark_catalog_stale(session=None):
+    """Flag the session so the catalog is invalidated when it commits (for Core UPDATEs the flush hook cannot see)."""
+    (session or db.session()).info['catalog_stale'] = True
+
+# ORM writes to Inventory flag the session; the tag is dropped only once the transaction commits
+@event.listens_for(Session, 'after_flush')
+def _collect_inventory_writes(session, flush_context):
+    if any(isinstance(obj, Inventory) for obj in session.new | session.dirty | session.deleted):
+        mark_catalog_stale(session)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_catalog(session):
+    if session.info.pop('catalog_stale', False) and has_app_context():
+        invalidate_tags(CATALOG_TAG)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_catalog_writes(session):
+    session.info.pop('catalog_stale', None)
@@ -0,0 +1,112 @@
+# app/utils/conditional.py
+import hashlib
+from functools import wraps
+from flask import request, current_app, make_response, has_app_context
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from werkzeug.http import is_resource_modified
+from app.extensions import tag_versions, invalidate_tags
+from app.models import db, Versioned
+
+# MARK: Conditional GET
+# Views decorated with @conditional(validators) answer If-None-Match / If-Modified-Since
+# with 304 before the view runs, so an unchanged resource costs one small query (or,
+# for lists, a few cache reads) and is never serialized. Row validators come from the
+# Versioned columns (version, updated_at); list validators from cache-tag versions.
+
+def conditional(validators):
+    """
+    validators(**view_kwargs) returns (etag, last_modified), or None to let the
+    view answer on its own (missing row, bad query params). The strong ETag and
+    Last-Modified are attached to every 200 and 304 the view produces.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            found = validators(**kwargs)
+            if found is None:
+                return view(*args, **kwargs)
+            etag, last_modified = found
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            if last_modified:
+                response.last_modified = last_modified
+            return response
+        return wrapper
+    return decorator
+
+def row_validators(model, id_arg='id'):
+    """Validators for a single row: a primary-key read of (version, updated_at)."""
+    def validators(**kwargs):
+        row_id = kwargs[id_arg]
+        row = db.session.execute(select(model.version, model.updated_at).where(model.id == row_id)).first()
+        if row is None:
+            return None
+        return f"{model.__tablename__}-{row_id}-v{row.version}", row.updated_at
+    return validators
+
+def list_etag(*states):
+    """
+    ETag for a list response from its state (e.g. a catalog snapshot's count,
+    sum(version), newest updated_at) plus the query string (page size, cursor,
+    filters). Returns (etag, newest updated_at).
+    """
+    newest = max((state[2] for state in states if state[2] is not None), default=None)
+    return _list_etag(states), newest
+
+def tagged_list_etag(*tags):
+    """
+    ETag for a list response from the versions of the cache tags its body
+    depends on (see app/extensions.py) plus the query string. A cache read
+    instead of a table scan; lists answered this way carry no Last-Modified.
+    """
+    return _list_etag(tag_versions(tags)), None
+
+def _list_etag(state):
+    digest = hashlib.sha1(repr((state, sorted(request.args.items(multi=True)))).encode()).hexdigest()
+    return f"{request.path}-{digest}"
+
+def list_validators(model):
+    """Validators for an unfiltered list of model rows, from the table's tag (dropped by every committed write)."""
+    return lambda **_: tagged_list_etag(model.__tablename__)
+
+def touch(model, ids):
+    """Bump version/updated_at on rows whose representation changed without a column write (e.g. junction rows)."""
+    ids = set(ids)
+    if ids:
+        mark_written(model)
+        db.session.execute(
+            update(model).where(model.id.in_(ids))
+            .values(version=model.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+# MARK: Table tags
+# Every committed write to a Versioned table drops the tag named after the table
+# ("customers", "mechanics", "tickets", "inventory"), which moves the ETags of
+# lists built on it. ORM writes are seen at flush; Core UPDATE/INSERT statements
+# are invisible to the flush hook, so the helpers issuing them call mark_written().
+def mark_written(model, session=None):
+    """Flag the session so model's table tag is dropped when it commits (for Core statements)."""
+    (session or db.session()).info.setdefault('versioned_tables_written', set()).add(model.__tablename__)
+
+@event.listens_for(Session, 'after_flush')
+def _collect_versioned_writes(session, flush_context):
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, Versioned):
+            mark_written(type(obj), session)
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_table_tags(session):
+    tables = session.info.pop('versioned_tables_written', None)
+    if tables and has_app_context():
+        invalidate_tags(*tables)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_table_writes(session):
+    session.info.pop('versioned_tables_written', None)
@@ -0,0 +1,133 @@
+# app/utils/inventory_import.py
+import csv
+import time
+from itertools import islice
+from sqlalchemy import select, insert, update
+from marshmallow import ValidationError
+from app.models import db, Inventory, Ticket, TicketInventory
+from app.extensions import invalidate_tags
+from app.utils.catalog import mark_catalog_stale
+from app.utils.conditional import mark_written
+from app.utils.totals import recompute_ticket_totals
+from app.utils.vehicles import refresh_vehicle_summaries
+from app.utils.mechanic_stats import daily_stats_keys, refresh_daily_stats
+from app.utils.part_usage import refresh_part_usage_for_parts
+
+# MARK: Supplier price-list import
+# Streams a CSV (supplier_sku,name,price[,stock_on_hand]) in chunks, so memory is
+# bounded by the chunk size rather than the file. Each chunk is validated with the
+# Inventory schema, matched to existing parts with one IN (...) lookup on the unique
+# supplier_sku index, then written with one executemany INSERT and one executemany
+# UPDATE. The transaction is committed every commit_every rows.
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_COMMIT_EVERY = 10000
+IMPORT_COLUMNS = ('supplier_sku', 'name', 'price', 'stock_on_hand')
+MAX_REPORTED_ERRORS = 20
+
+class ImportReport:
+    """Running totals for one import; errors keeps the first MAX_REPORTED_ERRORS (line, messages) pairs."""
+
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.rejected = 0
+        self.errors = []
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def reject(self, line, messages):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, messages))
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+def _load_row(schema, row):
+    """Validate one CSV row. Blank cells are left out, so an update never blanks a column."""
+    data = {key: value.strip() for key, value in row.items() if key in IMPORT_COLUMNS and value and value.strip()}
+    part = schema.load(data)
+    if not part.get('supplier_sku'):
+        raise ValidationError({'supplier_sku': ['Missing data for required field.']})
+    return part
+
+def _reprice_tickets(part_ids):
+    """Bring ticket totals, vehicle summaries and the rollups in line with new part prices. One pass per chunk."""
+    refresh_part_usage_for_parts(part_ids)
+    ticket_ids = db.session.execute(
+        select(TicketInventory.ticket_id).distinct().where(TicketInventory.inventory_id.in_(part_ids))
+    ).scalars().all()
+    if not ticket_ids:
+        return
+    recompute_ticket_totals(ticket_ids)
+    refresh_vehicle_summaries(db.session.execute(select(Ticket.vin).distinct().where(Ticket.id.in_(ticket_ids))).scalars())
+    refresh_daily_stats(daily_stats_keys(ticket_ids))
+
+def _write_chunk(parts, report):
+    """Upsert {supplier_sku: fields} for one chunk. Returns True when an existing part's price changed."""
+    existing = {
+        row.supplier_sku: row
+        for row in db.session.execute(
+            select(Inventory.id, Inventory.supplier_sku, Inventory.price).where(Inventory.supplier_sku.in_(parts))
+        )
+    }
+    new_rows = [fields for sku, fields in parts.items() if sku not in existing]
+    if new_rows:
+        db.session.execute(insert(Inventory), new_rows)
+
+    # ORM bulk UPDATE by primary key; rows are grouped by the columns they carry so each group is one executemany
+    updates = {}
+    repriced = []
+    for sku, fields in parts.items():
+        if sku in existing:
+            current = existing[sku]
+            updates.setdefault(tuple(sorted(fields)), []).append({'id': current.id, **fields})
+            if 'price' in fields and fields['price'] != current.price:
+                repriced.append(current.id)
+    for rows in updates.values():
+        db.session.execute(update(Inventory), rows)
+    if repriced:
+        _reprice_tickets(repriced)
+
+    mark_catalog_stale()  # Core/bulk statements bypass the flush hook
+    mark_written(Inventory)
+    report.inserted += len(new_rows)
+    report.updated += len(parts) - len(new_rows)
+    return bool(repriced)
+
+def import_inventory_csv(stream, schema, chunk_size=IMPORT_CHUNK_SIZE, commit_every=IMPORT_COMMIT_EVERY):
+    """
+    Upsert parts by supplier_sku from a CSV text stream. Invalid rows are counted
+    and skipped; within a chunk the last row for a SKU wins. Commits as it goes
+    and once at the end. Raises ValueError when the header has no supplier_sku column.
+    """
+    reader = csv.DictReader(stream)
+    if 'supplier_sku' not in (reader.fieldnames or []):
+        raise ValueError("CSV header must include a supplier_sku column.")
+    report = ImportReport()
+    repriced = False
+    uncommitted = 0
+    rows = enumerate(reader, start=2)  # Line 1 is the header
+    while chunk := list(islice(rows, chunk_size)):
+        parts = {}
+        for line, row in chunk:
+            try:
+                part = _load_row(schema, row)
+            except ValidationError as e:
+                report.reject(line, e.messages)
+                continue
+            parts[part['supplier_sku']] = part
+        report.rows += len(chunk)
+        if parts:
+            repriced |= _write_chunk(parts, report)
+        uncommitted += len(chunk)
+        if uncommitted >= commit_every:
+            db.session.commit()
+            uncommitted = 0
+    db.session.commit()
+    if repriced:
+        invalidate_tags('inventory')  # Parts and totals are embedded in cached ticket lists
+    report.elapsed = time.perf_counter() - report.started
+    return report
@@ -0,0 +1,241 @@
+# app/utils/mechanic_stats.py
+import heapq
+import threading
+import time
+from flask import current_app, has_app_context
+from sqlalchemy import event, select, update, delete, insert, func, case, tuple_
+from sqlalchemy.orm import Session
+from app.utils.conditional import mark_written
+from app.models import db, Mechanic, MechanicDailyStats, MechanicDailyVehicle, Ticket, TicketInventory, ticket_mechanic
+
+LOAD_HEAP_TTL = 300  # Seconds before the in-process load heap is rebuilt, to pick up other workers' writes
+
+def adjust_ticket_counts(deltas):
+    """
+    Apply {mechanic_id: +n / -n} to Mechanic.ticket_count in one UPDATE.
+    Called by every route that assigns or unassigns mechanics. Caller commits;
+    the load heap and the 'mechanics' cache tag see the change once the commit succeeds.
+    """
+    deltas = {mechanic_id: delta for mechanic_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    db.session.execute(
+        update(Mechanic)
+        .where(Mechanic.id.in_(deltas))
+        .values(ticket_count=Mechanic.ticket_count + case(deltas, value=Mechanic.id, else_=0))
+        .execution_options(synchronize_session=False)
+    )
+    mark_written(Mechanic)  # Drops the 'mechanics' tag on commit: ticket_count is embedded in cached ticket responses
+    pending = _pending_load_changes(db.session())
+    for mechanic_id, delta in deltas.items():
+        pending['deltas'][mechanic_id] = pending['deltas'].get(mechanic_id, 0) + delta
+
+def ticket_counts_query():
+    """GROUP BY ticket_mechanic.mechanic_id -> (mechanic_id, tickets); the source of truth for the counters."""
+    return (
+        select(ticket_mechanic.c.mechanic_id, func.count().label('tickets'))
+        .group_by(ticket_mechanic.c.mechanic_id)
+    )
+
+def recount_ticket_counts():
+    """Rebuild every Mechanic.ticket_count from the GROUP BY (zero first, then one UPDATE ... FROM)."""
+    counts = ticket_counts_query().subquery()
+    db.session.execute(update(Mechanic).values(ticket_count=0).execution_options(synchronize_session=False))
+    db.session.execute(
+        update(Mechanic)
+        .where(Mechanic.id == counts.c.mechanic_id)
+        .values(ticket_count=counts.c.tickets)
+        .execution_options(synchronize_session=False)
+    )
+    mark_written(Mechanic)
+    _pending_load_changes(db.session())['reload'] = True
+
+# MARK: Daily rollup
+def daily_stats_query():
+    """
+    (mechanic_id, day, tickets, vehicles, parts_revenue) grouped per mechanic per
+    ticket day. Revenue comes from the maintained Ticket.parts_total, so no join
+    to ticket_inventory or inventory is needed.
+    """
+    return (
+        select(
+            ticket_mechanic.c.mechanic_id,
+            Ticket.ticket_date,
+            func.count(Ticket.id),
+            func.count(func.distinct(Ticket.vin)),
+            func.coalesce(func.sum(Ticket.parts_total), 0),
+        )
+        .join(Ticket, Ticket.id == ticket_mechanic.c.ticket_id)
+        .group_by(ticket_mechanic.c.mechanic_id, Ticket.ticket_date)
+    )
+
+def daily_vehicles_query():
+    """Distinct (mechanic_id, day, vin) the mechanic worked on, for the mechanic_daily_vehicles rollup."""
+    return (
+        select(ticket_mechanic.c.mechanic_id, Ticket.ticket_date, Ticket.vin).distinct()
+        .join(Ticket, Ticket.id == ticket_mechanic.c.ticket_id)
+    )
+
+def _insert_daily_stats(query):
+    db.session.execute(
+        insert(MechanicDailyStats).from_select(['mechanic_id', 'day', 'tickets', 'vehicles', 'parts_revenue'], query)
+    )
+
+def _insert_daily_vehicles(query):
+    db.session.execute(insert(MechanicDailyVehicle).from_select(['mechanic_id', 'day', 'vin'], query))
+
+def daily_stats_keys(ticket_ids):
+    """The (mechanic_id, day) rollup rows the given tickets currently feed."""
+    query = (
+        select(ticket_mechanic.c.mechanic_id, Ticket.ticket_date).distinct()
+        .join(Ticket, Ticket.id == ticket_mechanic.c.ticket_id)
+        .where(Ticket.id.in_(ticket_ids))
+    )
+    return set(db.session.execute(query).tuples())
+
+def refresh_daily_stats(keys):
+    """
+    Recompute the given (mechanic_id, day) rollup rows and their vehicle rows:
+    delete them, then re-insert from queries limited to those keys. Keys with no
+    tickets left simply drop out. Caller commits.
+    """
+    keys = list(set(keys))
+    if not keys:
+        return
+    ticket_key = tuple_(ticket_mechanic.c.mechanic_id, Ticket.ticket_date).in_(keys)
+    db.session.execute(delete(MechanicDailyStats).where(tuple_(MechanicDailyStats.mechanic_id, MechanicDailyStats.day).in_(keys)))
+    db.session.execute(delete(MechanicDailyVehicle).where(tuple_(MechanicDailyVehicle.mechanic_id, MechanicDailyVehicle.day).in_(keys)))
+    _insert_daily_stats(daily_stats_query().where(ticket_key))
+    _insert_daily_vehicles(daily_vehicles_query().where(ticket_key))
+
+def refresh_daily_stats_for_tickets(ticket_ids, previous_keys=()):
+    """
+    Refresh the rows the tickets feed now, plus previous_keys: rows they fed before
+    the write (captured by the caller when a mechanic is removed or the date moves).
+    """
+    refresh_daily_stats(daily_stats_keys(ticket_ids) | set(previous_keys))
+
+def refresh_daily_stats_for_part(inventory_id):
+    """Refresh every row fed by a ticket using a part (after its price changes or before it is deleted)."""
+    ticket_ids = select(TicketInventory.ticket_id).where(TicketInventory.inventory_id == inventory_id)
+    refresh_daily_stats(daily_stats_keys(ticket_ids))
+
+def rebuild_daily_stats():
+    """Rebuild both rollup tables from ticket_mechanic and tickets. Caller commits."""
+    db.session.execute(delete(MechanicDailyStats))
+    db.session.execute(delete(MechanicDailyVehicle))
+    _insert_daily_stats(daily_stats_query())
+    _insert_daily_vehicles(daily_vehicles_query())
+
+# MARK: Least-loaded assignment
+class MechanicLoadHeap:
+    """
+    Min-heap of (assigned tickets, mechanic id) used to auto-assign tickets.
+    Built from ticket_mechanic on first use, then kept current from committed
+    assignment changes, so picking a mechanic never runs an aggregate query.
+    Updates push a fresh entry instead of re-sorting; entries whose count no
+    longer matches `counts` are stale and skipped when they reach the top.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = None  # mechanic id -> assigned tickets; None until first pick
+        self.heap = []
+        self.loaded_at = 0
+
+    def _ensure_loaded(self):
+        if self.counts is not None and time.monotonic() - self.loaded_at < LOAD_HEAP_TTL:
+            return
+        counts = ticket_counts_query().subquery()
+        rows = db.session.execute(
+            select(Mechanic.id, func.coalesce(counts.c.tickets, 0))
+            .outerjoin(counts, counts.c.mechanic_id == Mechanic.id)
+        ).all()
+        self.counts = {mechanic_id: tickets for mechanic_id, tickets in rows}
+        self._rebuild()
+        self.loaded_at = time.monotonic()
+
+    def _rebuild(self):
+        self.heap = [(tickets, mechanic_id) for mechanic_id, tickets in self.counts.items()]
+        heapq.heapify(self.heap)
+
+    def _push(self, mechanic_id, tickets):
+        heapq.heappush(self.heap, (tickets, mechanic_id))
+        if len(self.heap) > 2 * len(self.counts) + 64:
+            self._rebuild()  # Drop accumulated stale entries
+
+    def apply(self, deltas, added, removed, reload=False):
+        """Mirror a committed transaction: count deltas, new mechanic ids and deleted mechanic ids."""
+        with self.lock:
+            if self.counts is None:
+                return  # Not loaded yet; the first pick reads fresh rows
+            if reload:
+                self.counts = None
+                return
+            for mechanic_id in removed:
+                self.counts.pop(mechanic_id, None)
+            for mechanic_id in added:
+                self.counts.setdefault(mechanic_id, 0)
+                self._push(mechanic_id, self.counts[mechanic_id])
+            for mechanic_id, delta in deltas.items():
+                if mechanic_id in self.counts:
+                    self.counts[mechanic_id] += delta
+                    self._push(mechanic_id, self.counts[mechanic_id])
+
+    def pick(self, excludes):
+        """
+        Choose the least-loaded mechanic for each ticket, in order. `excludes` is a
+        list of id sets (mechanics already on that ticket). Earlier picks in the
+        same call count towards later ones. Returns one id (or None) per entry.
+        """
+        with self.lock:
+            self._ensure_loaded()
+            planned = {}  # mechanic id -> tickets picked in this call, not yet committed
+            chosen = []
+            for exclude in excludes:
+                skipped, mechanic_id = [], None
+                while self.heap:
+                    tickets, candidate = heapq.heappop(self.heap)
+                    if self.counts.get(candidate) is None or tickets != self.counts[candidate] + planned.get(candidate, 0):
+                        continue  # Stale entry
+                    if candidate in exclude:
+                        skipped.append((tickets, candidate))
+                        continue
+                    mechanic_id = candidate
+                    planned[candidate] = planned.get(candidate, 0) + 1
+                    heapq.heappush(self.heap, (tickets + 1, candidate))
+                    break
+                for entry in skipped:
+                    heapq.heappush(self.heap, entry)
+                chosen.append(mechanic_id)
+            # Planned entries go stale with this call; restore the committed ones until apply() moves them
+            for candidate in planned:
+                self._push(candidate, self.counts[candidate])
+            return chosen
+
+def get_load_heap():
+    return current_app.extensions.setdefault('mechanic_load_heap', MechanicLoadHeap())
+
+def _pending_load_changes(session):
+    return session.info.setdefault('mechanic_load_pending', {'deltas': {}, 'added': set(), 'removed': set(), 'reload': False})
+
+# Mechanics created or deleted enter/leave the heap with the transaction that wrote them
+@event.listens_for(Session, 'after_flush')
+def _collect_mechanic_rows(session, flush_context):
+    for obj in session.new:
+        if isinstance(obj, Mechanic):
+            _pending_load_changes(session)['added'].add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Mechanic):
+            _pending_load_changes(session)['removed'].add(obj.id)
+
+@event.listens_for(Session, 'after_commit')
+def _apply_load_changes(session):
+    pending = session.info.pop('mechanic_load_pending', None)
+    if pending and has_app_context() and 'mechanic_load_heap' in current_app.extensions:
+        current_app.extensions['mechanic_load_heap'].apply(
+            pending['deltas'], pending['added'], pending['removed'], pending['reload'])
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_load_changes(session):
+    session.info.pop('mechanic_load_pending', None)
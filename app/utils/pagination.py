@@ -0,0 +1,87 @@
+# app/utils/pagination.py
+import base64
+import json
+from datetime import date
+from flask import request, current_app
+from sqlalchemy import and_, or_
+from app.models import db
+
+DEFAULT_PER_PAGE = 50  # Used when the client does not send per_page
+MAX_PER_PAGE = 100  # Hard ceiling so no list endpoint returns an unbounded result set
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+def get_per_page():
+    """
+    Read per_page from the query string, clamped to the server maximum.
+    Raises ValueError on anything that is not a positive integer.
+    """
+    max_per_page = current_app.config.get('MAX_PER_PAGE', MAX_PER_PAGE)
+    raw = request.args.get('per_page')
+    if raw is None:
+        return min(current_app.config.get('DEFAULT_PER_PAGE', DEFAULT_PER_PAGE), max_per_page)
+    try:
+        per_page = int(raw)
+    except ValueError:
+        raise ValueError("per_page must be an integer.")
+    if per_page < 1:
+        raise ValueError("per_page must be at least 1.")
+    return min(per_page, max_per_page)
+
+def encode_cursor(values):
+    """Turn the sort key of the last row on a page into an opaque, URL-safe token."""
+    payload = json.dumps([v.isoformat() if isinstance(v, date) else v for v in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(token, columns):
+    """Reverse encode_cursor, converting each value back to its column's Python type."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        decoded = []
+        for column, value in zip(columns, values):
+            python_type = column.type.python_type
+            decoded.append(date.fromisoformat(value) if python_type is date else python_type(value))
+        return decoded
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor.")
+
+def _after(columns, values):
+    """
+    Build the keyset predicate (c1, c2, ...) > (v1, v2, ...) as OR/AND terms,
+    which every backend can answer from the composite index.
+    """
+    terms = []
+    for i, column in enumerate(columns):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        terms.append(and_(*equal_prefix, column > values[i]))
+    return or_(*terms)
+
+def keyset_paginate(query, columns):
+    """
+    Apply cursor pagination to a SELECT ordered by the given columns (ascending,
+    last column unique). Deep pages cost the same as the first one because the
+    cursor becomes a WHERE clause instead of an OFFSET.
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    per_page = get_per_page()
+    token = request.args.get('cursor')
+    if token:
+        query = query.where(_after(columns, decode_cursor(token, columns)))
+
+    query = query.order_by(*columns).limit(per_page + 1)  # One extra row tells us whether another page exists
+    items = db.session.execute(query).scalars().unique().all()
+
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        next_cursor = encode_cursor([getattr(items[-1], column.key) for column in columns])
+    return items, next_cursor
+
+def paginated_response(schema, items, next_cursor):
+    """Serialize a page, keeping the body a plain list and exposing the cursor as a header."""
+    response = schema.jsonify(items)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
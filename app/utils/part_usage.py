@@ -0,0 +1,236 @@
+# app/utils/part_usage.py
+from sqlalchemy import select, delete, insert, func, extract, tuple_
+from app.models import db, Inventory, Ticket, TicketInventory, PartMonthlyUsage, PartMechanicMonthlyUsage, ticket_mechanic
+from app.utils.upsert import increment_upsert
+
+# MARK: Parts usage rollups
+# part_monthly_usage holds quantity and revenue per (part, month); the mechanic table
+# the same per (part, mechanic, month), crediting a ticket's parts to every mechanic
+# on it. Adding parts increments the rows in place (add_part_usage). Rarer writes that
+# move a ticket between months or mechanics, or reprice a part, recompute just the
+# affected keys from ticket_inventory, like the mechanic daily rollup.
+
+def month_key(day):
+    """yyyymm for a date, matching the month column."""
+    return day.year * 100 + day.month
+
+MONTH = extract('year', Ticket.ticket_date) * 100 + extract('month', Ticket.ticket_date)
+
+def _usage_columns():
+    return (
+        func.sum(TicketInventory.quantity),
+        func.coalesce(func.sum(TicketInventory.quantity * Inventory.price), 0),
+    )
+
+def part_usage_query():
+    """(inventory_id, month, quantity, revenue) grouped per part per ticket month."""
+    return (
+        select(TicketInventory.inventory_id, MONTH, *_usage_columns())
+        .join(Ticket, Ticket.id == TicketInventory.ticket_id)
+        .join(Inventory, Inventory.id == TicketInventory.inventory_id)
+        .group_by(TicketInventory.inventory_id, MONTH)
+    )
+
+def part_mechanic_usage_query():
+    """(inventory_id, mechanic_id, month, quantity, revenue) grouped per part per mechanic per ticket month."""
+    return (
+        select(TicketInventory.inventory_id, ticket_mechanic.c.mechanic_id, MONTH, *_usage_columns())
+        .join(Ticket, Ticket.id == TicketInventory.ticket_id)
+        .join(Inventory, Inventory.id == TicketInventory.inventory_id)
+        .join(ticket_mechanic, ticket_mechanic.c.ticket_id == Ticket.id)
+        .group_by(TicketInventory.inventory_id, ticket_mechanic.c.mechanic_id, MONTH)
+    )
+
+def _insert_part_usage(query):
+    db.session.execute(insert(PartMonthlyUsage).from_select(['inventory_id', 'month', 'quantity', 'revenue'], query))
+
+def _insert_part_mechanic_usage(query):
+    db.session.execute(
+        insert(PartMechanicMonthlyUsage).from_select(['inventory_id', 'mechanic_id', 'month', 'quantity', 'revenue'], query)
+    )
+
+def add_part_usage(lines):
+    """
+    Increment both rollups for parts just added to tickets. lines are
+    {'ticket_id', 'inventory_id', 'quantity'} dicts (the added amounts, not the
+    ticket's new totals). Three small lookups (months, mechanics, prices), then
+    one increment upsert per table. Caller commits.
+    """
+    lines = [line for line in lines if line['quantity']]
+    if not lines:
+        return
+    ticket_ids = {line['ticket_id'] for line in lines}
+    months = dict(db.session.execute(select(Ticket.id, Ticket.ticket_date).where(Ticket.id.in_(ticket_ids))).all())
+    mechanics = {}
+    for ticket_id, mechanic_id in db.session.execute(
+        select(ticket_mechanic.c.ticket_id, ticket_mechanic.c.mechanic_id).where(ticket_mechanic.c.ticket_id.in_(ticket_ids))
+    ):
+        mechanics.setdefault(ticket_id, []).append(mechanic_id)
+    prices = dict(db.session.execute(
+        select(Inventory.id, Inventory.price).where(Inventory.id.in_({line['inventory_id'] for line in lines}))
+    ).all())
+
+    part_rows, mechanic_rows = {}, {}
+    for line in lines:
+        quantity, inventory_id = line['quantity'], line['inventory_id']
+        month = month_key(months[line['ticket_id']])
+        revenue = quantity * prices[inventory_id]
+        keys = [(part_rows, {'inventory_id': inventory_id, 'month': month})]
+        keys += [(mechanic_rows, {'inventory_id': inventory_id, 'mechanic_id': m, 'month': month})
+                 for m in mechanics.get(line['ticket_id'], ())]
+        for rows, key in keys:
+            row = rows.setdefault(tuple(key.values()), {**key, 'quantity': 0, 'revenue': 0.0})
+            row['quantity'] += quantity
+            row['revenue'] += revenue
+    increment_upsert(PartMonthlyUsage, [PartMonthlyUsage.inventory_id, PartMonthlyUsage.month],
+                     list(part_rows.values()), ['quantity', 'revenue'])
+    increment_upsert(PartMechanicMonthlyUsage,
+                     [PartMechanicMonthlyUsage.inventory_id, PartMechanicMonthlyUsage.mechanic_id, PartMechanicMonthlyUsage.month],
+                     list(mechanic_rows.values()), ['quantity', 'revenue'])
+
+def _ticket_lines(ticket_ids):
+    """(ticket_id, inventory_id, month) for every part line on the tickets."""
+    query = (
+        select(TicketInventory.ticket_id, TicketInventory.inventory_id, Ticket.ticket_date)
+        .join(Ticket, Ticket.id == TicketInventory.ticket_id)
+        .where(TicketInventory.ticket_id.in_(ticket_ids))
+    )
+    return [(ticket_id, inventory_id, month_key(day)) for ticket_id, inventory_id, day in db.session.execute(query)]
+
+def part_usage_keys(ticket_ids):
+    """The rollup keys the tickets' parts currently feed: ({(inventory_id, month)}, {(inventory_id, mechanic_id, month)})."""
+    lines = _ticket_lines(ticket_ids)
+    on_tickets = {}
+    for ticket_id, mechanic_id in db.session.execute(
+        select(ticket_mechanic.c.ticket_id, ticket_mechanic.c.mechanic_id).where(ticket_mechanic.c.ticket_id.in_(ticket_ids))
+    ):
+        on_tickets.setdefault(ticket_id, []).append(mechanic_id)
+    part_keys = {(inventory_id, month) for _, inventory_id, month in lines}
+    mechanic_keys = {(inventory_id, m, month) for ticket_id, inventory_id, month in lines for m in on_tickets.get(ticket_id, ())}
+    return part_keys, mechanic_keys
+
+def refresh_part_usage(keys):
+    """
+    Recompute the given (part keys, mechanic keys) from part_usage_keys(): delete
+    them, then re-insert from GROUP BYs limited to those keys. Keys with no usage
+    left simply drop out. Caller commits.
+    """
+    part_keys, mechanic_keys = (list(set(k)) for k in keys)
+    if part_keys:
+        key = tuple_(PartMonthlyUsage.inventory_id, PartMonthlyUsage.month)
+        db.session.execute(delete(PartMonthlyUsage).where(key.in_(part_keys)))
+        _insert_part_usage(part_usage_query().where(
+            TicketInventory.inventory_id.in_({k[0] for k in part_keys}),
+            tuple_(TicketInventory.inventory_id, MONTH).in_(part_keys)))
+    if mechanic_keys:
+        key = tuple_(PartMechanicMonthlyUsage.inventory_id, PartMechanicMonthlyUsage.mechanic_id, PartMechanicMonthlyUsage.month)
+        db.session.execute(delete(PartMechanicMonthlyUsage).where(key.in_(mechanic_keys)))
+        _insert_part_mechanic_usage(part_mechanic_usage_query().where(
+            TicketInventory.inventory_id.in_({k[0] for k in mechanic_keys}),
+            tuple_(TicketInventory.inventory_id, ticket_mechanic.c.mechanic_id, MONTH).in_(mechanic_keys)))
+
+def refresh_part_usage_for_tickets(ticket_ids, previous_keys=None):
+    """Refresh the keys the tickets feed now, plus previous_keys captured before the write (e.g. the date moves)."""
+    part_keys, mechanic_keys = part_usage_keys(ticket_ids)
+    if previous_keys:
+        part_keys, mechanic_keys = part_keys | previous_keys[0], mechanic_keys | previous_keys[1]
+    refresh_part_usage((part_keys, mechanic_keys))
+
+def refresh_part_usage_for_mechanics(assignments):
+    """
+    Refresh the mechanic rollup after (ticket_id, mechanic_id) assignments were
+    added or removed. Per-part totals do not depend on who is assigned.
+    """
+    by_ticket = {}
+    for ticket_id, mechanic_id in assignments:
+        by_ticket.setdefault(ticket_id, set()).add(mechanic_id)
+    if not by_ticket:
+        return
+    keys = {(inventory_id, m, month) for ticket_id, inventory_id, month in _ticket_lines(by_ticket) for m in by_ticket[ticket_id]}
+    refresh_part_usage((set(), keys))
+
+def refresh_part_usage_for_parts(inventory_ids):
+    """Recompute every row for the given parts (after their prices change)."""
+    inventory_ids = set(inventory_ids)
+    if not inventory_ids:
+        return
+    db.session.execute(delete(PartMonthlyUsage).where(PartMonthlyUsage.inventory_id.in_(inventory_ids)))
+    db.session.execute(delete(PartMechanicMonthlyUsage).where(PartMechanicMonthlyUsage.inventory_id.in_(inventory_ids)))
+    _insert_part_usage(part_usage_query().where(TicketInventory.inventory_id.in_(inventory_ids)))
+    _insert_part_mechanic_usage(part_mechanic_usage_query().where(TicketInventory.inventory_id.in_(inventory_ids)))
+
+def delete_part_usage(inventory_id):
+    """Drop a part's rows before the part is deleted."""
+    db.session.execute(delete(PartMonthlyUsage).where(PartMonthlyUsage.inventory_id == inventory_id))
+    db.session.execute(delete(PartMechanicMonthlyUsage).where(PartMechanicMonthlyUsage.inventory_id == inventory_id))
+
+def rebuild_part_usage():
+    """Rebuild both rollup tables from ticket_inventory. Caller commits."""
+    db.session.execute(delete(PartMonthlyUsage))
+    db.session.execute(delete(PartMechanicMonthlyUsage))
+    _insert_part_usage(part_usage_query())
+    _insert_part_mechanic_usage(part_mechanic_usage_query())
+
+# MARK: Top parts
+def add_months(month, count):
+    """Shift a yyyymm month by count months (negative to go back)."""
+    index = month // 100 * 12 + month % 100 - 1 + count
+    return index // 12 * 100 + index % 12 + 1
+
+def month_label(month):
+    """yyyymm -> 'YYYY-MM'."""
+    return f"{month // 100:04d}-{month % 100:02d}"
+
+def top_parts(start, end, limit, by='quantity', mechanic_id=None):
+    """
+    The limit parts with the most quantity (or revenue) between months start and
+    end (yyyymm, inclusive), each with per-month and per-mechanic breakdowns.
+    With mechanic_id, only that mechanic's usage counts. Three queries over the
+    rollups, so the cost follows parts x months, never the number of tickets.
+    """
+    usage, mechanic_usage = PartMonthlyUsage, PartMechanicMonthlyUsage
+    source = mechanic_usage if mechanic_id is not None else usage
+    clauses = [source.month.between(start, end)]
+    mechanic_clauses = [mechanic_usage.month.between(start, end)]
+    if mechanic_id is not None:
+        clauses.append(mechanic_usage.mechanic_id == mechanic_id)
+        mechanic_clauses.append(mechanic_usage.mechanic_id == mechanic_id)
+    quantity, revenue = func.sum(source.quantity).label('quantity'), func.sum(source.revenue).label('revenue')
+
+    ranked = db.session.execute(
+        select(source.inventory_id, Inventory.name, quantity, revenue)
+        .join(Inventory, Inventory.id == source.inventory_id)
+        .where(*clauses)
+        .group_by(source.inventory_id, Inventory.name)
+        .order_by((revenue if by == 'revenue' else quantity).desc(), source.inventory_id)
+        .limit(limit)
+    ).all()
+    parts = {
+        row.inventory_id: {"inventory_id": row.inventory_id, "name": row.name, "quantity": row.quantity,
+                           "revenue": round(row.revenue, 2), "months": [], "mechanics": []}
+        for row in ranked
+    }
+    if not parts:
+        return []
+
+    months = (
+        select(source.inventory_id, source.month, func.sum(source.quantity), func.sum(source.revenue))
+        .where(source.inventory_id.in_(parts), *clauses)
+        .group_by(source.inventory_id, source.month)
+        .order_by(source.inventory_id, source.month)
+    )
+    for inventory_id, month, month_quantity, month_revenue in db.session.execute(months):
+        parts[inventory_id]["months"].append(
+            {"month": month_label(month), "quantity": month_quantity, "revenue": round(month_revenue, 2)})
+
+    mechanics = (
+        select(mechanic_usage.inventory_id, mechanic_usage.mechanic_id,
+               func.sum(mechanic_usage.quantity).label('quantity'), func.sum(mechanic_usage.revenue))
+        .where(mechanic_usage.inventory_id.in_(parts), *mechanic_clauses)
+        .group_by(mechanic_usage.inventory_id, mechanic_usage.mechanic_id)
+        .order_by(mechanic_usage.inventory_id, func.sum(mechanic_usage.quantity).desc(), mechanic_usage.mechanic_id)
+    )
+    for inventory_id, mechanic, mechanic_quantity, mechanic_revenue in db.session.execute(mechanics):
+        parts[inventory_id]["mechanics"].append(
+            {"mechanic_id": mechanic, "quantity": mechanic_quantity, "revenue": round(mechanic_revenue, 2)})
+    return list(parts.values())
@@ -0,0 +1,91 @@
+# app/utils/passwords.py
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# MARK: Password hashing
+# Passwords are stored as werkzeug hashes ("method$salt$hash"). The method string
+# carries the cost, e.g. 'pbkdf2:sha256:600000' or 'scrypt:32768:8:1', and is set
+# per environment with PASSWORD_HASH_METHOD. Hashing and verification run on a
+# small thread pool (hashlib releases the GIL while deriving keys) that refuses
+# new work once PASSWORD_POOL_MAX_PENDING calls are queued or running, so a login
+# burst is shed with a 503 instead of piling up on every worker thread.
+
+DEFAULT_HASH_METHOD = 'pbkdf2:sha256:600000'
+DEFAULT_POOL_WORKERS = os.cpu_count() or 2
+DEFAULT_POOL_MAX_PENDING = 64
+HASH_PREFIXES = ('pbkdf2:', 'scrypt:')
+
+class PasswordPoolBusy(Exception):
+    """Raised when the hashing pool already holds PASSWORD_POOL_MAX_PENDING calls."""
+
+class PasswordPool:
+    """Bounded executor for key derivation: at most max_pending calls queued or running."""
+
+    def __init__(self, workers, max_pending):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password')
+        self.slots = threading.BoundedSemaphore(max_pending)
+
+    def run(self, fn, *args, **kwargs):
+        if not self.slots.acquire(blocking=False):
+            raise PasswordPoolBusy()
+        try:
+            return self.executor.submit(fn, *args, **kwargs).result()
+        finally:
+            self.slots.release()
+
+def get_password_pool():
+    extensions = current_app.extensions
+    if 'password_pool' not in extensions:
+        extensions['password_pool'] = PasswordPool(
+            current_app.config.get('PASSWORD_POOL_WORKERS', DEFAULT_POOL_WORKERS),
+            current_app.config.get('PASSWORD_POOL_MAX_PENDING', DEFAULT_POOL_MAX_PENDING),
+        )
+    return extensions['password_pool']
+
+def hash_method():
+    return current_app.config.get('PASSWORD_HASH_METHOD', DEFAULT_HASH_METHOD)
+
+def is_password_hash(stored):
+    return stored.startswith(HASH_PREFIXES) and stored.count('$') >= 2
+
+def hash_password(password):
+    """Hash a password with the configured method, on the pool."""
+    return get_password_pool().run(generate_password_hash, password, method=hash_method())
+
+def verify_password(stored, password):
+    """
+    Check a password against a stored value, on the pool. Rows written before
+    hashing hold the plaintext and are compared in constant time.
+    """
+    if not is_password_hash(stored):
+        return hmac.compare_digest(stored.encode(), password.encode())
+    return get_password_pool().run(check_password_hash, stored, password)
+
+def needs_rehash(stored):
+    """True for legacy plaintext rows and hashes made with a different method or cost."""
+    return not is_password_hash(stored) or stored.split('$', 1)[0] != hash_method()
+
+def hash_password_field(data):
+    """Replace a plaintext 'password' in loaded schema data with its hash (no-op when absent)."""
+    if data.get('password'):
+        data['password'] = hash_password(data['password'])
+    return data
+
+def check_login(account, password):
+    """
+    Verify a login and, when it succeeds on a legacy or outdated hash, store a
+    fresh hash with the configured method. Caller commits. Raises PasswordPoolBusy
+    when the pool is too busy to verify.
+    """
+    if not account or not verify_password(account.password, password):
+        return False
+    if needs_rehash(account.password):
+        try:
+            account.password = hash_password(password)
+        except PasswordPoolBusy:
+            pass  # The login already succeeded; upgrade on a later one
+    return True
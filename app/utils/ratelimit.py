@@ -0,0 +1,182 @@
+# app/utils/ratelimit.py
+import sqlite3
+import threading
+import time
+import jose
+from flask import current_app, request
+from flask_limiter.util import get_remote_address
+from limits.storage import Storage, MovingWindowSupport
+from app.utils.util import request_claims
+from app.utils.revocation import is_revoked
+from config import RATELIMIT_TIERS
+
+# MARK: Shared rate-limit storage
+# Flask-Limiter's memory:// storage is per process: under gunicorn every worker
+# counts on its own (the real limit becomes limit x workers) and a deploy resets
+# everything. RATELIMIT_STORAGE_URI picks a shared backend instead:
+#   sqlite:////var/lib/mechanic-shop/ratelimits.db  one file shared by the workers on a host (below)
+#   redis://host:6379/0                              limits' Redis storage, shared across hosts (needs redis-py)
+# Both support the fixed-window and moving-window strategies (RATELIMIT_STRATEGY).
+RATELIMIT_PRUNE_SECONDS = 60  # How often a worker sweeps expired rows out of the SQLite file
+
+class SQLiteStorage(Storage, MovingWindowSupport):
+    """
+    Rate-limit storage in a local SQLite file, so every worker on the host shares
+    one set of counters without an external service. WAL mode lets readers run
+    alongside the single writer; each check is one short IMMEDIATE transaction.
+    Fixed windows are one row per key in ratelimit_counters; moving windows are one
+    row per hit in ratelimit_entries, counted over (key, at).
+    """
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri=None, wrap_exceptions=False, timeout=5.0, **options):
+        self.path = uri.split("://", 1)[1][1:] if uri else ""  # sqlite:///relative.db, sqlite:////absolute.db
+        if not self.path or self.path == ":memory:":
+            raise ValueError("sqlite:// rate-limit storage needs a file path, e.g. sqlite:////var/lib/app/ratelimits.db")
+        self.timeout = float(timeout)
+        self.local = threading.local()  # sqlite3 connections are per thread
+        self.pruned_at = 0.0
+        self._connection().executescript("""
+            CREATE TABLE IF NOT EXISTS ratelimit_counters (
+                key TEXT PRIMARY KEY, count INTEGER NOT NULL, expires_at REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS ix_ratelimit_counters_expires_at ON ratelimit_counters (expires_at);
+            CREATE TABLE IF NOT EXISTS ratelimit_entries (
+                key TEXT NOT NULL, at REAL NOT NULL, expires_at REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS ix_ratelimit_entries_key_at ON ratelimit_entries (key, at);
+            CREATE INDEX IF NOT EXISTS ix_ratelimit_entries_expires_at ON ratelimit_entries (expires_at);
+        """)
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _connection(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE where a check must be atomic
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # Durable enough for counters; avoids an fsync per hit
+            self.local.conn = conn
+        return conn
+
+    def _prune(self, conn, now):
+        """Drop expired counters and hits, at most once per RATELIMIT_PRUNE_SECONDS per worker."""
+        if now - self.pruned_at < RATELIMIT_PRUNE_SECONDS:
+            return
+        self.pruned_at = now
+        conn.execute("DELETE FROM ratelimit_counters WHERE expires_at <= ?", (now,))
+        conn.execute("DELETE FROM ratelimit_entries WHERE expires_at <= ?", (now,))
+
+    def incr(self, key, expiry, amount=1):
+        now = time.time()
+        conn = self._connection()
+        self._prune(conn, now)
+        # One statement, so atomic: a counter whose window has passed restarts at amount
+        return conn.execute(
+            """
+            INSERT INTO ratelimit_counters (key, count, expires_at) VALUES (:key, :amount, :expires_at)
+            ON CONFLICT (key) DO UPDATE SET
+                count = CASE WHEN expires_at <= :now THEN :amount ELSE count + :amount END,
+                expires_at = CASE WHEN expires_at <= :now THEN :expires_at ELSE expires_at END
+            RETURNING count
+            """,
+            {"key": key, "amount": amount, "now": now, "expires_at": now + expiry},
+        ).fetchone()[0]
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT count FROM ratelimit_counters WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        now = time.time()
+        row = self._connection().execute(
+            "SELECT expires_at FROM ratelimit_counters WHERE key = ? AND expires_at > ?", (key, now)
+        ).fetchone()
+        return row[0] if row else now
+
+    def check(self):
+        try:
+            self._connection().execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        conn = self._connection()
+        removed = conn.execute("DELETE FROM ratelimit_counters").rowcount
+        removed += conn.execute("DELETE FROM ratelimit_entries").rowcount
+        return removed
+
+    def clear(self, key):
+        conn = self._connection()
+        conn.execute("DELETE FROM ratelimit_counters WHERE key = ?", (key,))
+        conn.execute("DELETE FROM ratelimit_entries WHERE key = ?", (key,))
+
+    def acquire_entry(self, key, limit, expiry, amount=1):
+        if amount > limit:
+            return False
+        now = time.time()
+        conn = self._connection()
+        self._prune(conn, now)
+        # IMMEDIATE takes the write lock up front, so count-then-insert cannot interleave with another worker
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            (count,) = conn.execute(
+                "SELECT count(*) FROM ratelimit_entries WHERE key = ? AND at > ?", (key, now - expiry)
+            ).fetchone()
+            if count + amount > limit:
+                conn.execute("ROLLBACK")
+                return False
+            conn.executemany(
+                "INSERT INTO ratelimit_entries (key, at, expires_at) VALUES (?, ?, ?)",
+                [(key, now, now + expiry)] * amount,
+            )
+            conn.execute("COMMIT")
+            return True
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    def get_moving_window(self, key, limit, expiry):
+        now = time.time()
+        oldest, count = self._connection().execute(
+            "SELECT min(at), count(*) FROM ratelimit_entries WHERE key = ? AND at > ?", (key, now - expiry)
+        ).fetchone()
+        return (oldest, count) if count else (now, 0)
+
+# MARK: Principal-keyed limits
+# Limits follow who is calling, not where from: the shop floor shares one NAT
+# address, so keying by IP would put every mechanic in one bucket. A request with
+# a valid, unrevoked token is keyed "<role>:<sub>"; anything else is
+# "anonymous:<client address>". The role picks a tier from RATELIMIT_TIERS
+# (config.py), which has separate read and write limits. The claims come from
+# request_claims(), so the auth decorator reuses the decode instead of repeating it.
+READ_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+def rate_limit_principal():
+    """(role, identity) for this request: the token's role and sub, or ('anonymous', client address)."""
+    try:
+        claims = request_claims()
+    except jose.exceptions.JWTError:
+        claims = None  # Expired or forged tokens do not get a bucket of their own
+    if claims and claims.get('role') and claims.get('sub') and not is_revoked(claims):
+        return claims['role'], claims['sub']
+    return 'anonymous', get_remote_address()
+
+def rate_limit_key():
+    """key_func for the limiter."""
+    role, identity = rate_limit_principal()
+    return f"{role}:{identity}"
+
+def rate_limit_tier():
+    """Default limit for this request: the caller's role tier, read or write by HTTP method."""
+    role, _ = rate_limit_principal()
+    tiers = current_app.config.get('RATELIMIT_TIERS', RATELIMIT_TIERS)
+    tier = tiers.get(role, tiers['anonymous'])
+    return tier['read' if request.method in READ_METHODS else 'write']
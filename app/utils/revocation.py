@@ -0,0 +1,106 @@
+# app/utils/revocation.py
+import threading
+import time
+from datetime import timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import event, select, delete
+from sqlalchemy.orm import Session
+from app.models import db, RevokedToken
+
+# MARK: Token revocation
+# Revocations are rows in revoked_tokens (the source of truth, shared by every
+# worker). Each worker mirrors the live rows in memory: a dict of revoked jtis and
+# a dict of subject -> revoked_at, so the check on every authenticated request is
+# two hash lookups. The mirror pulls new rows (id > last seen) at most every
+# TOKEN_REVOCATION_REFRESH seconds, reloads fully every REVOCATION_RELOAD_TTL to
+# drop expired entries and catch rows committed out of id order, and applies this
+# worker's own revocations as soon as they commit.
+TOKEN_LIFETIME = timedelta(hours=1)  # exp of every issued token; a subject revocation outlives all older tokens after this
+REVOCATION_REFRESH_SECONDS = 5
+REVOCATION_RELOAD_TTL = 300
+
+class RevocationList:
+    """In-memory mirror of revoked_tokens: jti -> expires_at and subject -> (revoked_at, expires_at)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.jtis = {}
+        self.subjects = {}
+        self.last_id = 0
+        self.checked_at = None
+        self.loaded_at = None
+
+    def _apply(self, jti, subject, revoked_at, expires_at):
+        if jti:
+            self.jtis[jti] = expires_at
+        if subject:
+            current = self.subjects.get(subject)
+            if current is None or revoked_at > current[0]:
+                self.subjects[subject] = (revoked_at, expires_at)
+
+    def _refresh(self, now):
+        refresh = current_app.config.get('TOKEN_REVOCATION_REFRESH', REVOCATION_REFRESH_SECONDS)
+        if self.checked_at is not None and now - self.checked_at < refresh:
+            return
+        with self.lock:
+            if self.checked_at is not None and now - self.checked_at < refresh:
+                return
+            query = select(RevokedToken.id, RevokedToken.jti, RevokedToken.subject,
+                           RevokedToken.revoked_at, RevokedToken.expires_at)
+            if self.loaded_at is None or now - self.loaded_at >= REVOCATION_RELOAD_TTL:
+                self.jtis, self.subjects, self.last_id = {}, {}, 0
+                query = query.where(RevokedToken.expires_at > now)  # Range scan on ix_revoked_tokens_expires_at
+                self.loaded_at = now
+            else:
+                query = query.where(RevokedToken.id > self.last_id)  # Primary-key range: only rows added since
+            for row in db.session.execute(query):
+                self._apply(row.jti, row.subject, row.revoked_at, row.expires_at)
+                self.last_id = max(self.last_id, row.id)
+            self.checked_at = now
+
+    def apply(self, revocations):
+        with self.lock:
+            for revocation in revocations:
+                self._apply(*revocation)
+
+    def is_revoked(self, claims):
+        self._refresh(time.time())
+        if claims.get('jti') in self.jtis:
+            return True
+        revoked = self.subjects.get(f"{claims.get('role')}:{claims.get('sub')}")
+        return revoked is not None and claims.get('iat', 0) < revoked[0]
+
+def get_revocation_list():
+    return current_app.extensions.setdefault('token_revocations', RevocationList())
+
+def is_revoked(claims):
+    """True when this token was logged out, or its subject revoked every token issued before it."""
+    return get_revocation_list().is_revoked(claims)
+
+def _revoke(jti, subject, revoked_at, expires_at):
+    db.session.add(RevokedToken(jti=jti, subject=subject, revoked_at=revoked_at, expires_at=expires_at))
+    db.session().info.setdefault('revocations_pending', []).append((jti, subject, revoked_at, expires_at))
+
+def revoke_token(claims):
+    """Revoke one token (logout) until its exp. Caller commits."""
+    _revoke(claims['jti'], None, time.time(), claims['exp'])
+
+def revoke_subject(role, subject_id):
+    """Revoke every token issued so far to role:subject_id (password change, account removed). Caller commits."""
+    now = time.time()
+    _revoke(None, f"{role}:{subject_id}", now, now + TOKEN_LIFETIME.total_seconds())
+
+def prune_revoked_tokens():
+    """Delete rows whose tokens have all expired. Caller commits."""
+    db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= time.time()))
+
+# This worker's revocations take effect as soon as they commit, without waiting for a refresh
+@event.listens_for(Session, 'after_commit')
+def _apply_revocations(session):
+    pending = session.info.pop('revocations_pending', None)
+    if pending and has_app_context() and 'token_revocations' in current_app.extensions:
+        current_app.extensions['token_revocations'].apply(pending)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_revocations(session):
+    session.info.pop('revocations_pending', None)
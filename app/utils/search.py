@@ -0,0 +1,184 @@
+# app/utils/search.py
+import re
+import threading
+import time
+from collections import defaultdict
+from flask import current_app, has_app_context
+from sqlalchemy import event, select, text
+from sqlalchemy.orm import Session
+from app.models import db, Mechanic
+
+# MARK: Mechanic name search
+# Backends, picked per request from the database dialect:
+#   sqlite -> FTS5 virtual table (mechanics_fts) kept in sync by triggers, ranked by bm25()
+#   mysql  -> FULLTEXT index on mechanics.name, BOOLEAN MODE prefix match ranked by relevance
+#   other  -> in-process trigram index (NgramIndex), updated on commit and reloaded periodically
+# Set MECHANIC_SEARCH_BACKEND = 'ngram' in config to force the fallback.
+
+SEARCH_DEFAULT_LIMIT = 10
+SEARCH_MAX_LIMIT = 50
+NGRAM_INDEX_TTL = 300  # Seconds before the fallback index reloads, to pick up other workers' writes
+
+FTS5_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS mechanics_fts USING fts5("
+    "name, content='mechanics', content_rowid='id', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS mechanics_fts_ai AFTER INSERT ON mechanics BEGIN "
+    "INSERT INTO mechanics_fts(rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS mechanics_fts_ad AFTER DELETE ON mechanics BEGIN "
+    "INSERT INTO mechanics_fts(mechanics_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS mechanics_fts_au AFTER UPDATE OF name ON mechanics BEGIN "
+    "INSERT INTO mechanics_fts(mechanics_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO mechanics_fts(rowid, name) VALUES (new.id, new.name); END",
+]
+MYSQL_FULLTEXT_DDL = "ALTER TABLE mechanics ADD FULLTEXT INDEX ix_mechanics_name_fulltext (name)"
+
+def tokenize(value):
+    """Lower-cased word tokens; every token is matched as a word prefix."""
+    return re.findall(r'\w+', (value or '').lower())
+
+def sqlite_has_fts5(connection):
+    options = connection.exec_driver_sql("PRAGMA compile_options").scalars().all()
+    return 'ENABLE_FTS5' in options
+
+# Full-text structures are created alongside the mechanics table (db.create_all)
+@event.listens_for(Mechanic.__table__, 'after_create')
+def create_search_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite' and sqlite_has_fts5(connection):
+        for statement in FTS5_DDL:
+            connection.exec_driver_sql(statement)
+    elif connection.dialect.name == 'mysql':
+        connection.exec_driver_sql(MYSQL_FULLTEXT_DDL)
+
+@event.listens_for(Mechanic.__table__, 'before_drop')
+def drop_search_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql("DROP TABLE IF EXISTS mechanics_fts")  # Triggers go with the mechanics table
+
+def _ngrams(word, n=3):
+    # Two leading spaces anchor grams to the word start, so short prefixes ("jo") still have grams
+    padded = '  ' + word
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+class NgramIndex:
+    """In-process trigram index over mechanic names, for backends without full-text search."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.names = None  # mechanic id -> tokens; None until first search
+        self.postings = defaultdict(set)  # trigram -> mechanic ids
+        self.loaded_at = 0
+
+    def _add(self, mechanic_id, name):
+        words = tokenize(name)
+        self.names[mechanic_id] = words
+        for word in words:
+            for gram in _ngrams(word):
+                self.postings[gram].add(mechanic_id)
+
+    def _remove(self, mechanic_id):
+        for word in self.names.pop(mechanic_id, []):
+            for gram in _ngrams(word):
+                self.postings[gram].discard(mechanic_id)
+
+    def _ensure_loaded(self):
+        if self.names is not None and time.monotonic() - self.loaded_at < NGRAM_INDEX_TTL:
+            return
+        rows = db.session.execute(select(Mechanic.id, Mechanic.name)).all()
+        self.names, self.postings = {}, defaultdict(set)
+        for mechanic_id, name in rows:
+            self._add(mechanic_id, name)
+        self.loaded_at = time.monotonic()
+
+    def apply(self, upserts, deletes):
+        """Mirror committed writes: upserts is {id: name}, deletes is a set of ids."""
+        with self.lock:
+            if self.names is None:
+                return  # Not loaded yet; the first search reads fresh rows
+            for mechanic_id in deletes | set(upserts):
+                self._remove(mechanic_id)
+            for mechanic_id, name in upserts.items():
+                self._add(mechanic_id, name)
+
+    def search(self, tokens, limit):
+        """Ids whose name has a word starting with every token, best matches first."""
+        with self.lock:
+            self._ensure_loaded()
+            candidates = None
+            for token in tokens:
+                ids = set.intersection(*(self.postings.get(gram, set()) for gram in _ngrams(token)))
+                candidates = ids if candidates is None else candidates & ids
+            scored = []
+            for mechanic_id in candidates or ():
+                words = self.names[mechanic_id]
+                # Trigrams can match mid-word, so confirm each token really prefixes a word
+                if all(any(word.startswith(token) for word in words) for token in tokens):
+                    exact = sum(token in words for token in tokens)
+                    scored.append((-exact, len(words), mechanic_id))
+            return [mechanic_id for _, _, mechanic_id in sorted(scored)[:limit]]
+
+def get_ngram_index():
+    return current_app.extensions.setdefault('mechanic_search_ngram', NgramIndex())
+
+# Collect mechanic writes per session and hand them to the n-gram index only once committed
+@event.listens_for(Session, 'after_flush')
+def _collect_mechanic_changes(session, flush_context):
+    pending = session.info.setdefault('mechanic_search_pending', ({}, set()))
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Mechanic):
+            pending[0][obj.id] = obj.name
+    for obj in session.deleted:
+        if isinstance(obj, Mechanic):
+            pending[0].pop(obj.id, None)
+            pending[1].add(obj.id)
+
+@event.listens_for(Session, 'after_commit')
+def _apply_mechanic_changes(session):
+    pending = session.info.pop('mechanic_search_pending', None)
+    if pending and has_app_context() and 'mechanic_search_ngram' in current_app.extensions:
+        current_app.extensions['mechanic_search_ngram'].apply(*pending)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_mechanic_changes(session):
+    session.info.pop('mechanic_search_pending', None)
+
+def search_backend():
+    configured = current_app.config.get('MECHANIC_SEARCH_BACKEND', 'auto')
+    if configured != 'auto':
+        return configured
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        if 'mechanic_search_fts5' not in current_app.extensions:
+            current_app.extensions['mechanic_search_fts5'] = sqlite_has_fts5(db.session.connection())
+        return 'fts5' if current_app.extensions['mechanic_search_fts5'] else 'ngram'
+    return 'fulltext' if dialect == 'mysql' else 'ngram'
+
+def search_mechanics(query, limit=SEARCH_DEFAULT_LIMIT):
+    """Ranked prefix search over mechanic names; every token must match."""
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    backend = search_backend()
+
+    if backend == 'fts5':
+        statement = text(
+            "SELECT mechanics.* FROM mechanics_fts JOIN mechanics ON mechanics.id = mechanics_fts.rowid "
+            "WHERE mechanics_fts MATCH :match ORDER BY bm25(mechanics_fts), mechanics.id LIMIT :limit"
+        )
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        return db.session.execute(select(Mechanic).from_statement(statement),
+                                  {'match': match, 'limit': limit}).scalars().all()
+
+    if backend == 'fulltext':
+        statement = text(
+            "SELECT mechanics.* FROM mechanics WHERE MATCH(name) AGAINST (:match IN BOOLEAN MODE) "
+            "ORDER BY MATCH(name) AGAINST (:match IN BOOLEAN MODE) DESC, id LIMIT :limit"
+        )
+        match = ' '.join(f'+{token}*' for token in tokens)
+        return db.session.execute(select(Mechanic).from_statement(statement),
+                                  {'match': match, 'limit': limit}).scalars().all()
+
+    ids = get_ngram_index().search(tokens, limit)
+    if not ids:
+        return []
+    mechanics = {m.id: m for m in db.session.execute(select(Mechanic).where(Mechanic.id.in_(ids))).scalars()}
+    return [mechanics[mechanic_id] for mechanic_id in ids if mechanic_id in mechanics]
@@ -0,0 +1,53 @@
+# app/utils/stock.py
+from sqlalchemy import select, update, case
+from app.models import db, Inventory
+from app.utils.catalog import mark_catalog_stale
+from app.utils.conditional import mark_written
+
+# Parts with stock_on_hand = NULL are not stock-tracked and can always be added to tickets.
+LOW_STOCK_DEFAULT_THRESHOLD = 5
+
+def reserve_stock(quantities):
+    """
+    Take {inventory_id: quantity} out of stock_on_hand. The parts are read with
+    SELECT ... FOR UPDATE first, so the short ones are found before anything is
+    decremented; when none are short, one conditional UPDATE ... WHERE
+    stock_on_hand >= quantity takes the stock, so concurrent reservations can
+    never drive it negative. Returns the ids that were short (empty on success).
+    On a shortage the caller must roll back.
+    """
+    if not quantities:
+        return []
+    # Row locks on MySQL/PostgreSQL hold these values until commit; SQLite ignores FOR UPDATE,
+    # and there the UPDATE's own condition still guards the decrement.
+    before = dict(db.session.execute(
+        select(Inventory.id, Inventory.stock_on_hand).where(Inventory.id.in_(quantities)).with_for_update()
+    ).tuples().all())
+    tracked = {id: quantities[id] for id, stock in before.items() if stock is not None}
+    short = sorted(id for id, quantity in tracked.items() if before[id] < quantity)
+    if short or not tracked:
+        return short  # Untracked parts need no UPDATE at all
+
+    wanted = case(tracked, value=Inventory.id, else_=0)
+    reserve = (
+        update(Inventory)
+        .where(Inventory.id.in_(tracked), Inventory.stock_on_hand >= wanted)
+        .values(stock_on_hand=Inventory.stock_on_hand - wanted)
+        .execution_options(synchronize_session=False)
+    )
+    if db.session.get_bind().dialect.update_returning:
+        # Another writer may have taken stock since the read (SQLite has no row locks): RETURNING says which rows we got
+        reserved = set(db.session.execute(reserve.returning(Inventory.id)).scalars())
+    else:
+        # MySQL has no UPDATE ... RETURNING, but the row locks above keep the stock we read
+        reserved = set(tracked) if db.session.execute(reserve).rowcount == len(tracked) else set()
+    if reserved:
+        mark_catalog_stale()  # stock_on_hand is part of the cached catalog
+        mark_written(Inventory)
+    return sorted(set(tracked) - reserved)
+
+LOW_STOCK_ORDER = [Inventory.stock_on_hand, Inventory.id]  # Scarcest first; the keyset for /low-stock pages
+
+def low_stock_query(threshold):
+    """Tracked parts at or below threshold (range scan on ix_inventory_stock_on_hand); paginate on LOW_STOCK_ORDER."""
+    return select(Inventory).where(Inventory.stock_on_hand <= threshold)
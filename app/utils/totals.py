@@ -0,0 +1,64 @@
+# app/utils/totals.py
+from sqlalchemy import select, update, func, case
+from app.models import db, Ticket, TicketInventory, Inventory
+from app.utils.conditional import mark_written
+
+# Helpers that keep Ticket.parts_total (sum of price * quantity over the ticket's parts)
+# in step with its ticket_inventory rows. Each is a single UPDATE; callers commit.
+
+def _update_tickets(stmt):
+    # Totals are read fresh after commit, so skip the ORM's in-session synchronization
+    db.session.execute(stmt.execution_options(synchronize_session=False))
+    mark_written(Ticket)
+
+def add_parts_to_total(ticket_id, quantities):
+    """Increment one ticket's total by the cost of the {inventory_id: quantity} just added."""
+    added = (
+        select(func.coalesce(func.sum(Inventory.price * case(quantities, value=Inventory.id, else_=0)), 0))
+        .where(Inventory.id.in_(quantities))
+        .scalar_subquery()
+    )
+    _update_tickets(update(Ticket).where(Ticket.id == ticket_id).values(parts_total=Ticket.parts_total + added))
+
+def recompute_ticket_totals(ticket_ids):
+    """Rebuild totals for the given tickets from scratch with one correlated aggregate."""
+    if not ticket_ids:
+        return
+    total = (
+        select(func.coalesce(func.sum(Inventory.price * TicketInventory.quantity), 0))
+        .select_from(TicketInventory)
+        .join(Inventory, Inventory.id == TicketInventory.inventory_id)
+        .where(TicketInventory.ticket_id == Ticket.id)
+        .scalar_subquery()
+    )
+    _update_tickets(update(Ticket).where(Ticket.id.in_(ticket_ids)).values(parts_total=total))
+
+def apply_price_change(inventory_id, delta):
+    """Shift every ticket that uses a part by delta * quantity after its price changes (or it is deleted)."""
+    quantity = (
+        select(TicketInventory.quantity)
+        .where(TicketInventory.ticket_id == Ticket.id, TicketInventory.inventory_id == inventory_id)
+        .scalar_subquery()
+    )
+    tickets_using_part = select(TicketInventory.ticket_id).where(TicketInventory.inventory_id == inventory_id)
+    _update_tickets(
+        update(Ticket)
+        .where(Ticket.id.in_(tickets_using_part))
+        .values(parts_total=Ticket.parts_total + delta * quantity)
+    )
+
+def invoice_lines(ticket_id):
+    """Line items for one ticket, priced in the same query that joins the parts."""
+    query = (
+        select(
+            Inventory.id.label('inventory_id'),
+            Inventory.name,
+            Inventory.price.label('unit_price'),
+            TicketInventory.quantity,
+            (Inventory.price * TicketInventory.quantity).label('line_total'),
+        )
+        .join(TicketInventory, TicketInventory.inventory_id == Inventory.id)
+        .where(TicketInventory.ticket_id == ticket_id)
+        .order_by(Inventory.id)
+    )
+    return [dict(row._mapping) for row in db.session.execute(query)]
@@ -0,0 +1,27 @@
+# app/utils/upsert.py
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models import db
+
+def increment_upsert(model, key_columns, rows, increments):
+    """
+    INSERT rows (executemany); where a row's key already exists, add its values
+    for the increments columns to the stored ones instead, with ON CONFLICT /
+    ON DUPLICATE KEY UPDATE col = col + new value. The addition happens inside the
+    database, so concurrent writers never lose updates. Caller commits.
+    """
+    if not rows:
+        return
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql':
+        stmt = mysql_insert(model)
+        stmt = stmt.on_duplicate_key_update({name: getattr(model, name) + stmt.inserted[name] for name in increments})
+    else:
+        upsert = postgresql_insert if dialect == 'postgresql' else sqlite_insert
+        stmt = upsert(model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={name: getattr(model, name) + stmt.excluded[name] for name in increments},
+        )
+    db.session.execute(stmt, rows)
@@ -1,17 +1,107 @@
 # app/utils/util.py
-from datetime import datetime, timedelta, timezone
+from collections import OrderedDict
+from datetime import datetime, timezone
+import hashlib
 import os
+import threading
+import time
+import uuid
 from jose import jwt
 import jose
-from flask import request, jsonify
+from flask import request, jsonify, g
 from functools import wraps
+from app.utils.revocation import is_revoked, TOKEN_LIFETIME
 
 SECRET_KEY = os.environ.get("SECRET_KEY") or "a super secret, secret key"
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", 4096))  # 0 disables the cache
+
+# MARK: Verified token cache
+# Clients reuse one token for many requests, so a token is verified (signature, exp)
+# once and its claims kept in a bounded LRU keyed by the SHA-256 of the token. An
+# entry is dropped once its exp passes; the token then goes back through
+# jwt.decode, which reports the expiry as usual.
+class TokenCache:
+    """LRU of token digest -> (exp, claims), at most maxsize entries. Thread-safe."""
+
+    def __init__(self, maxsize, clock=time.time):
+        self.maxsize = maxsize
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest):
+        with self.lock:
+            entry = self.entries.get(digest)
+            if entry is not None and entry[0] > self.clock():
+                self.entries.move_to_end(digest)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self.entries[digest]  # Expired
+            self.misses += 1
+            return None
+
+    def put(self, digest, claims):
+        exp = claims.get('exp')
+        if not self.maxsize or not isinstance(exp, (int, float)):
+            return  # Never cache a token that would not expire
+        with self.lock:
+            self.entries[digest] = (exp, claims)
+            self.entries.move_to_end(digest)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE)
+
+def decode_token(token):
+    """
+    Verified claims for a token, from the cache when this token was verified
+    before and has not expired. Raises the same jose errors as jwt.decode.
+    """
+    digest = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(digest)
+    if claims is None:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+        token_cache.put(digest, claims)
+    return claims
+
+def bearer_token():
+    """The token from an 'Authorization: Bearer <token>' header, or None."""
+    parts = request.headers.get('Authorization', '').split(" ")
+    return parts[1] if len(parts) > 1 and parts[1] else None
+
+def request_claims():
+    """
+    Verified claims of this request's bearer token, or None without a token.
+    Decoded once per request and kept on g: the rate limiter keys on the claims
+    before the auth decorator runs, and both read the same result. A bad token
+    raises its jose error on every call.
+    """
+    token = bearer_token()
+    cached = g.get('_request_claims')
+    if cached is None or cached[0] != token:  # Keyed by token: g outlives a request when a test pushes the app context
+        try:
+            cached = (token, decode_token(token) if token else None, None)
+        except jose.exceptions.JWTError as e:
+            cached = (token, None, e)
+        g._request_claims = cached
+    _, claims, error = cached
+    if error is not None:
+        raise error
+    return claims
 
 def encode_token(customer_id): #using unique pieces of info to make our tokens customer specific
+    now = datetime.now(timezone.utc)
     payload = {
-        'exp': datetime.now(timezone.utc) + timedelta(days=0,hours=1), #Setting the expiration time to an hour past now
-        'iat': datetime.now(timezone.utc), #Issued at
+        'exp': now + TOKEN_LIFETIME, #Setting the expiration time to an hour past now
+        'iat': now.timestamp(), #Issued at, to the microsecond so revocations by time are exact
+        'jti': uuid.uuid4().hex, #Unique id, so this one token can be revoked on logout
         'sub':  str(customer_id), #This needs to be a string or the token will be malformed and won't be able to be decoded.
         'role': 'customer'  # Adding a role for future use
     }
@@ -22,19 +112,17 @@ def encode_token(customer_id): #using unique pieces of info to make our tokens c
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
         # Look for the token in the Authorization header
-        if 'Authorization' in request.headers:
-            token = request.headers['Authorization'].split(" ")[1]
-        
-        if not token:
+        if not bearer_token():
             return jsonify({'message': 'Token is missing!'}), 401
 
         try:
-            # Decode the token
-            data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+            # Decode the token (once per request, verified once per token via token_cache)
+            data = request_claims()
             if data.get('role') != 'customer':
                 return jsonify({'message': 'Invalid token role!'}), 403
+            if is_revoked(data):  # In-memory lookup, see app/utils/revocation.py
+                return jsonify({'message': 'Token has been revoked!'}), 401
             customer_id = data['sub']  # Fetch the customer ID
 
         except jose.exceptions.ExpiredSignatureError:
@@ -42,6 +130,7 @@ def token_required(f):
         except jose.exceptions.JWTError:
             return jsonify({'message': 'Invalid token!'}), 401
 
+        g.token_claims = data  # For routes that act on the token itself (logout)
         kwargs['token_customer_id'] = customer_id  # Pass the customer ID to the route
         return f(*args, **kwargs)
 
@@ -54,9 +143,11 @@ def encode_mechanic_token(mechanic_id):
     Encode a JWT token for a mechanic.
     Payload includes mechanic_id as 'sub' and role as 'mechanic'.
     """
+    now = datetime.now(timezone.utc)
     payload = {
-        'exp': datetime.now(timezone.utc) + timedelta(hours=1),
-        'iat': datetime.now(timezone.utc),
+        'exp': now + TOKEN_LIFETIME,
+        'iat': now.timestamp(),
+        'jti': uuid.uuid4().hex,
         'sub': str(mechanic_id),
         'role': 'mechanic'  # Explicitly mark role
     }
@@ -71,17 +162,16 @@ def mechanic_token_required(f):
     """
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        if 'Authorization' in request.headers:
-            token = request.headers['Authorization'].split(" ")[1]
-        if not token:
+        if not bearer_token():
             return jsonify({'message': 'Token is missing!'}), 401
 
         try:
-            data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+            data = request_claims()
             # Only allow tokens with role "mechanic"
             if data.get('role') != 'mechanic':
                 return jsonify({'message': 'Mechanic authorization required!'}), 403
+            if is_revoked(data):  # In-memory lookup, see app/utils/revocation.py
+                return jsonify({'message': 'Token has been revoked!'}), 401
             mechanic_id = data['sub']
 
         except jose.exceptions.ExpiredSignatureError:
@@ -89,6 +179,7 @@ def mechanic_token_required(f):
         except jose.exceptions.JWTError:
             return jsonify({'message': 'Invalid token!'}), 401
 
+        g.token_claims = data  # For routes that act on the token itself (logout)
         kwargs['token_mechanic_id'] = mechanic_id  # Pass the mechanic ID to the route
         return f(*args, **kwargs)
 
@@ -0,0 +1,37 @@
+# app/utils/vehicles.py
+from sqlalchemy import select, delete, insert, func
+from app.models import db, Ticket, TicketInventory, Vehicle
+
+def refresh_vehicle_summaries(vins):
+    """
+    Rebuild the Vehicle summary rows for the given VINs from their tickets.
+    Two statements regardless of how many VINs: delete the old rows, then
+    re-insert from one GROUP BY over ix_tickets_vin. VINs with no tickets left
+    simply drop out. Caller commits.
+    """
+    vins = {vin for vin in vins if vin}
+    if not vins:
+        return
+    db.session.execute(delete(Vehicle).where(Vehicle.vin.in_(vins)))
+    summary = (
+        select(
+            Ticket.vin,
+            func.count(Ticket.id),
+            func.max(Ticket.ticket_date),
+            func.coalesce(func.sum(Ticket.parts_total), 0),
+        )
+        .where(Ticket.vin.in_(vins))
+        .group_by(Ticket.vin)
+    )
+    db.session.execute(
+        insert(Vehicle).from_select(['vin', 'visit_count', 'last_visit', 'parts_spend'], summary)
+    )
+
+def refresh_vehicles_for_part(inventory_id):
+    """Refresh every VIN whose tickets use a part (after its price changes or before it is deleted)."""
+    query = (
+        select(Ticket.vin).distinct()
+        .join(TicketInventory, TicketInventory.ticket_id == Ticket.id)
+        .where(TicketInventory.inventory_id == inventory_id)
+    )
+    refresh_vehicle_summaries(db.session.execute(query).scalars().all())
@@ -0,0 +1,63 @@
+"""
+Benchmark the per-request cost of JWT verification with and without the token cache.
+
+Run from the project root:
+    python -m benchmarks.bench_auth
+
+First times decode_token() alone against a plain jwt.decode() of the same token,
+then REQUESTS authenticated GET /customers/me/dashboard calls (served from the
+response cache after the first, so token handling dominates) with the cache
+disabled and enabled. Reports microseconds per call and the saving per request.
+"""
+import time
+from jose import jwt
+from app import create_app
+from app.extensions import limiter
+from app.models import db, Customer
+from app.utils.util import SECRET_KEY, encode_token, decode_token, token_cache
+
+DECODES = 20000
+REQUESTS = 2000
+
+def per_call(fn, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return (time.perf_counter() - start) / count * 1e6
+
+def main():
+    app = create_app('TestingConfig')
+    limiter.enabled = False  # Measure authentication, not the rate limiter
+    client = app.test_client()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        customer = Customer(name="Bench", email="bench@example.com", phone="0", password="pw")
+        db.session.add(customer)
+        db.session.commit()
+        token = encode_token(customer.id)
+
+    size = token_cache.maxsize
+    token_cache.clear()
+    uncached = per_call(lambda: jwt.decode(token, SECRET_KEY, algorithms=['HS256']), DECODES)
+    cached = per_call(lambda: decode_token(token), DECODES)
+    print(f"{'decode':>8} {'us/call':>9}")
+    print(f"{'jwt':>8} {uncached:>9.2f}")
+    print(f"{'cached':>8} {cached:>9.2f}")
+
+    headers = {'Authorization': f'Bearer {token}'}
+    request = lambda: client.get('/customers/me/dashboard', headers=headers)
+    request()  # Fill the response cache
+    results = {}
+    for label, maxsize in (('off', 0), ('on', size)):
+        token_cache.maxsize = maxsize
+        token_cache.clear()
+        results[label] = per_call(request, REQUESTS)
+    token_cache.maxsize = size
+    print(f"\n{'cache':>8} {'us/request':>11}")
+    for label, micros in results.items():
+        print(f"{label:>8} {micros:>11.1f}")
+    print(f"saved {results['off'] - results['on']:.1f} us per authenticated request")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark POST /customers/login throughput at different password hash costs.
+
+Run from the project root:
+    python -m benchmarks.bench_login
+
+For each PASSWORD_HASH_METHOD the stored password is re-hashed, then CLIENTS
+threads log in LOGINS_PER_CLIENT times each. Reports logins/second, mean
+latency, and how many requests were shed with 503 by the bounded pool.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash
+from app import create_app
+from app.extensions import limiter
+from app.models import db, Customer
+
+METHODS = ['pbkdf2:sha256:1000', 'pbkdf2:sha256:100000', 'pbkdf2:sha256:600000', 'scrypt:16384:8:1', 'scrypt:32768:8:1']
+CLIENTS = 8
+LOGINS_PER_CLIENT = 10
+
+def main():
+    app = create_app('TestingConfig')
+    limiter.enabled = False  # Measure hashing, not the rate limiter
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        customer = Customer(name="Bench", email="bench@example.com", phone="0", password="pw")
+        db.session.add(customer)
+        db.session.commit()
+
+        def login_burst(_):
+            client = app.test_client()
+            statuses = []
+            for _ in range(LOGINS_PER_CLIENT):
+                statuses.append(client.post('/customers/login', json={"email": "bench@example.com", "password": "pw"}).status_code)
+            return statuses
+
+        print(f"{'method':>22} {'logins/s':>9} {'ms/login':>9} {'shed':>5}")
+        for method in METHODS:
+            app.config['PASSWORD_HASH_METHOD'] = method
+            customer.password = generate_password_hash("pw", method=method)
+            db.session.commit()
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=CLIENTS) as clients:
+                statuses = [status for burst in clients.map(login_burst, range(CLIENTS)) for status in burst]
+            elapsed = time.perf_counter() - start
+            ok = statuses.count(200)
+            print(f"{method:>22} {ok / elapsed:>9.1f} {elapsed / len(statuses) * CLIENTS * 1000:>9.2f} {statuses.count(503):>5}")
+
+if __name__ == '__main__':
+    main()
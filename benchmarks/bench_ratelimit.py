@@ -0,0 +1,118 @@
+"""
+Benchmark the per-request overhead of the rate limiter for each storage backend.
+
+Run from the project root:
+    python -m benchmarks.bench_ratelimit
+
+Backends are memory://, sqlite:// (a temp file) and redis:// against an
+in-process fakeredis server when redis and fakeredis are installed, each with
+the fixed-window and moving-window strategies. Every request comes from a new
+client address so no limit trips and each one pays for a full check of the
+default limits.
+
+Each configuration runs ROUNDS rounds. A round times REQUESTS GET
+/customers/<id> calls with the limiter off, then the same calls with it on,
+on the same app, so drift (warm caches, CPU frequency) hits both sides
+equally. It then times limiter.check() alone inside a request context, which
+isolates the limiter from routing and serialization. Reports the median over
+the rounds, in microseconds per request: off, on, the paired on - off
+overhead, and the direct check.
+"""
+import itertools
+import os
+import statistics
+import tempfile
+import time
+from app import create_app
+from app.extensions import limiter
+from app.models import db, Customer
+from config import TestingConfig
+
+try:
+    import fakeredis
+    import redis
+except ImportError:
+    fakeredis = redis = None
+
+REQUESTS = 500  # Per timed run
+ROUNDS = 7
+STRATEGIES = ['fixed-window', 'moving-window']
+
+addresses = itertools.count()
+
+def next_address():
+    i = next(addresses)
+    return f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}'
+
+def backends(path):
+    yield 'memory', 'memory://', {}
+    yield 'sqlite', f"sqlite:///{path}", {}
+    if fakeredis is not None:
+        pool = redis.ConnectionPool(connection_class=fakeredis.FakeRedisConnection, server=fakeredis.FakeServer())
+        yield 'redis', 'redis://localhost:6379/0', {'connection_pool': pool}
+
+def seed(app):
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        customer = Customer(name="Bench", email="bench@example.com", phone="0", password="pw")
+        db.session.add(customer)
+        db.session.commit()
+        return f'/customers/{customer.id}'
+
+def time_requests(client, path, count):
+    """Microseconds per full request through the test client."""
+    start = time.perf_counter()
+    for _ in range(count):
+        client.get(path, environ_base={'REMOTE_ADDR': next_address()})
+    return (time.perf_counter() - start) / count * 1e6
+
+def time_checks(app, path, count):
+    """Microseconds per limiter.check(), timing only the check inside each request context."""
+    total = 0.0
+    for _ in range(count):
+        with app.test_request_context(path, environ_base={'REMOTE_ADDR': next_address()}):
+            start = time.perf_counter()
+            limiter.check()
+            total += time.perf_counter() - start
+    return total / count * 1e6
+
+def measure(app):
+    """Median (off, on, on - off, check) over ROUNDS alternating rounds."""
+    path = seed(app)
+    client = app.test_client()
+    client.get(path)  # Warm up connections and caches
+    off, on, overhead, check = [], [], [], []
+    try:
+        for _ in range(ROUNDS):
+            limiter.enabled = False
+            off.append(time_requests(client, path, REQUESTS))
+            limiter.enabled = True
+            on.append(time_requests(client, path, REQUESTS))
+            overhead.append(on[-1] - off[-1])
+            check.append(time_checks(app, path, REQUESTS))
+    finally:
+        limiter.enabled = True
+    return tuple(statistics.median(samples) for samples in (off, on, overhead, check))
+
+def main():
+    handle, path = tempfile.mkstemp(suffix='.db')
+    os.close(handle)
+    try:
+        print(f"{'storage':>8} {'strategy':>14} {'off us':>8} {'on us':>8} {'overhead':>9} {'check us':>9}")
+        for name, uri, options in backends(path):
+            for strategy in STRATEGIES:
+                config = type('BenchConfig', (TestingConfig,), {
+                    'RATELIMIT_STORAGE_URI': uri,
+                    'RATELIMIT_STORAGE_OPTIONS': options,
+                    'RATELIMIT_STRATEGY': strategy,
+                })
+                off, on, overhead, check = measure(create_app(config))
+                print(f"{name:>8} {strategy:>14} {off:>8.1f} {on:>8.1f} {overhead:>9.1f} {check:>9.1f}")
+    finally:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+if __name__ == '__main__':
+    main()
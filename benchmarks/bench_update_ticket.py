@@ -0,0 +1,56 @@
+"""
+Benchmark PUT /tickets/<id> as the add/remove mechanic lists grow.
+
+Run from the project root:
+    python -m benchmarks.bench_update_ticket
+
+Each size assigns and then removes N mechanics on one ticket and reports the
+mean latency and SQL statement count per request. Both should stay flat.
+"""
+import time
+from datetime import date
+from sqlalchemy import event
+from app import create_app
+from app.extensions import limiter
+from app.models import db, Customer, Mechanic, Ticket
+
+SIZES = [10, 100, 1000, 5000]
+ROUNDS = 5
+
+def main():
+    app = create_app('TestingConfig')
+    limiter.enabled = False  # Measure the route, not the rate limiter
+    client = app.test_client()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        customer = Customer(name="Bench", email="bench@example.com", phone="0", password="pw")
+        db.session.add(customer)
+        db.session.flush()
+        ticket = Ticket(customer_id=customer.id, ticket_date=date.today(), vin="BENCH")
+        db.session.add(ticket)
+        db.session.add_all(
+            Mechanic(name=f"Mechanic {i}", email=f"m{i}@example.com", phone="0", salary=1, password="pw")
+            for i in range(max(SIZES))
+        )
+        db.session.commit()
+        ticket_id = ticket.id
+        mechanic_ids = list(db.session.execute(db.select(Mechanic.id)).scalars())
+
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(1))
+
+        print(f"{'ids':>6} {'ms/request':>11} {'queries/request':>16}")
+        for size in SIZES:
+            ids = mechanic_ids[:size]
+            statements.clear()
+            start = time.perf_counter()
+            for _ in range(ROUNDS):
+                client.put(f'/tickets/{ticket_id}', json={"add_mechanic_ids": ids, "remove_mechanic_ids": []})
+                client.put(f'/tickets/{ticket_id}', json={"add_mechanic_ids": [], "remove_mechanic_ids": ids})
+            elapsed = time.perf_counter() - start
+            requests = ROUNDS * 2
+            print(f"{size:>6} {elapsed / requests * 1000:>11.2f} {len(statements) / requests:>16.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 from dotenv import load_dotenv
 import os
+import tempfile
 
 # Load environment variables from .env file
 load_dotenv()
@@ -10,18 +11,47 @@ DB_PASSWORD = os.getenv('DB_PASSWORD')
 DB_HOST = os.getenv('DB_HOST')
 DB_NAME = os.getenv('DB_NAME')
 
+# Rate-limit counters shared by every worker: a SQLite file on this host by default,
+# or redis://host:6379/0 to share them across hosts (see app/utils/ratelimit.py)
+RATELIMIT_STORAGE_URI = os.getenv(
+    'RATELIMIT_STORAGE_URI',
+    f"sqlite:///{os.path.join(tempfile.gettempdir(), 'mechanic-shop-ratelimits.db')}"
+)
+
+# Default rate limits by the token's role; requests without a valid token are 'anonymous'
+# and counted per IP. Reads are GET/HEAD/OPTIONS, writes everything else. Each limit is
+# counted per route and method; routes with their own @limiter.limit keep that instead.
+RATELIMIT_TIERS = {
+    'anonymous': {'read': '100/hour;500/day', 'write': '20/hour;100/day'},
+    'customer': {'read': '300/hour;3000/day', 'write': '60/hour;300/day'},
+    'mechanic': {'read': '1200/hour;10000/day', 'write': '600/hour;5000/day'},
+}
+
 class DevelopmentConfig:
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+    RATELIMIT_STORAGE_URI = RATELIMIT_STORAGE_URI
+    RATELIMIT_STRATEGY = 'moving-window'
+    RATELIMIT_TIERS = RATELIMIT_TIERS
     
 class TestingConfig:
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:' # Use in-memory SQLite database for testing
     DEBUG = True
     CACHE_TYPE = 'SimpleCache'  # Use simple cache for testing
     SQLALCHEMY_TRACK_MODIFICATIONS = False    
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'  # Cheap hashes keep the suite fast
+    RATELIMIT_STORAGE_URI = 'memory://'  # Each test app starts with fresh counters
+    RATELIMIT_STRATEGY = 'moving-window'
+    RATELIMIT_TIERS = RATELIMIT_TIERS
 
 # MARK: 
 # NOTE: Connection String is stored in the environment variable SQLALCHEMY_DATABASE_URI
 class ProductionConfig:
     SQLALCHEMY_DATABASE_URI = os.environ.get('SQLALCHEMY_DATABASE_URI')
-    CACHE_TYPE = "SimpleCache"
\ No newline at end of file
+    # Password KDF cost, fully specified (e.g. 'scrypt:32768:8:1'); see app/utils/passwords.py
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    CACHE_TYPE = "SimpleCache"
+    RATELIMIT_STORAGE_URI = RATELIMIT_STORAGE_URI
+    RATELIMIT_STRATEGY = 'moving-window'  # No burst of 2x the limit across a window boundary
+    RATELIMIT_SWALLOW_ERRORS = True  # A storage outage lets requests through instead of failing them
+    RATELIMIT_TIERS = RATELIMIT_TIERS
\ No newline at end of file
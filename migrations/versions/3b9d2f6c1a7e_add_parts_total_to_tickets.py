@@ -0,0 +1,34 @@
+"""Add parts_total to tickets
+
+Revision ID: 3b9d2f6c1a7e
+Revises: 58587ff1a4ea
+Create Date: 2026-10-18 09:12:41.208315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9d2f6c1a7e'
+down_revision = '58587ff1a4ea'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('parts_total', sa.Float(), server_default='0', nullable=False))
+
+    # Backfill from existing ticket_inventory rows
+    op.execute(
+        "UPDATE tickets SET parts_total = ("
+        " SELECT COALESCE(SUM(inventory.price * ticket_inventory.quantity), 0)"
+        " FROM ticket_inventory JOIN inventory ON inventory.id = ticket_inventory.inventory_id"
+        " WHERE ticket_inventory.ticket_id = tickets.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.drop_column('parts_total')
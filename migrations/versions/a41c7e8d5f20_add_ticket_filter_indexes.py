@@ -0,0 +1,34 @@
+"""Add indexes for ticket filtering
+
+Revision ID: a41c7e8d5f20
+Revises: 3b9d2f6c1a7e
+Create Date: 2026-10-18 10:03:17.554902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a41c7e8d5f20'
+down_revision = '3b9d2f6c1a7e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.create_index('ix_tickets_vin', ['vin'], unique=False)
+        batch_op.create_index('ix_tickets_customer_id_ticket_date', ['customer_id', 'ticket_date'], unique=False)
+
+    with op.batch_alter_table('ticket_mechanic', schema=None) as batch_op:
+        batch_op.create_index('ix_ticket_mechanic_mechanic_id', ['mechanic_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('ticket_mechanic', schema=None) as batch_op:
+        batch_op.drop_index('ix_ticket_mechanic_mechanic_id')
+
+    with op.batch_alter_table('tickets', schema=None) as batch_op:
+        batch_op.drop_index('ix_tickets_customer_id_ticket_date')
+        batch_op.drop_index('ix_tickets_vin')
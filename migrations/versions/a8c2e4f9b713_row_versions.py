@@ -0,0 +1,60 @@
+"""Add version and updated_at to customers, mechanics, tickets and inventory
+
+Revision ID: a8c2e4f9b713
+Revises: f3b7d1e6a829
+Create Date: 2026-10-18 13:26:48.150772
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8c2e4f9b713'
+down_revision = 'f3b7d1e6a829'
+branch_labels = None
+depends_on = None
+
+TABLES = ('customers', 'mechanics', 'tickets', 'inventory')
+
+# On SQLite, batch mode rebuilds mechanics as a new table, which drops the
+# name-search triggers from e5a91c3f7b62; these restore them (DDL as of that revision)
+FTS5_TRIGGER_DDL = [
+    "CREATE TRIGGER IF NOT EXISTS mechanics_fts_ai AFTER INSERT ON mechanics BEGIN "
+    "INSERT INTO mechanics_fts(rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS mechanics_fts_ad AFTER DELETE ON mechanics BEGIN "
+    "INSERT INTO mechanics_fts(mechanics_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS mechanics_fts_au AFTER UPDATE OF name ON mechanics BEGIN "
+    "INSERT INTO mechanics_fts(mechanics_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO mechanics_fts(rowid, name) VALUES (new.id, new.name); END",
+]
+
+
+def restore_search_triggers():
+    connection = op.get_bind()
+    if connection.dialect.name != 'sqlite':
+        return
+    has_index = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'mechanics_fts'"
+    ).first()
+    if has_index:
+        for statement in FTS5_TRIGGER_DDL:
+            op.execute(statement)
+        # Reindex from the rebuilt table
+        op.execute("INSERT INTO mechanics_fts(mechanics_fts) VALUES ('rebuild')")
+
+
+def upgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.func.current_timestamp(), nullable=False))
+    restore_search_triggers()
+
+
+def downgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('updated_at')
+            batch_op.drop_column('version')
+    restore_search_triggers()
@@ -0,0 +1,29 @@
+"""Add stock_on_hand to inventory
+
+Revision ID: b4d9f2a6c381
+Revises: a8c2e4f9b713
+Create Date: 2026-10-18 14:02:11.584930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4d9f2a6c381'
+down_revision = 'a8c2e4f9b713'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing parts stay untracked (NULL) until stock is recorded for them
+    with op.batch_alter_table('inventory', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('stock_on_hand', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_inventory_stock_on_hand', ['stock_on_hand'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('inventory', schema=None) as batch_op:
+        batch_op.drop_index('ix_inventory_stock_on_hand')
+        batch_op.drop_column('stock_on_hand')
@@ -0,0 +1,37 @@
+"""Add vehicles summary table
+
+Revision ID: c7f05e91b3d4
+Revises: a41c7e8d5f20
+Create Date: 2026-10-18 10:47:52.730164
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7f05e91b3d4'
+down_revision = 'a41c7e8d5f20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('vehicles',
+    sa.Column('vin', sa.String(length=255), nullable=False),
+    sa.Column('visit_count', sa.Integer(), nullable=False),
+    sa.Column('last_visit', sa.Date(), nullable=True),
+    sa.Column('parts_spend', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('vin')
+    )
+
+    # Backfill one summary row per VIN already on a ticket
+    op.execute(
+        "INSERT INTO vehicles (vin, visit_count, last_visit, parts_spend)"
+        " SELECT vin, COUNT(id), MAX(ticket_date), COALESCE(SUM(parts_total), 0)"
+        " FROM tickets GROUP BY vin"
+    )
+
+
+def downgrade():
+    op.drop_table('vehicles')
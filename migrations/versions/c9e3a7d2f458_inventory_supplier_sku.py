@@ -0,0 +1,29 @@
+"""Add supplier_sku to inventory
+
+Revision ID: c9e3a7d2f458
+Revises: b4d9f2a6c381
+Create Date: 2026-10-18 15:21:47.203118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9e3a7d2f458'
+down_revision = 'b4d9f2a6c381'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nullable: parts created through the API need not come from a supplier list
+    with op.batch_alter_table('inventory', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('supplier_sku', sa.String(length=64), nullable=True))
+        batch_op.create_index('ix_inventory_supplier_sku', ['supplier_sku'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('inventory', schema=None) as batch_op:
+        batch_op.drop_index('ix_inventory_supplier_sku')
+        batch_op.drop_column('supplier_sku')
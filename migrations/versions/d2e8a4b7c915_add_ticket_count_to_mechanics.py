@@ -0,0 +1,34 @@
+"""Add ticket_count to mechanics
+
+Revision ID: d2e8a4b7c915
+Revises: c7f05e91b3d4
+Create Date: 2026-10-18 11:21:09.614582
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2e8a4b7c915'
+down_revision = 'c7f05e91b3d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('mechanics', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('ticket_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index('ix_mechanics_ticket_count', ['ticket_count'], unique=False)
+
+    # Backfill from existing assignments
+    op.execute(
+        "UPDATE mechanics SET ticket_count = ("
+        " SELECT COUNT(*) FROM ticket_mechanic WHERE ticket_mechanic.mechanic_id = mechanics.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('mechanics', schema=None) as batch_op:
+        batch_op.drop_index('ix_mechanics_ticket_count')
+        batch_op.drop_column('ticket_count')
@@ -0,0 +1,69 @@
+"""Add monthly parts usage rollup tables
+
+Revision ID: d7a4c1e9b286
+Revises: c9e3a7d2f458
+Create Date: 2026-10-18 16:08:33.417652
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a4c1e9b286'
+down_revision = 'c9e3a7d2f458'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('part_monthly_usage',
+    sa.Column('inventory_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['inventory_id'], ['inventory.id'], ),
+    sa.PrimaryKeyConstraint('inventory_id', 'month')
+    )
+    op.create_index('ix_part_monthly_usage_month', 'part_monthly_usage', ['month'], unique=False)
+    op.create_table('part_mechanic_monthly_usage',
+    sa.Column('inventory_id', sa.Integer(), nullable=False),
+    sa.Column('mechanic_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['inventory_id'], ['inventory.id'], ),
+    sa.ForeignKeyConstraint(['mechanic_id'], ['mechanics.id'], ),
+    sa.PrimaryKeyConstraint('inventory_id', 'mechanic_id', 'month')
+    )
+    op.create_index('ix_part_mechanic_monthly_usage_mechanic_month', 'part_mechanic_monthly_usage', ['mechanic_id', 'month'], unique=False)
+
+    # Backfill from ticket_inventory. Built with Core so EXTRACT compiles for each backend.
+    tickets = sa.table('tickets', sa.column('id'), sa.column('ticket_date'))
+    lines = sa.table('ticket_inventory', sa.column('ticket_id'), sa.column('inventory_id'), sa.column('quantity'))
+    inventory = sa.table('inventory', sa.column('id'), sa.column('price'))
+    ticket_mechanic = sa.table('ticket_mechanic', sa.column('ticket_id'), sa.column('mechanic_id'))
+    month = sa.extract('year', tickets.c.ticket_date) * 100 + sa.extract('month', tickets.c.ticket_date)
+    usage = [sa.func.sum(lines.c.quantity), sa.func.coalesce(sa.func.sum(lines.c.quantity * inventory.c.price), 0)]
+    joined = lines.join(tickets, tickets.c.id == lines.c.ticket_id).join(inventory, inventory.c.id == lines.c.inventory_id)
+    op.execute(
+        sa.table('part_monthly_usage', sa.column('inventory_id'), sa.column('month'), sa.column('quantity'), sa.column('revenue'))
+        .insert().from_select(['inventory_id', 'month', 'quantity', 'revenue'],
+                              sa.select(lines.c.inventory_id, month, *usage).select_from(joined)
+                              .group_by(lines.c.inventory_id, month))
+    )
+    op.execute(
+        sa.table('part_mechanic_monthly_usage', sa.column('inventory_id'), sa.column('mechanic_id'), sa.column('month'),
+                 sa.column('quantity'), sa.column('revenue'))
+        .insert().from_select(['inventory_id', 'mechanic_id', 'month', 'quantity', 'revenue'],
+                              sa.select(lines.c.inventory_id, ticket_mechanic.c.mechanic_id, month, *usage)
+                              .select_from(joined.join(ticket_mechanic, ticket_mechanic.c.ticket_id == tickets.c.id))
+                              .group_by(lines.c.inventory_id, ticket_mechanic.c.mechanic_id, month))
+    )
+
+
+def downgrade():
+    op.drop_index('ix_part_mechanic_monthly_usage_mechanic_month', table_name='part_mechanic_monthly_usage')
+    op.drop_table('part_mechanic_monthly_usage')
+    op.drop_index('ix_part_monthly_usage_month', table_name='part_monthly_usage')
+    op.drop_table('part_monthly_usage')
@@ -0,0 +1,57 @@
+"""Add full-text search index on mechanic names
+
+Revision ID: e5a91c3f7b62
+Revises: d2e8a4b7c915
+Create Date: 2026-10-18 12:04:37.218406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a91c3f7b62'
+down_revision = 'd2e8a4b7c915'
+branch_labels = None
+depends_on = None
+
+# DDL as of this revision (kept here so later changes to app code cannot alter it)
+FTS5_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS mechanics_fts USING fts5("
+    "name, content='mechanics', content_rowid='id', prefix='2 3')",
+    "CREATE TRIGGER IF NOT EXISTS mechanics_fts_ai AFTER INSERT ON mechanics BEGIN "
+    "INSERT INTO mechanics_fts(rowid, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER IF NOT EXISTS mechanics_fts_ad AFTER DELETE ON mechanics BEGIN "
+    "INSERT INTO mechanics_fts(mechanics_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+    "CREATE TRIGGER IF NOT EXISTS mechanics_fts_au AFTER UPDATE OF name ON mechanics BEGIN "
+    "INSERT INTO mechanics_fts(mechanics_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO mechanics_fts(rowid, name) VALUES (new.id, new.name); END",
+]
+MYSQL_FULLTEXT_DDL = "ALTER TABLE mechanics ADD FULLTEXT INDEX ix_mechanics_name_fulltext (name)"
+
+
+def sqlite_has_fts5(connection):
+    options = connection.exec_driver_sql("PRAGMA compile_options").scalars().all()
+    return 'ENABLE_FTS5' in options
+
+
+def upgrade():
+    connection = op.get_bind()
+    if connection.dialect.name == 'sqlite' and sqlite_has_fts5(connection):
+        for statement in FTS5_DDL:
+            op.execute(statement)
+        # Index the mechanics that already exist
+        op.execute("INSERT INTO mechanics_fts(mechanics_fts) VALUES ('rebuild')")
+    elif connection.dialect.name == 'mysql':
+        op.execute(MYSQL_FULLTEXT_DDL)
+    # Other backends use the in-process trigram index; nothing to create
+
+
+def downgrade():
+    connection = op.get_bind()
+    if connection.dialect.name == 'sqlite':
+        for trigger in ('mechanics_fts_ai', 'mechanics_fts_ad', 'mechanics_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS mechanics_fts")
+    elif connection.dialect.name == 'mysql':
+        op.drop_index('ix_mechanics_name_fulltext', table_name='mechanics')
@@ -0,0 +1,41 @@
+"""Add mechanic_daily_stats rollup table
+
+Revision ID: f3b7d1e6a829
+Revises: e5a91c3f7b62
+Create Date: 2026-10-18 12:41:15.902337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b7d1e6a829'
+down_revision = 'e5a91c3f7b62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('mechanic_daily_stats',
+    sa.Column('mechanic_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('tickets', sa.Integer(), nullable=False),
+    sa.Column('vehicles', sa.Integer(), nullable=False),
+    sa.Column('parts_revenue', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['mechanic_id'], ['mechanics.id'], ),
+    sa.PrimaryKeyConstraint('mechanic_id', 'day')
+    )
+
+    # Backfill one row per mechanic per ticket day
+    op.execute(
+        "INSERT INTO mechanic_daily_stats (mechanic_id, day, tickets, vehicles, parts_revenue)"
+        " SELECT ticket_mechanic.mechanic_id, tickets.ticket_date, COUNT(tickets.id),"
+        " COUNT(DISTINCT tickets.vin), COALESCE(SUM(tickets.parts_total), 0)"
+        " FROM ticket_mechanic JOIN tickets ON tickets.id = ticket_mechanic.ticket_id"
+        " GROUP BY ticket_mechanic.mechanic_id, tickets.ticket_date"
+    )
+
+
+def downgrade():
+    op.drop_table('mechanic_daily_stats')
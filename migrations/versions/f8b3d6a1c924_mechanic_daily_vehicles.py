@@ -0,0 +1,37 @@
+"""Add mechanic_daily_vehicles rollup table
+
+Revision ID: f8b3d6a1c924
+Revises: e2f6b8a3c517
+Create Date: 2026-10-18 19:04:22.318550
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f8b3d6a1c924'
+down_revision = 'e2f6b8a3c517'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('mechanic_daily_vehicles',
+    sa.Column('mechanic_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('vin', sa.String(length=255), nullable=False),
+    sa.ForeignKeyConstraint(['mechanic_id'], ['mechanics.id'], ),
+    sa.PrimaryKeyConstraint('mechanic_id', 'day', 'vin')
+    )
+
+    # Backfill one row per mechanic per ticket day per vehicle
+    op.execute(
+        "INSERT INTO mechanic_daily_vehicles (mechanic_id, day, vin)"
+        " SELECT DISTINCT ticket_mechanic.mechanic_id, tickets.ticket_date, tickets.vin"
+        " FROM ticket_mechanic JOIN tickets ON tickets.id = ticket_mechanic.ticket_id"
+    )
+
+
+def downgrade():
+    op.drop_table('mechanic_daily_vehicles')
@@ -0,0 +1,17 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from app.models import db
+
+@contextmanager
+def capture_queries(app):
+    """Collect every SQL statement the app's engine executes inside the block."""
+    statements = []
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
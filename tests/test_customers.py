@@ -1,5 +1,10 @@
 from app import create_app
-from app.models import db, Customer
+from app.models import db, Customer, Mechanic, Ticket, Inventory, RevokedToken
+from app.utils.util import SECRET_KEY, TokenCache, token_cache, encode_token
+from tests.helpers import capture_queries
+from jose import jwt
+from datetime import date
+import time
 import unittest
 
 class TestCustomer(unittest.TestCase):
@@ -67,6 +72,188 @@ class TestCustomer(unittest.TestCase):
         # Your route correctly returns 401 for invalid login, so expect 401 here
         self.assertEqual(response.status_code, 401)
 
+    def stored_password(self, email):
+        with self.app.app_context():
+            return db.session.execute(db.select(Customer.password).where(Customer.email == email)).scalar_one()
+
+    def test_login_rehashes_legacy_password(self):
+        self.assertEqual(self.stored_password("john@example.com"), "secret")
+        self.get_auth_token()
+        stored = self.stored_password("john@example.com")
+        self.assertTrue(stored.startswith("pbkdf2:sha256:1000$"))
+        self.get_auth_token()  # Still logs in against the new hash
+        # Raising the cost upgrades the hash on the next successful login
+        self.app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+        self.get_auth_token()
+        self.assertTrue(self.stored_password("john@example.com").startswith("pbkdf2:sha256:2000$"))
+
+    def test_created_customer_password_is_hashed(self):
+        payload = {"name": "Hashed", "email": "hashed@example.com", "phone": "1", "password": "s3cret"}
+        response = self.client.post('/customers/', json=payload)
+        self.assertNotIn('password', response.json)
+        self.assertNotEqual(self.stored_password("hashed@example.com"), "s3cret")
+        response = self.client.post('/customers/login', json={"email": "hashed@example.com", "password": "s3cret"})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post('/customers/login', json={"email": "hashed@example.com", "password": "wrong"})
+        self.assertEqual(response.status_code, 401)
+
+    def test_login_sheds_load_when_pool_is_full(self):
+        self.get_auth_token()  # Hash the legacy password first
+        self.app.config['PASSWORD_POOL_MAX_PENDING'] = 0
+        self.app.extensions.pop('password_pool')  # Rebuilt with the new limit
+        response = self.client.post('/customers/login', json={"email": "john@example.com", "password": "secret"})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+
+    def seed_dashboard(self, ticket_count):
+        with self.app.app_context():
+            mechanic = Mechanic(name="Dash Mechanic", email="dash@example.com", phone="1", salary=1, password="pw")
+            part = Inventory(name="Wiper", price=5.0)
+            tickets = [Ticket(customer_id=self.customer_id, ticket_date=date(2026, 1, 1 + i % 28), vin=f"DASH{i}")
+                       for i in range(ticket_count)]
+            db.session.add_all([mechanic, part] + tickets)
+            db.session.commit()
+            return mechanic.id, part.id, [t.id for t in tickets]
+
+    def dashboard(self, headers):
+        return self.client.get('/customers/me/dashboard', headers=headers)
+
+    def test_dashboard(self):
+        mechanic_id, part_id, ticket_ids = self.seed_dashboard(2)
+        self.client.put(f'/tickets/{ticket_ids[0]}/assign-mechanic/{mechanic_id}')
+        self.client.post(f'/tickets/{ticket_ids[0]}/parts', json=[{"inventory_id": part_id, "quantity": 2}])
+        headers = {'Authorization': f'Bearer {self.get_auth_token()}'}
+        response = self.dashboard(headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['customer']['id'], self.customer_id)
+        self.assertNotIn('password', response.json['customer'])
+        ticket = next(t for t in response.json['tickets'] if t['id'] == ticket_ids[0])
+        self.assertEqual([m['id'] for m in ticket['mechanics']], [mechanic_id])
+        self.assertEqual(ticket['parts'], [{"inventory_id": part_id, "quantity": 2}])
+        self.assertEqual(ticket['parts_total'], 10.0)
+        self.assertEqual([p['name'] for p in response.json['parts']], ["Wiper"])
+        self.assertFalse(response.json['has_more_tickets'])
+
+    def test_dashboard_cache_invalidated_by_writes(self):
+        mechanic_id, _, ticket_ids = self.seed_dashboard(1)
+        headers = {'Authorization': f'Bearer {self.get_auth_token()}'}
+        self.assertEqual(self.dashboard(headers).json['tickets'][0]['mechanics'], [])
+        self.client.put(f'/tickets/{ticket_ids[0]}/assign-mechanic/{mechanic_id}')
+        self.assertEqual(len(self.dashboard(headers).json['tickets'][0]['mechanics']), 1)
+        self.client.patch(f'/customers/{self.customer_id}', json={"name": "Renamed"}, headers=headers)
+        self.assertEqual(self.dashboard(headers).json['customer']['name'], "Renamed")
+
+    def test_dashboard_follows_inventory_writes(self):
+        _, part_id, ticket_ids = self.seed_dashboard(1)
+        with self.app.app_context():
+            db.session.get(Inventory, part_id).stock_on_hand = 8
+            db.session.commit()
+        self.client.post(f'/tickets/{ticket_ids[0]}/parts', json=[{"inventory_id": part_id}])
+        headers = {'Authorization': f'Bearer {self.get_auth_token()}'}
+        self.assertEqual(self.dashboard(headers).json['parts'][0]['stock_on_hand'], 7)
+        # Rename and restock without a price change
+        response = self.client.put(f'/inventory/{part_id}', json={"name": "Blade", "price": 5.0, "stock_on_hand": 1})
+        self.assertEqual(response.status_code, 200)
+        part = self.dashboard(headers).json['parts'][0]
+        self.assertEqual((part['name'], part['stock_on_hand']), ("Blade", 1))
+        # A reservation on the customer's ticket moves stock too
+        self.client.post(f'/tickets/{ticket_ids[0]}/parts', json=[{"inventory_id": part_id}])
+        self.assertEqual(self.dashboard(headers).json['parts'][0]['stock_on_hand'], 0)
+
+    def test_dashboard_query_count_is_bounded(self):
+        headers = {'Authorization': f'Bearer {self.get_auth_token()}'}
+        def count_queries(query_string):
+            with self.app.app_context(), capture_queries(self.app) as statements:
+                self.client.get(f'/customers/me/dashboard?{query_string}', headers=headers)  # Distinct URL skips the cache
+            return len(statements)
+        mechanic_id, part_id, ticket_ids = self.seed_dashboard(3)
+        for ticket_id in ticket_ids:
+            self.client.put(f'/tickets/{ticket_id}/assign-mechanic/{mechanic_id}')
+            self.client.post(f'/tickets/{ticket_id}/parts', json=[{"inventory_id": part_id}])
+        count_queries('run=0')  # First authenticated request loads the token revocation mirror
+        self.assertLessEqual(count_queries('run=1'), 5)
+        with self.app.app_context():
+            db.session.add_all(Ticket(customer_id=self.customer_id, ticket_date=date(2026, 2, 1), vin=f"MORE{i}") for i in range(60))
+            db.session.commit()
+        self.assertLessEqual(count_queries('run=2'), 5)
+        response = self.dashboard(headers)
+        self.assertTrue(response.json['has_more_tickets'])
+        self.assertEqual(len(response.json['tickets']), 50)
+
+    def test_dashboard_requires_token(self):
+        self.assertEqual(self.client.get('/customers/me/dashboard').status_code, 401)
+
+    def test_token_verified_once_then_cached(self):
+        token_cache.clear()
+        headers = {'Authorization': f'Bearer {self.get_auth_token()}'}
+        hits, misses = token_cache.hits, token_cache.misses
+        for _ in range(3):
+            self.assertEqual(self.client.get('/customers/me/dashboard', headers=headers).status_code, 200)
+        self.assertEqual((token_cache.hits - hits, token_cache.misses - misses), (2, 1))
+
+        forged = encode_token(self.customer_id)[:-2] + 'xx'  # Bad signature: never cached, rejected every time
+        for _ in range(2):
+            response = self.client.get('/customers/me/dashboard', headers={'Authorization': f'Bearer {forged}'})
+            self.assertEqual(response.status_code, 401)
+
+    def test_token_cache_is_bounded_and_expires(self):
+        now = [1000.0]
+        cache = TokenCache(2, clock=lambda: now[0])
+        for name, exp in (('a', 2000), ('b', 1500), ('c', 2000)):
+            cache.put(name, {'sub': name, 'exp': exp})
+        self.assertIsNone(cache.get('a'))  # Least recently used, evicted by 'c'
+        self.assertEqual(cache.get('b')['sub'], 'b')
+        now[0] = 1500.0  # b's exp
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(list(cache.entries), ['c'])
+        cache.put('no-exp', {'sub': 'x'})
+        self.assertNotIn('no-exp', cache.entries)
+
+    def test_logout_revokes_token(self):
+        headers = {'Authorization': f'Bearer {self.get_auth_token()}'}
+        response = self.client.post('/customers/logout', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get('/customers/me/dashboard', headers=headers)
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('revoked', response.json['message'])
+        # Logging in again issues a fresh jti that is still valid
+        fresh = {'Authorization': f'Bearer {self.get_auth_token()}'}
+        self.assertEqual(self.client.get('/customers/me/dashboard', headers=fresh).status_code, 200)
+
+    def test_password_change_revokes_older_tokens(self):
+        headers = {'Authorization': f'Bearer {self.get_auth_token()}'}
+        response = self.client.patch(f'/customers/{self.customer_id}', json={"password": "changed"}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/customers/me/dashboard', headers=headers).status_code, 401)
+        response = self.client.post('/customers/login', json={"email": "john@example.com", "password": "changed"})
+        fresh = {'Authorization': f'Bearer {response.json["auth_token"]}'}
+        self.assertEqual(self.client.get('/customers/me/dashboard', headers=fresh).status_code, 200)
+
+    def test_revocations_from_other_workers_are_picked_up(self):
+        self.app.config['TOKEN_REVOCATION_REFRESH'] = 0  # Refresh on every check
+        headers = {'Authorization': f'Bearer {self.get_auth_token()}'}
+        self.assertEqual(self.client.get('/customers/me/dashboard', headers=headers).status_code, 200)
+        with self.app.app_context():
+            # Written straight to the table, as another process would: this worker's mirror only sees it on refresh
+            now = time.time()
+            db.session.add(RevokedToken(subject=f'customer:{self.customer_id}', revoked_at=now, expires_at=now + 3600))
+            db.session.commit()
+        self.assertEqual(self.client.get('/customers/me/dashboard', headers=headers).status_code, 401)
+
+    def test_logout_requires_jti(self):
+        legacy = jwt.encode({'exp': time.time() + 60, 'sub': str(self.customer_id), 'role': 'customer'}, SECRET_KEY, algorithm='HS256')
+        response = self.client.post('/customers/logout', headers={'Authorization': f'Bearer {legacy}'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_customer_conditional(self):
+        response = self.client.get(f'/customers/{self.customer_id}')
+        etag = response.headers['ETag']
+        self.assertEqual(self.client.get(f'/customers/{self.customer_id}', headers={'If-None-Match': etag}).status_code, 304)
+        token = self.get_auth_token()  # Login rehashes the legacy password, which is a write
+        response = self.client.get(f'/customers/{self.customer_id}', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/customers/999', headers={'If-None-Match': etag}).status_code, 404)
+
     def test_get_all_customers(self):
         response = self.client.get('/customers/')
         self.assertEqual(response.status_code, 200)
@@ -76,6 +263,29 @@ class TestCustomer(unittest.TestCase):
         response = self.client.get('/customers/?page=1&per_page=1')
         self.assertEqual(response.status_code, 200)
 
+    def test_get_customers_cursor_pages(self):
+        with self.app.app_context():
+            for i in range(4):
+                db.session.add(Customer(name=f"Page User {i}", email=f"page{i}@example.com", phone="555-0000", password="pw"))
+            db.session.commit()
+        seen = []
+        url = '/customers/?per_page=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.json), 2)
+            seen.extend(c['id'] for c in response.json)
+            cursor = response.headers.get('X-Next-Cursor')
+            url = f'/customers/?per_page=2&cursor={cursor}' if cursor else None
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(seen, sorted(seen))
+
+    def test_get_customers_bad_pagination(self):
+        response = self.client.get('/customers/?per_page=abc')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/customers/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
     def test_get_specific_customer(self):
         # Use self.customer_id for robustness
         response = self.client.get(f'/customers/{self.customer_id}')
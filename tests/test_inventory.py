@@ -1,6 +1,16 @@
 from app import create_app
-from app.models import db, Inventory
+from app.models import db, Inventory, Customer, Ticket, TicketInventory, Mechanic, PartMonthlyUsage, PartMechanicMonthlyUsage
+from sqlalchemy import text, select
+from app.utils.stock import low_stock_query
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from app.utils.part_usage import rebuild_part_usage
+from app.utils.catalog import get_catalog
+from app.blueprints.inventory.schemas import inventory_schema
+from tests.helpers import capture_queries
 import unittest
+import os
+import tempfile
+from datetime import date
 
 class TestInventory(unittest.TestCase):
     def setUp(self):
@@ -57,6 +67,269 @@ class TestInventory(unittest.TestCase):
         response = self.client.delete(f'/inventory/{self.part_id}')
         self.assertEqual(response.status_code, 200)
 
+    def test_get_inventory_part_conditional(self):
+        response = self.client.get(f'/inventory/{self.part_id}')
+        etag, last_modified = response.headers['ETag'], response.headers['Last-Modified']
+        response = self.client.get(f'/inventory/{self.part_id}', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        response = self.client.get(f'/inventory/{self.part_id}', headers={'If-Modified-Since': last_modified})
+        self.assertEqual(response.status_code, 304)
+
+        self.client.patch(f'/inventory/{self.part_id}', json={"price": 21.0})
+        response = self.client.get(f'/inventory/{self.part_id}', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(response.json['version'], 2)
+
+    def test_get_inventory_list_conditional(self):
+        etag = self.client.get('/inventory/').headers['ETag']
+        self.assertEqual(self.client.get('/inventory/', headers={'If-None-Match': etag}).status_code, 304)
+        self.client.post('/inventory/', json={"name": "Brake Pads", "price": 49.99})
+        response = self.client.get('/inventory/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 2)
+
+    def test_catalog_filter_and_pagination(self):
+        with self.app.app_context():
+            db.session.add_all([Inventory(name=f"Brake Pad {i}", price=10.0 + i) for i in range(5)])
+            db.session.commit()
+        response = self.client.get('/inventory/?q=brake&per_page=2')
+        self.assertEqual([p['name'] for p in response.json], ["Brake Pad 0", "Brake Pad 1"])
+        names = [p['name'] for p in response.json]
+        while 'X-Next-Cursor' in response.headers:
+            response = self.client.get(f"/inventory/?q=brake&per_page=2&cursor={response.headers['X-Next-Cursor']}")
+            names += [p['name'] for p in response.json]
+        self.assertEqual(names, [f"Brake Pad {i}" for i in range(5)])
+        self.assertEqual(len(self.client.get('/inventory/').json), 6)
+        self.assertEqual(self.client.get('/inventory/?q=nothing').json, [])
+        self.assertEqual(self.client.get('/inventory/?cursor=bogus').status_code, 400)
+
+    def test_catalog_served_without_queries(self):
+        self.client.get('/inventory/')  # Warm the snapshot
+        with self.app.app_context(), capture_queries(self.app) as statements:
+            response = self.client.get('/inventory/?q=oil&per_page=1')
+        self.assertEqual(response.json[0]['name'], "Oil Filter")
+        self.assertEqual(statements, [])
+
+    def test_catalog_follows_writes(self):
+        names = lambda: [p['name'] for p in self.client.get('/inventory/').json]
+        self.assertEqual(names(), ["Oil Filter"])
+        created = self.client.post('/inventory/', json={"name": "Brake Pads", "price": 49.99}).json['id']
+        self.assertEqual(names(), ["Oil Filter", "Brake Pads"])
+        self.client.put(f'/inventory/{self.part_id}', json={"name": "Air Filter", "price": 9.99})
+        self.assertEqual(names(), ["Air Filter", "Brake Pads"])
+        self.client.patch(f'/inventory/{created}', json={"stock_on_hand": 4})
+        self.assertEqual(self.client.get('/inventory/').json[1]['stock_on_hand'], 4)
+        self.client.delete(f'/inventory/{created}')
+        self.assertEqual(names(), ["Air Filter"])
+
+    def test_catalog_rebuild_leaves_held_snapshot_intact(self):
+        with self.app.test_request_context():
+            held = get_catalog(inventory_schema)
+            db.session.add_all(Inventory(name=f"Part {i}", price=1.0) for i in range(3))
+            db.session.commit()
+            fresh = get_catalog(inventory_schema)
+            # A reader mid-page keeps one consistent build; the rebuild is a new object
+            self.assertIsNot(fresh, held)
+            self.assertEqual((len(held.ids), len(held.items), held.state[0]), (1, 1, 1))
+            self.assertEqual((len(fresh.ids), len(fresh.items), fresh.state[0]), (4, 4, 4))
+            self.assertEqual(len(held.page(per_page=10)[0]), 1)
+
+    def test_get_low_stock(self):
+        with self.app.app_context():
+            db.session.add_all([Inventory(name="Spark Plug", price=3.0, stock_on_hand=2),
+                                Inventory(name="Bulb", price=1.0, stock_on_hand=0),
+                                Inventory(name="Tyre", price=80.0, stock_on_hand=40)])
+            db.session.commit()
+        response = self.client.get('/inventory/low-stock')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p['name'] for p in response.json], ["Bulb", "Spark Plug"])  # Untracked Oil Filter excluded
+        response = self.client.get('/inventory/low-stock?threshold=50')
+        self.assertEqual([p['stock_on_hand'] for p in response.json], [0, 2, 40])
+        self.assertEqual(self.client.get('/inventory/low-stock?threshold=few').status_code, 400)
+
+    def test_low_stock_is_paginated(self):
+        with self.app.app_context():
+            db.session.add_all([Inventory(name=f"Part {n}", price=1.0, stock_on_hand=n % 3) for n in range(5)])
+            db.session.commit()
+        seen, cursor = [], None
+        while True:
+            response = self.client.get('/inventory/low-stock', query_string={'per_page': 2, **({'cursor': cursor} if cursor else {})})
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.json), 2)
+            seen += [(p['stock_on_hand'], p['name']) for p in response.json]
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not cursor:
+                break
+        self.assertEqual(seen, [(0, "Part 0"), (0, "Part 3"), (1, "Part 1"), (1, "Part 4"), (2, "Part 2")])
+        self.assertEqual(self.client.get('/inventory/low-stock?cursor=bogus').status_code, 400)
+
+    def test_low_stock_uses_index(self):
+        with self.app.app_context():
+            query = low_stock_query(5).compile(db.engine, compile_kwargs={"literal_binds": True})
+            plan = ' '.join(row[-1] for row in db.session.execute(text(f"EXPLAIN QUERY PLAN {query}")))
+        self.assertIn('ix_inventory_stock_on_hand', plan)
+
+    def test_stock_on_hand_cannot_be_negative(self):
+        response = self.client.patch(f'/inventory/{self.part_id}', json={"stock_on_hand": -1})
+        self.assertEqual(response.status_code, 400)
+
+    def run_import(self, csv_text, *options):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w') as f:
+            f.write(csv_text)
+        try:
+            return self.app.test_cli_runner().invoke(args=['inventory', 'import', path, *options])
+        finally:
+            os.remove(path)
+
+    def catalog_by_sku(self):
+        with self.app.app_context():
+            parts = db.session.execute(select(Inventory).where(Inventory.supplier_sku.is_not(None))).scalars()
+            return {p.supplier_sku: (p.name, p.price, p.stock_on_hand) for p in parts}
+
+    def test_import_csv_upserts_by_supplier_sku(self):
+        rows = ''.join(f"SKU-{i},Part {i},{i}.50,\n" for i in range(25))
+        result = self.run_import("supplier_sku,name,price,stock_on_hand,ignored\n" + rows + "BAD,No price,,\n,No SKU,1.0,\n",
+                                 '--chunk-size', '4', '--commit-every', '8')
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("27 rows", result.output)
+        self.assertIn("25 inserted, 0 updated, 2 rejected", result.output)
+        self.assertIn("rows/sec", result.output)
+        self.assertIn("line 27", result.stderr)
+        catalog = self.catalog_by_sku()
+        self.assertEqual(len(catalog), 25)
+        self.assertEqual(catalog['SKU-3'], ("Part 3", 3.5, None))
+
+        # Second list: reprices one part, records stock for another, adds a new one; blank cells leave columns alone
+        result = self.run_import("supplier_sku,name,price,stock_on_hand\nSKU-3,Part 3,4.50,\nSKU-4,Part 4,4.50,12\nSKU-99,New,1.00,3\n")
+        self.assertIn("1 inserted, 2 updated, 0 rejected", result.output)
+        catalog = self.catalog_by_sku()
+        self.assertEqual(catalog['SKU-3'], ("Part 3", 4.5, None))
+        self.assertEqual(catalog['SKU-4'], ("Part 4", 4.5, 12))
+        self.assertEqual(catalog['SKU-99'], ("New", 1.0, 3))
+        self.assertEqual(len(self.client.get('/inventory/?q=new').json), 1)
+
+    def test_import_reprices_tickets(self):
+        self.run_import("supplier_sku,name,price\nSKU-1,Hose,10.00\n")
+        with self.app.app_context():
+            customer = Customer(name="C", email="c@example.com", phone="1", password="pw")
+            db.session.add(customer)
+            db.session.flush()
+            ticket = Ticket(customer_id=customer.id, ticket_date=date.today(), vin="VIN1", parts_total=20.0)
+            db.session.add(ticket)
+            db.session.flush()
+            part_id = db.session.execute(select(Inventory.id).where(Inventory.supplier_sku == "SKU-1")).scalar()
+            db.session.add(TicketInventory(ticket_id=ticket.id, inventory_id=part_id, quantity=2))
+            db.session.commit()
+            ticket_id = ticket.id
+        self.run_import("supplier_sku,name,price\nSKU-1,Hose,12.00\n")
+        with self.app.app_context():
+            self.assertEqual(db.session.get(Ticket, ticket_id).parts_total, 24.0)
+
+    def test_import_requires_supplier_sku_column(self):
+        result = self.run_import("name,price\nHose,1.0\n")
+        self.assertNotEqual(result.exit_code, 0)
+        self.assertIn("supplier_sku", result.stderr)
+
+    def test_supplier_sku_is_unique(self):
+        self.client.patch(f'/inventory/{self.part_id}', json={"supplier_sku": "OF-1"})
+        response = self.client.post('/inventory/', json={"name": "Copy", "price": 1.0, "supplier_sku": "OF-1"})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.put(f'/inventory/{self.part_id}', json={"name": "Oil Filter", "price": 19.99, "supplier_sku": "OF-1"})
+        self.assertEqual(response.status_code, 200)
+
+    def seed_usage(self):
+        """Two parts on tickets in March and April 2026; mechanic A on both tickets, B on the April one."""
+        with self.app.app_context():
+            customer = Customer(name="C", email="usage@example.com", phone="1", password="pw")
+            mechanics = [Mechanic(name=n, email=f"{n}@example.com", phone="1", salary=1, password="pw") for n in ("A", "B")]
+            pads = Inventory(name="Brake Pads", price=50.0)
+            db.session.add_all([customer, pads, *mechanics])
+            db.session.flush()
+            tickets = [Ticket(customer_id=customer.id, ticket_date=date(2026, month, 10), vin=f"VIN{month}") for month in (3, 4)]
+            db.session.add_all(tickets)
+            db.session.commit()
+            ids = ([t.id for t in tickets], [m.id for m in mechanics], pads.id)
+        (march, april), (a, b), pads_id = ids
+        for ticket_id in (march, april):
+            self.client.put(f'/tickets/{ticket_id}/assign-mechanic/{a}')
+        self.client.put(f'/tickets/{april}/assign-mechanic/{b}')
+        self.client.post(f'/tickets/{march}/add-part', json={"inventory_id": self.part_id, "quantity": 5})  # 5 x 19.99
+        self.client.post(f'/tickets/{april}/parts', json=[{"inventory_id": self.part_id, "quantity": 1},
+                                                        {"inventory_id": pads_id, "quantity": 3}])  # 150.00 of pads
+        return march, april, a, b, pads_id
+
+    def rollup_rows(self):
+        with self.app.app_context():
+            part = db.session.execute(select(PartMonthlyUsage.inventory_id, PartMonthlyUsage.month, PartMonthlyUsage.quantity,
+                                             PartMonthlyUsage.revenue).order_by(PartMonthlyUsage.inventory_id, PartMonthlyUsage.month)).all()
+            mechanic = db.session.execute(select(PartMechanicMonthlyUsage.inventory_id, PartMechanicMonthlyUsage.mechanic_id,
+                                                 PartMechanicMonthlyUsage.month, PartMechanicMonthlyUsage.quantity,
+                                                 PartMechanicMonthlyUsage.revenue)
+                                          .order_by(PartMechanicMonthlyUsage.inventory_id, PartMechanicMonthlyUsage.mechanic_id,
+                                                    PartMechanicMonthlyUsage.month)).all()
+            return [tuple(round(v, 6) for v in row) for row in part], [tuple(round(v, 6) for v in row) for row in mechanic]
+
+    def assert_rollups_match_rebuild(self):
+        maintained = self.rollup_rows()
+        with self.app.app_context():
+            rebuild_part_usage()
+            db.session.commit()
+        self.assertEqual(maintained, self.rollup_rows())
+
+    def test_top_parts(self):
+        march, april, a, b, pads_id = self.seed_usage()
+        response = self.client.get('/inventory/analytics/top-parts?from=2026-03&to=2026-04')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['from'], "2026-03")
+        parts = response.json['parts']
+        self.assertEqual([(p['inventory_id'], p['quantity']) for p in parts], [(self.part_id, 6), (pads_id, 3)])
+        self.assertEqual(parts[0]['months'], [{"month": "2026-03", "quantity": 5, "revenue": 99.95},
+                                              {"month": "2026-04", "quantity": 1, "revenue": 19.99}])
+        self.assertEqual([(m['mechanic_id'], m['quantity']) for m in parts[0]['mechanics']], [(a, 6), (b, 1)])
+
+        by_revenue = self.client.get('/inventory/analytics/top-parts?from=2026-03&to=2026-04&by=revenue&limit=1').json['parts']
+        self.assertEqual([(p['inventory_id'], p['revenue']) for p in by_revenue], [(pads_id, 150.0)])
+        only_b = self.client.get(f'/inventory/analytics/top-parts?from=2026-03&to=2026-04&mechanic_id={b}').json['parts']
+        self.assertEqual([(p['inventory_id'], p['quantity']) for p in only_b], [(pads_id, 3), (self.part_id, 1)])
+        march_only = self.client.get('/inventory/analytics/top-parts?from=2026-03&to=2026-03').json['parts']
+        self.assertEqual([p['inventory_id'] for p in march_only], [self.part_id])
+
+        for query in ('from=2026-13', 'to=march', 'from=2026-05&to=2026-04', 'by=price', 'limit=0', 'mechanic_id=x'):
+            self.assertEqual(self.client.get(f'/inventory/analytics/top-parts?{query}').status_code, 400, query)
+
+    def test_top_parts_reads_only_rollups(self):
+        self.seed_usage()
+        with self.app.app_context(), capture_queries(self.app) as statements:
+            self.client.get('/inventory/analytics/top-parts?from=2026-01&to=2026-12')
+        self.assertLessEqual(len(statements), 3)
+        self.assertFalse([s for s in statements if 'ticket_inventory' in s or 'FROM tickets' in s])
+
+    def test_part_usage_rollups_follow_writes(self):
+        march, april, a, b, pads_id = self.seed_usage()
+        self.assert_rollups_match_rebuild()
+        self.client.put(f'/tickets/{april}/remove-mechanic/{a}')
+        self.client.put(f'/tickets/{march}', json={"add_mechanic_ids": [b], "remove_mechanic_ids": []})
+        self.assert_rollups_match_rebuild()
+        self.client.patch(f'/tickets/{march}', json={"ticket_date": "2026-05-01"})  # Moves to another month
+        self.client.patch(f'/inventory/{pads_id}', json={"price": 40.0})
+        self.assert_rollups_match_rebuild()
+        self.client.delete(f'/inventory/{pads_id}')
+        self.assert_rollups_match_rebuild()
+        self.assertEqual(self.rollup_rows()[0], [(self.part_id, 202604, 1, 19.99), (self.part_id, 202605, 5, 99.95)])
+
+    def test_rebuild_usage_command(self):
+        self.seed_usage()
+        maintained = self.rollup_rows()
+        with self.app.app_context():
+            db.session.execute(PartMonthlyUsage.__table__.delete())
+            db.session.commit()
+        result = self.app.test_cli_runner().invoke(args=['inventory', 'rebuild-usage'])
+        self.assertIn("rebuilt", result.output)
+        self.assertEqual(self.rollup_rows(), maintained)
+
     def test_get_nonexistent_inventory(self):
         # Negative test: Should return 404 for missing part
         response = self.client.get('/inventory/999')
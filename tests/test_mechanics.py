@@ -1,6 +1,14 @@
 from app import create_app
-from app.models import db, Mechanic
+from app.models import db, Mechanic, Customer, Ticket, Inventory, MechanicDailyStats, MechanicDailyVehicle, ticket_mechanic
+from tests.helpers import capture_queries
+from config import TestingConfig
+from flask_migrate import upgrade
+import os
+import tempfile
 import unittest
+from datetime import date
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
 
 class TestMechanic(unittest.TestCase):
     def setUp(self):
@@ -80,6 +88,28 @@ class TestMechanic(unittest.TestCase):
         response = self.client.get('/mechanics/?page=1&per_page=1')
         self.assertEqual(response.status_code, 200)
 
+    def test_mechanics_list_etag_without_table_scan(self):
+        etag = self.client.get('/mechanics/').headers['ETag']
+        with capture_queries(self.app) as statements:
+            self.assertEqual(self.client.get('/mechanics/', headers={'If-None-Match': etag}).status_code, 304)
+        self.assertEqual(statements, [])
+        # A bulk UPDATE of ticket_count (not an ORM flush) still moves the ETag
+        ticket_ids, _ = self.seed_stats_tickets()
+        self.client.put(f'/tickets/{ticket_ids[0]}/assign-mechanic/{self.mechanic_id}')
+        response = self.client.get('/mechanics/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json[0]['ticket_count'], 1)
+
+    def test_get_mechanics_per_page_is_capped(self):
+        with self.app.app_context():
+            for i in range(120):
+                db.session.add(Mechanic(name=f"Mech {i}", email=f"m{i}@example.com", phone="1", salary=1, password="pw"))
+            db.session.commit()
+        response = self.client.get('/mechanics/?per_page=1000')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), 100)
+        self.assertIn('X-Next-Cursor', response.headers)
+
     def test_get_specific_mechanic(self):
         response = self.client.get(f'/mechanics/{self.mechanic_id}')
         self.assertEqual(response.status_code, 200)
@@ -115,14 +145,197 @@ class TestMechanic(unittest.TestCase):
         response = self.client.delete(f'/mechanics/{self.mechanic_id}', headers=headers)
         self.assertEqual(response.status_code, 200)
 
+    def test_mechanic_logout_revokes_token(self):
+        headers = {'Authorization': f'Bearer {self.get_auth_token()}'}
+        self.assertEqual(self.client.post('/mechanics/logout', headers=headers).status_code, 200)
+        self.assertEqual(self.client.post('/mechanics/logout', headers=headers).status_code, 401)
+
+    def test_deleted_mechanic_token_is_revoked(self):
+        headers = {'Authorization': f'Bearer {self.get_auth_token()}'}
+        self.assertEqual(self.client.delete(f'/mechanics/{self.mechanic_id}', headers=headers).status_code, 200)
+        response = self.client.post('/mechanics/logout', headers=headers)
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('revoked', response.json['message'])
+
     def test_popular_mechanics(self):
         response = self.client.get('/mechanics/popular')
         self.assertEqual(response.status_code, 200)
 
+    def test_popular_mechanics_ranked_by_ticket_count(self):
+        with self.app.app_context():
+            busy = Mechanic(name="Busy", email="busy@example.com", phone="1", salary=1, password="pw")
+            customer = Customer(name="Owner", email="owner@example.com", phone="1", password="pw")
+            db.session.add_all([busy, customer])
+            db.session.commit()
+            busy_id, customer_id = busy.id, customer.id
+        tickets = [{"customer_id": customer_id, "ticket_date": str(date.today()), "vin": f"POP{i}",
+                    "mechanic_ids": [busy_id]} for i in range(3)]
+        tickets[0]["mechanic_ids"].append(self.mechanic_id)
+        created = self.client.post('/tickets/bulk', json=tickets).json['created']
+
+        response = self.client.get('/mechanics/popular?limit=1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(m['id'], m['ticket_count']) for m in response.json], [(busy_id, 3)])
+
+        # Counters follow single and set-based (un)assignment
+        self.client.put(f"/tickets/{created[1]['id']}/remove-mechanic/{busy_id}")
+        self.client.put(f"/tickets/{created[2]['id']}", json={"add_mechanic_ids": [self.mechanic_id], "remove_mechanic_ids": [busy_id]})
+        self.client.put(f"/tickets/{created[1]['id']}/assign-mechanic/{self.mechanic_id}")
+        ranking = [(m['id'], m['ticket_count']) for m in self.client.get('/mechanics/popular').json]
+        self.assertEqual(ranking, [(self.mechanic_id, 3), (busy_id, 1)])
+
+    def test_popular_mechanics_bad_limit(self):
+        response = self.client.get('/mechanics/popular?limit=zero')
+        self.assertEqual(response.status_code, 400)
+
+    def test_recount_command(self):
+        with self.app.app_context():
+            customer = Customer(name="Owner", email="owner@example.com", phone="1", password="pw")
+            db.session.add(customer)
+            db.session.flush()
+            ticket = Ticket(customer_id=customer.id, ticket_date=date.today(), vin="RECOUNT")
+            db.session.add(ticket)
+            db.session.flush()
+            db.session.execute(ticket_mechanic.insert().values(ticket_id=ticket.id, mechanic_id=self.mechanic_id))
+            db.session.commit()
+        result = self.app.test_cli_runner().invoke(args=['mechanics', 'recount'])
+        self.assertIn('rebuilt', result.output)
+        self.assertEqual(self.client.get('/mechanics/popular').json[0]['ticket_count'], 1)
+
+    def seed_stats_tickets(self):
+        with self.app.app_context():
+            customer = Customer(name="Owner", email="owner@example.com", phone="1", password="pw")
+            part = Inventory(name="Filter", price=10.0)
+            db.session.add_all([customer, part])
+            db.session.flush()
+            tickets = [Ticket(customer_id=customer.id, ticket_date=date(2026, 3, day), vin=vin)
+                       for day, vin in ((2, "VIN-A"), (2, "VIN-A"), (3, "VIN-B"), (30, "VIN-C"))]
+            db.session.add_all(tickets)
+            db.session.commit()
+            return [t.id for t in tickets], part.id
+
+    def test_mechanic_stats_follow_writes(self):
+        ticket_ids, part_id = self.seed_stats_tickets()
+        for ticket_id in ticket_ids:
+            self.client.put(f'/tickets/{ticket_id}/assign-mechanic/{self.mechanic_id}')
+        self.client.post(f'/tickets/{ticket_ids[0]}/parts', json=[{"inventory_id": part_id, "quantity": 3}])
+
+        url = f'/mechanics/{self.mechanic_id}/stats?from=2026-03-01&to=2026-03-31'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['totals'], {"tickets": 4, "vehicles": 3, "parts_revenue": 30.0})
+        self.assertEqual(response.json['periods'][0], {"period": "2026-03-02", "tickets": 2, "vehicles": 1, "parts_revenue": 30.0})
+
+        response = self.client.get(url + '&group=week')
+        self.assertEqual([p['period'] for p in response.json['periods']], ["2026-03-02", "2026-03-30"])
+        response = self.client.get(url + '&group=month')
+        self.assertEqual(response.json['periods'], [{"period": "2026-03", "tickets": 4, "vehicles": 3, "parts_revenue": 30.0}])
+
+        # Moving a ticket to another day and unassigning one both update the rollup
+        self.client.patch(f'/tickets/{ticket_ids[0]}', json={"ticket_date": "2026-04-01"})
+        self.client.put(f'/tickets/{ticket_ids[3]}/remove-mechanic/{self.mechanic_id}')
+        self.client.patch(f'/inventory/{part_id}', json={"price": 20.0})
+        response = self.client.get(url)
+        self.assertEqual(response.json['totals'], {"tickets": 2, "vehicles": 2, "parts_revenue": 0.0})
+        response = self.client.get(f'/mechanics/{self.mechanic_id}/stats?from=2026-04-01&to=2026-04-01')
+        self.assertEqual(response.json['totals'], {"tickets": 1, "vehicles": 1, "parts_revenue": 60.0})
+
+    def test_mechanic_stats_count_each_vehicle_once_per_period(self):
+        ticket_ids, _ = self.seed_stats_tickets()
+        with self.app.app_context():
+            # VIN-A comes back on 2026-03-04: same week and month as its 2026-03-02 visits
+            customer_id = db.session.get(Ticket, ticket_ids[0]).customer_id
+            repeat = Ticket(customer_id=customer_id, ticket_date=date(2026, 3, 4), vin="VIN-A")
+            db.session.add(repeat)
+            db.session.commit()
+            ticket_ids.append(repeat.id)
+        for ticket_id in ticket_ids:
+            self.client.put(f'/tickets/{ticket_id}/assign-mechanic/{self.mechanic_id}')
+
+        url = f'/mechanics/{self.mechanic_id}/stats?from=2026-03-01&to=2026-03-31'
+        response = self.client.get(url)
+        self.assertEqual([p['vehicles'] for p in response.json['periods']], [1, 1, 1, 1])  # Per day
+        self.assertEqual(response.json['totals']['vehicles'], 3)
+        response = self.client.get(url + '&group=week')
+        self.assertEqual([(p['period'], p['tickets'], p['vehicles']) for p in response.json['periods']],
+                         [("2026-03-02", 4, 2), ("2026-03-30", 1, 1)])
+        response = self.client.get(url + '&group=month')
+        self.assertEqual(response.json['periods'][0]['vehicles'], 3)
+        self.assertEqual(response.json['totals']['vehicles'], 3)
+
+    def test_mechanic_stats_read_only_the_rollups(self):
+        ticket_ids, _ = self.seed_stats_tickets()
+        for ticket_id in ticket_ids:
+            self.client.put(f'/tickets/{ticket_id}/assign-mechanic/{self.mechanic_id}')
+        for group in ('day', 'week', 'month'):
+            with capture_queries(self.app) as statements:
+                response = self.client.get(f'/mechanics/{self.mechanic_id}/stats?from=2026-03-01&to=2026-03-31&group={group}')
+            self.assertEqual(response.json['totals']['vehicles'], 3)
+            self.assertFalse([s for s in statements if 'JOIN tickets' in s or 'FROM tickets' in s or 'ticket_mechanic' in s])
+
+    def test_rebuild_stats_command(self):
+        ticket_ids, _ = self.seed_stats_tickets()
+        with self.app.app_context():
+            db.session.execute(ticket_mechanic.insert(), [{"ticket_id": t, "mechanic_id": self.mechanic_id} for t in ticket_ids])
+            db.session.commit()
+        result = self.app.test_cli_runner().invoke(args=['mechanics', 'rebuild-stats'])
+        self.assertIn('rebuilt', result.output)
+        with self.app.app_context():
+            self.assertEqual(db.session.query(MechanicDailyStats).count(), 3)
+            self.assertEqual(db.session.query(MechanicDailyVehicle).count(), 3)
+        response = self.client.get(f'/mechanics/{self.mechanic_id}/stats?from=2026-03-01&to=2026-03-31&group=month')
+        self.assertEqual(response.json['totals']['tickets'], 4)
+
+    def test_mechanic_stats_invalid(self):
+        self.assertEqual(self.client.get('/mechanics/999/stats').status_code, 404)
+        for query in ('from=03-01-2026', 'from=2026-03-02&to=2026-03-01', 'group=year'):
+            response = self.client.get(f'/mechanics/{self.mechanic_id}/stats?{query}')
+            self.assertEqual(response.status_code, 400)
+        response = self.client.get(f'/mechanics/{self.mechanic_id}/stats')
+        self.assertEqual(response.json['periods'], [])
+
     def test_search_mechanic(self):
         response = self.client.get('/mechanics/search?name=Test')
         self.assertEqual(response.status_code, 200)
 
+    def seed_search_mechanics(self):
+        with self.app.app_context():
+            for name in ["Maria Lopez", "Mario Testa", "Lopez Maria Jr", "Marcus Lo"]:
+                db.session.add(Mechanic(name=name, email=f"{name.split()[1].lower()}{len(name)}@example.com", phone="1", salary=1, password="pw"))
+            db.session.commit()
+
+    def check_search_behaviour(self):
+        self.seed_search_mechanics()
+        names = lambda url: [m['name'] for m in self.client.get(url).json]
+        # Prefix and multi-token (all tokens must match, in any order)
+        self.assertEqual(sorted(names('/mechanics/search?name=mari')), ["Lopez Maria Jr", "Maria Lopez", "Mario Testa"])
+        self.assertEqual(sorted(names('/mechanics/search?name=lop mar')), ["Lopez Maria Jr", "Maria Lopez"])
+        self.assertEqual(names('/mechanics/search?name=te&limit=1'), ["Test Mechanic"])
+        # Kept in sync with updates and deletes
+        token = self.get_auth_token()
+        headers = {'Authorization': f'Bearer {token}'}
+        self.client.patch(f'/mechanics/{self.mechanic_id}', json={"name": "Renamed Person"}, headers=headers)
+        self.assertEqual(names('/mechanics/search?name=renam'), ["Renamed Person"])
+        self.client.delete(f'/mechanics/{self.mechanic_id}', headers=headers)
+        self.assertEqual(names('/mechanics/search?name=renam'), [])
+
+    def test_search_mechanic_fts(self):
+        self.check_search_behaviour()
+
+    def test_search_mechanic_ngram_fallback(self):
+        self.app.config['MECHANIC_SEARCH_BACKEND'] = 'ngram'
+        self.check_search_behaviour()
+
+    def test_search_mechanic_ranks_exact_words_first(self):
+        self.app.config['MECHANIC_SEARCH_BACKEND'] = 'ngram'
+        self.seed_search_mechanics()
+        response = self.client.get('/mechanics/search?name=maria')
+        self.assertEqual([m['name'] for m in response.json][:2], ["Maria Lopez", "Lopez Maria Jr"])
+
+    def test_search_mechanic_requires_name(self):
+        response = self.client.get('/mechanics/search')
+        self.assertEqual(response.status_code, 400)
+
     # --- Negative tests for non-existent mechanic ---
     def test_get_nonexistent_mechanic(self):
         response = self.client.get('/mechanics/999')
@@ -158,4 +371,47 @@ class TestMechanic(unittest.TestCase):
     def tearDown(self):
         with self.app.app_context():
             db.session.remove()
-            db.engine.dispose() 
\ No newline at end of file
+            db.engine.dispose() 
+
+# Schema the first migration (58587ff1a4ea) starts from
+BASELINE_SCHEMA = """
+CREATE TABLE customers (id INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, email VARCHAR(360) NOT NULL UNIQUE,
+    phone VARCHAR(255) NOT NULL, password VARCHAR(255) NOT NULL);
+CREATE TABLE mechanics (id INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, email VARCHAR(255) NOT NULL UNIQUE,
+    phone VARCHAR(255) NOT NULL, salary FLOAT NOT NULL);
+CREATE TABLE tickets (id INTEGER PRIMARY KEY, vin VARCHAR(255) NOT NULL, ticket_date DATE,
+    customer_id INTEGER REFERENCES customers (id));
+CREATE TABLE ticket_mechanic (ticket_id INTEGER REFERENCES tickets (id), mechanic_id INTEGER REFERENCES mechanics (id));
+CREATE TABLE inventory (id INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, price FLOAT NOT NULL);
+CREATE TABLE ticket_inventory (ticket_id INTEGER NOT NULL REFERENCES tickets (id),
+    inventory_id INTEGER NOT NULL REFERENCES inventory (id), quantity INTEGER NOT NULL,
+    PRIMARY KEY (ticket_id, inventory_id));
+"""
+
+class TestMigrations(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+
+        class MigratedConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f"sqlite:///{self.path}"
+        self.app = create_app(MigratedConfig)
+        with self.app.app_context():
+            with db.engine.begin() as connection:
+                connection.connection.executescript(BASELINE_SCHEMA)
+            upgrade(directory=MIGRATIONS_DIR)
+        self.client = self.app.test_client()
+
+    def test_search_finds_mechanics_added_after_full_upgrade(self):
+        with self.app.app_context():
+            db.session.add(Mechanic(name="Zed Alvarez", email="zed@example.com", phone="0", salary=1, password="pw"))
+            db.session.commit()
+        response = self.client.get('/mechanics/search?name=zed')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([m['name'] for m in response.json], ["Zed Alvarez"])
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        os.remove(self.path)
@@ -0,0 +1,133 @@
+from app import create_app
+from app.models import db, Mechanic
+from app.utils.ratelimit import SQLiteStorage, rate_limit_key, rate_limit_tier
+from app.utils.util import token_cache, encode_mechanic_token
+from config import TestingConfig
+from limits import parse
+from limits.strategies import MovingWindowRateLimiter, FixedWindowRateLimiter
+import os
+import tempfile
+import unittest
+
+try:
+    import fakeredis
+    import redis
+except ImportError:  # Redis client and stand-in server are optional here
+    fakeredis = redis = None
+
+class TestRateLimit(unittest.TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+
+        class SharedFileConfig(TestingConfig):
+            RATELIMIT_STORAGE_URI = f"sqlite:///{self.path}"
+        self.config = SharedFileConfig
+
+    def make_app(self, config):
+        app = create_app(config)
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+        return app
+
+    def tiered_app(self, **tiers):
+        class TieredConfig(TestingConfig):
+            RATELIMIT_TIERS = {**TestingConfig.RATELIMIT_TIERS, **tiers}
+        app = self.make_app(TieredConfig)
+        with app.app_context():
+            mechanics = [
+                Mechanic(name=f"Mechanic {n}", email=f"m{n}@example.com", phone="0", salary=1, password="pw")
+                for n in range(2)
+            ]
+            db.session.add_all(mechanics)
+            db.session.commit()
+            self.tokens = [{'Authorization': f'Bearer {encode_mechanic_token(m.id)}'} for m in mechanics]
+        return app
+
+    def test_health_check_is_exempt(self):
+        client = self.make_app('TestingConfig').test_client()
+        for _ in range(105):  # Past the 100/day default limit
+            response = client.get('/health')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['status'], 'ok')
+
+    def test_workers_share_sqlite_counters(self):
+        # Two apps on one file stand in for two gunicorn workers
+        workers = [self.make_app(self.config).test_client() for _ in range(2)]
+        statuses = [workers[i % 2].post('/customers/', json={}).status_code for i in range(6)]
+        self.assertEqual(statuses, [400] * 5 + [429])  # POST /customers/ allows 5 per day in total, not per worker
+
+    def test_sqlite_moving_window(self):
+        storage = SQLiteStorage(f"sqlite:///{self.path}")
+        moving = MovingWindowRateLimiter(storage)
+        limit = parse("3/minute")
+        self.assertEqual([moving.hit(limit, "k") for _ in range(4)], [True, True, True, False])
+        self.assertEqual(moving.get_window_stats(limit, "k").remaining, 0)
+        self.assertTrue(moving.test(limit, "other"))
+        moving.clear(limit, "k")
+        self.assertTrue(moving.hit(limit, "k"))
+        self.assertFalse(moving.hit(limit, "k", cost=3))  # 1 + 3 > 3
+
+        fixed = FixedWindowRateLimiter(storage)
+        self.assertEqual([fixed.hit(limit, "f") for _ in range(4)], [True, True, True, False])
+        self.assertTrue(storage.check())
+
+    def test_sqlite_storage_needs_a_file(self):
+        with self.assertRaises(ValueError):
+            SQLiteStorage("sqlite:///:memory:")
+
+    @unittest.skipIf(fakeredis is None, "redis and fakeredis are not installed")
+    def test_workers_share_redis_counters(self):
+        server = fakeredis.FakeServer()  # Local stand-in speaking the Redis protocol
+
+        class RedisConfig(TestingConfig):
+            RATELIMIT_STORAGE_URI = 'redis://localhost:6379/0'
+            RATELIMIT_STORAGE_OPTIONS = {
+                'connection_pool': redis.ConnectionPool(connection_class=fakeredis.FakeRedisConnection, server=server)
+            }
+        workers = [self.make_app(RedisConfig).test_client() for _ in range(2)]
+        statuses = [workers[i % 2].post('/customers/', json={}).status_code for i in range(6)]
+        self.assertEqual(statuses, [400] * 5 + [429])
+
+    def test_mechanics_behind_one_address_get_their_own_buckets(self):
+        client = self.tiered_app(
+            mechanic={'read': '3/minute', 'write': '3/minute'},
+            anonymous={'read': '2/minute', 'write': '2/minute'},
+        ).test_client()
+        first, second = self.tokens
+        statuses = [client.get('/mechanics/protected', headers=first).status_code for _ in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+        self.assertEqual(client.get('/mechanics/protected', headers=second).status_code, 200)
+
+        # Anonymous callers share their address's bucket and never touch the mechanics' buckets
+        self.assertEqual([client.get('/mechanics/').status_code for _ in range(3)], [200, 200, 429])
+        self.assertEqual(client.get('/mechanics/', headers=second).status_code, 200)
+
+    def test_reads_and_writes_have_separate_limits(self):
+        app = self.tiered_app(anonymous={'read': '100/minute', 'write': '1/minute'})
+        client = app.test_client()
+        login = {"email": "nobody@example.com", "password": "x"}
+        self.assertEqual([client.post('/customers/login', json=login).status_code for _ in range(2)], [401, 429])
+        self.assertEqual(client.get('/customers/').status_code, 200)
+
+        tiers = app.config['RATELIMIT_TIERS']
+        with app.test_request_context('/tickets/', method='POST', headers=self.tokens[0]):
+            self.assertEqual(rate_limit_key(), 'mechanic:1')
+            self.assertEqual(rate_limit_tier(), tiers['mechanic']['write'])
+        with app.test_request_context('/tickets/', headers={'Authorization': 'Bearer not-a-token'}):
+            self.assertEqual(rate_limit_key(), 'anonymous:127.0.0.1')  # Forged tokens get no bucket of their own
+            self.assertEqual(rate_limit_tier(), tiers['anonymous']['read'])
+
+    def test_token_decoded_once_per_request(self):
+        client = self.tiered_app().test_client()
+        token_cache.clear()
+        for _ in range(3):
+            lookups = token_cache.hits + token_cache.misses
+            self.assertEqual(client.get('/mechanics/protected', headers=self.tokens[0]).status_code, 200)
+            self.assertEqual(token_cache.hits + token_cache.misses - lookups, 1)  # Limiter and decorator share it
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
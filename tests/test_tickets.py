@@ -1,6 +1,16 @@
 from app import create_app
-from app.models import db, Ticket, Customer, Mechanic, Inventory
+from app.models import db, Ticket, Customer, Mechanic, Inventory, TicketInventory
+from sqlalchemy import select, text
+from app.blueprints.tickets.routes import ticket_filter_clauses
+from app.extensions import limiter, tag_versions
+from app.utils.catalog import CATALOG_TAG
+from tests.helpers import capture_queries
 import unittest
+import json
+import os
+import tempfile
+import threading
+from config import TestingConfig
 from datetime import date
 
 class TestTicket(unittest.TestCase):
@@ -107,6 +117,410 @@ class TestTicket(unittest.TestCase):
         response = self.client.post(f'/tickets/{self.ticket_id}/add-part', json=payload)
         self.assertEqual(response.status_code, 200)
 
+    def test_update_ticket_mechanics(self):
+        with self.app.app_context():
+            extra = Mechanic(name="Second", email="second@example.com", phone="1", salary=1, password="pw")
+            db.session.add(extra)
+            db.session.commit()
+            extra_id = extra.id
+        payload = {"add_mechanic_ids": [self.mechanic_id, extra_id, 999], "remove_mechanic_ids": []}
+        response = self.client.put(f'/tickets/{self.ticket_id}', json=payload)
+        self.assertEqual(sorted(m['id'] for m in response.json['mechanics']), sorted([self.mechanic_id, extra_id]))
+        # Re-adding is a no-op and removal takes effect in the same call
+        payload = {"add_mechanic_ids": [self.mechanic_id], "remove_mechanic_ids": [extra_id]}
+        response = self.client.put(f'/tickets/{self.ticket_id}', json=payload)
+        self.assertEqual([m['id'] for m in response.json['mechanics']], [self.mechanic_id])
+
+    def test_update_nonexistent_ticket(self):
+        payload = {"add_mechanic_ids": [self.mechanic_id], "remove_mechanic_ids": []}
+        response = self.client.put('/tickets/999', json=payload)
+        self.assertEqual(response.status_code, 404)
+
+    def test_update_ticket_query_count_is_constant(self):
+        def count_update_queries(mechanic_count):
+            with self.app.app_context():
+                start = db.session.query(Mechanic).count()
+                for i in range(mechanic_count):
+                    db.session.add(Mechanic(name=f"Crew {i}", email=f"crew{start}-{i}@example.com", phone="1", salary=1, password="pw"))
+                db.session.commit()
+                ids = [m.id for m in db.session.query(Mechanic).order_by(Mechanic.id.desc()).limit(mechanic_count)]
+                with capture_queries(self.app) as statements:
+                    self.client.put(f'/tickets/{self.ticket_id}', json={"add_mechanic_ids": ids, "remove_mechanic_ids": []})
+                    self.client.put(f'/tickets/{self.ticket_id}', json={"add_mechanic_ids": [], "remove_mechanic_ids": ids})
+                return len(statements)
+        self.assertEqual(count_update_queries(3), count_update_queries(60))
+
+    def test_add_parts_to_ticket_accumulates(self):
+        with self.app.app_context():
+            filter_part = Inventory(name="Oil Filter", price=9.99)
+            db.session.add(filter_part)
+            db.session.commit()
+            filter_id = filter_part.id
+        self.client.post(f'/tickets/{self.ticket_id}/add-part', json={"inventory_id": self.inventory_id, "quantity": 1})
+        payload = [
+            {"inventory_id": self.inventory_id, "quantity": 2},
+            {"inventory_id": filter_id},
+            {"inventory_id": filter_id, "quantity": 3},
+        ]
+        response = self.client.post(f'/tickets/{self.ticket_id}/parts', json=payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [
+            {"inventory_id": self.inventory_id, "quantity": 3},
+            {"inventory_id": filter_id, "quantity": 4},
+        ])
+
+    def test_add_parts_to_ticket_invalid(self):
+        response = self.client.post(f'/tickets/{self.ticket_id}/parts', json=[{"inventory_id": 999}])
+        self.assertEqual(response.status_code, 404)
+        response = self.client.post(f'/tickets/{self.ticket_id}/parts', json=[{"inventory_id": self.inventory_id, "quantity": 0}])
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/tickets/999/parts', json=[{"inventory_id": self.inventory_id}])
+        self.assertEqual(response.status_code, 404)
+
+    def test_ticket_invoice_and_totals(self):
+        self.client.post(f'/tickets/{self.ticket_id}/parts', json=[{"inventory_id": self.inventory_id, "quantity": 2}])
+        response = self.client.get(f'/tickets/{self.ticket_id}/invoice')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['lines'][0]['quantity'], 2)
+        self.assertAlmostEqual(response.json['total'], 99.98)
+
+        response = self.client.get('/tickets/?include=totals')
+        self.assertAlmostEqual(response.json[0]['parts_total'], 99.98)
+        self.assertNotIn('parts_total', self.client.get('/tickets/').json[0])
+
+    def test_ticket_total_follows_price_changes(self):
+        self.client.post(f'/tickets/{self.ticket_id}/add-part', json={"inventory_id": self.inventory_id, "quantity": 3})
+        self.client.patch(f'/inventory/{self.inventory_id}', json={"price": 10.0})
+        with self.app.app_context():
+            self.assertAlmostEqual(db.session.get(Ticket, self.ticket_id).parts_total, 30.0)
+        self.client.delete(f'/inventory/{self.inventory_id}')
+        with self.app.app_context():
+            self.assertAlmostEqual(db.session.get(Ticket, self.ticket_id).parts_total, 0.0)
+
+    def test_invoice_nonexistent_ticket(self):
+        response = self.client.get('/tickets/999/invoice')
+        self.assertEqual(response.status_code, 404)
+
+    def test_ticket_caches_invalidated_by_writes(self):
+        self.assertEqual(self.client.get(f'/tickets/{self.ticket_id}/mechanics').json, [])
+        self.assertEqual(self.client.get('/tickets/').json[0]['mechanics'], [])
+        # Raw SQL bypasses the routes and the session's write hooks, so the responses really are cached
+        with self.app.app_context():
+            db.session.execute(text("INSERT INTO tickets (customer_id, ticket_date, vin, parts_total) VALUES (:c, :d, 'SIDEDOOR', 0)"),
+                               {"c": self.customer_id, "d": date.today()})
+            db.session.commit()
+        self.assertEqual(len(self.client.get('/tickets/').json), 1)
+
+        self.client.put(f'/tickets/{self.ticket_id}/assign-mechanic/{self.mechanic_id}')
+        self.assertEqual(len(self.client.get(f'/tickets/{self.ticket_id}/mechanics').json), 1)
+        tickets = self.client.get('/tickets/').json
+        self.assertEqual(len(tickets), 2)
+        self.assertEqual(next(t for t in tickets if t['id'] == self.ticket_id)['mechanics'][0]['id'], self.mechanic_id)
+
+        self.client.put(f'/tickets/{self.ticket_id}', json={"add_mechanic_ids": [], "remove_mechanic_ids": [self.mechanic_id]})
+        self.assertEqual(self.client.get(f'/tickets/{self.ticket_id}/mechanics').json, [])
+
+    def test_ticket_mechanics_cache_is_per_ticket(self):
+        response = self.client.post('/tickets/', json={"customer_id": self.customer_id, "ticket_date": str(date.today()), "vin": "OTHER"})
+        other_id = response.json['id']
+        self.client.get(f'/tickets/{other_id}/mechanics')
+        self.client.put(f'/tickets/{self.ticket_id}/assign-mechanic/{self.mechanic_id}')
+        self.assertEqual(self.client.get(f'/tickets/{other_id}/mechanics').json, [])
+        self.assertEqual(len(self.client.get(f'/tickets/{self.ticket_id}/mechanics').json), 1)
+
+    def test_assigning_elsewhere_refreshes_embedded_ticket_count(self):
+        self.client.put(f'/tickets/{self.ticket_id}/assign-mechanic/{self.mechanic_id}')
+        self.assertEqual(self.client.get(f'/tickets/{self.ticket_id}/mechanics').json[0]['ticket_count'], 1)
+        response = self.client.post('/tickets/', json={"customer_id": self.customer_id, "ticket_date": str(date.today()), "vin": "OTHER"})
+        self.client.put(f"/tickets/{response.json['id']}/assign-mechanic/{self.mechanic_id}")
+        self.assertEqual(self.client.get(f'/tickets/{self.ticket_id}/mechanics').json[0]['ticket_count'], 2)
+
+    def test_my_tickets_cache_invalidated_for_customer(self):
+        login_resp = self.client.post('/customers/login', json={"email": "owner@example.com", "password": "secret"})
+        headers = {'Authorization': f"Bearer {login_resp.json['auth_token']}"}
+        self.assertEqual(len(self.client.get('/tickets/my-tickets', headers=headers).json), 1)
+        self.client.post('/tickets/', json={"customer_id": self.customer_id, "ticket_date": str(date.today()), "vin": "NEWVIN"})
+        self.assertEqual(len(self.client.get('/tickets/my-tickets', headers=headers).json), 2)
+
+    def test_get_tickets_filters(self):
+        with self.app.app_context():
+            other = Ticket(customer_id=self.customer_id, ticket_date=date(2021, 3, 4), vin="FILTERVIN")
+            other.mechanics.append(db.session.get(Mechanic, self.mechanic_id))
+            db.session.add(other)
+            db.session.commit()
+        self.assertEqual([t['vin'] for t in self.client.get('/tickets/?vin=FILTERVIN').json], ["FILTERVIN"])
+        self.assertEqual([t['vin'] for t in self.client.get(f'/tickets/?mechanic_id={self.mechanic_id}').json], ["FILTERVIN"])
+        response = self.client.get(f'/tickets/?customer_id={self.customer_id}&from=2021-01-01&to=2021-12-31')
+        self.assertEqual([t['vin'] for t in response.json], ["FILTERVIN"])
+        self.assertEqual(self.client.get('/tickets/?mechanic_id=abc').status_code, 400)
+
+    def explain(self, **filters):
+        # SQLite query plan for the filtered, keyset-ordered ticket SELECT
+        query = select(Ticket).where(*ticket_filter_clauses(filters)).order_by(Ticket.ticket_date, Ticket.id)
+        with self.app.app_context():
+            sql = str(query.compile(db.engine, compile_kwargs={"literal_binds": True}))
+            rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        return ' | '.join(row[-1] for row in rows)
+
+    def test_ticket_filters_use_indexes(self):
+        self.assertIn('ix_tickets_vin', self.explain(vin="VIN123"))
+        self.assertIn('ix_tickets_customer_id_ticket_date', self.explain(customer_id="1", **{"from": "2024-01-01", "to": "2024-12-31"}))
+        self.assertIn('ix_ticket_mechanic_mechanic_id', self.explain(mechanic_id="1"))
+
+    def seed_listed_tickets(self, count, start=0):
+        # Extra tickets with a mechanic and a part each, so the listing has relationships to load
+        with self.app.app_context():
+            mechanic = db.session.get(Mechanic, self.mechanic_id)
+            for i in range(start, start + count):
+                ticket = Ticket(customer_id=self.customer_id, ticket_date=date.today(), vin=f"BULK{i}")
+                ticket.mechanics.append(mechanic)
+                db.session.add(ticket)
+                db.session.flush()
+                db.session.add(TicketInventory(ticket_id=ticket.id, inventory_id=self.inventory_id, quantity=1))
+            db.session.commit()
+
+    def count_list_queries(self, expected_tickets):
+        # SQL statements for one listing
+        with capture_queries(self.app) as statements:
+            response = self.client.get('/tickets/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json), expected_tickets)
+        return len(statements)
+
+    def test_get_all_tickets_query_count_is_constant(self):
+        self.client.get('/tickets/')  # Warm up per-process state so both counts see the same path
+        self.seed_listed_tickets(2)
+        small = self.count_list_queries(3)
+        self.seed_listed_tickets(38, start=2)
+        large = self.count_list_queries(41)
+        self.assertEqual(small, large)
+
+    def test_get_all_tickets_includes_mechanics_and_parts(self):
+        self.client.put(f'/tickets/{self.ticket_id}/assign-mechanic/{self.mechanic_id}')
+        self.client.post(f'/tickets/{self.ticket_id}/add-part', json={"inventory_id": self.inventory_id, "quantity": 3})
+        response = self.client.get('/tickets/')
+        ticket = response.json[0]
+        self.assertEqual(ticket['mechanics'][0]['id'], self.mechanic_id)
+        self.assertEqual(ticket['parts'], [{"inventory_id": self.inventory_id, "quantity": 3}])
+
+    def test_get_tickets_cursor_order(self):
+        with self.app.app_context():
+            for day in (3, 1, 2):
+                db.session.add(Ticket(customer_id=self.customer_id, ticket_date=date(2024, 1, day), vin=f"DAY{day}"))
+            db.session.commit()
+        first = self.client.get('/tickets/?per_page=2')
+        self.assertEqual([t['vin'] for t in first.json], ["DAY1", "DAY2"])
+        cursor = first.headers['X-Next-Cursor']
+        second = self.client.get(f'/tickets/?per_page=2&cursor={cursor}')
+        self.assertEqual([t['vin'] for t in second.json], ["DAY3", "VIN123"])
+        self.assertNotIn('X-Next-Cursor', second.headers)
+
+    def test_export_tickets_ndjson(self):
+        self.client.put(f'/tickets/{self.ticket_id}/assign-mechanic/{self.mechanic_id}')
+        self.client.post(f'/tickets/{self.ticket_id}/add-part', json={"inventory_id": self.inventory_id, "quantity": 2})
+        response = self.client.get('/tickets/export')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['mechanic_ids'], [self.mechanic_id])
+        self.assertEqual(rows[0]['parts'], [{"inventory_id": self.inventory_id, "quantity": 2}])
+
+    def test_export_tickets_csv_with_filters(self):
+        with self.app.app_context():
+            db.session.add(Ticket(customer_id=self.customer_id, ticket_date=date(2020, 5, 1), vin="OLDVIN"))
+            db.session.commit()
+        response = self.client.get('/tickets/export?format=csv&from=2020-01-01&to=2020-12-31')
+        self.assertEqual(response.status_code, 200)
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(lines[0], 'id,vin,ticket_date,customer_id,mechanic_ids,parts')
+        self.assertEqual(len(lines), 2)
+        self.assertIn('OLDVIN', lines[1])
+
+    def test_export_tickets_bad_filter(self):
+        response = self.client.get('/tickets/export?from=yesterday')
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_create_tickets(self):
+        payload = [
+            {"customer_id": self.customer_id, "ticket_date": str(date.today()), "vin": "FLEET1",
+             "mechanic_ids": [self.mechanic_id], "parts": [{"inventory_id": self.inventory_id, "quantity": 2}]},
+            {"customer_id": self.customer_id, "ticket_date": str(date.today()), "vin": "FLEET2"},
+            {"customer_id": self.customer_id, "vin": "NODATE"},
+            {"customer_id": self.customer_id, "ticket_date": str(date.today()), "vin": "BADMECH", "mechanic_ids": [999]},
+        ]
+        response = self.client.post('/tickets/bulk', json=payload)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([t['vin'] for t in response.json['created']], ["FLEET1", "FLEET2"])
+        self.assertEqual(response.json['created'][0]['mechanics'][0]['id'], self.mechanic_id)
+        self.assertEqual(response.json['created'][0]['parts'], [{"inventory_id": self.inventory_id, "quantity": 2}])
+        self.assertEqual(sorted(response.json['errors']), ["2", "3"])
+
+    def test_bulk_create_tickets_all_invalid(self):
+        response = self.client.post('/tickets/bulk', json=[{"vin": "X"}])
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/tickets/bulk', json={"vin": "not a list"})
+        self.assertEqual(response.status_code, 400)
+
+    def add_mechanics_and_tickets(self, mechanic_count, ticket_count):
+        with self.app.app_context():
+            mechanics = [Mechanic(name=f"Crew {i}", email=f"crew-auto{i}@example.com", phone="1", salary=1, password="pw")
+                         for i in range(mechanic_count)]
+            tickets = [Ticket(customer_id=self.customer_id, ticket_date=date.today(), vin=f"AUTO{i}")
+                       for i in range(ticket_count)]
+            db.session.add_all(mechanics + tickets)
+            db.session.commit()
+            return [m.id for m in mechanics], [t.id for t in tickets]
+
+    def test_auto_assign_picks_least_loaded_mechanic(self):
+        mechanic_ids, ticket_ids = self.add_mechanics_and_tickets(1, 2)
+        self.client.put(f'/tickets/{self.ticket_id}/assign-mechanic/{self.mechanic_id}')
+        response = self.client.post(f'/tickets/{ticket_ids[0]}/auto-assign')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([m['id'] for m in response.json['mechanics']], [mechanic_ids[0]])
+        # Both mechanics now carry one ticket; removing one makes it the least loaded again
+        self.client.put(f'/tickets/{self.ticket_id}/remove-mechanic/{self.mechanic_id}')
+        response = self.client.post(f'/tickets/{ticket_ids[1]}/auto-assign')
+        self.assertEqual([m['id'] for m in response.json['mechanics']], [self.mechanic_id])
+
+    def test_auto_assign_runs_no_aggregate_query(self):
+        _, ticket_ids = self.add_mechanics_and_tickets(3, 2)
+        self.client.post(f'/tickets/{ticket_ids[0]}/auto-assign')  # Builds the heap
+        with self.app.app_context(), capture_queries(self.app) as statements:
+            self.client.post(f'/tickets/{ticket_ids[1]}/auto-assign')
+        # Only the keyed daily-rollup refresh (INSERT ... SELECT) aggregates; picking never does
+        statements = [sql.lower() for sql in statements]
+        self.assertFalse([sql for sql in statements if sql.startswith('select') and ('group by' in sql or 'count(' in sql)])
+
+    def test_auto_assign_batch_spreads_load(self):
+        mechanic_ids, ticket_ids = self.add_mechanics_and_tickets(1, 3)
+        response = self.client.post('/tickets/auto-assign', json={"ticket_ids": ticket_ids + [999]})
+        self.assertEqual(response.status_code, 200)
+        # Ties go to the lower id, so the original mechanic takes the odd ticket
+        self.assertEqual(sorted(response.json['assigned'].values()),
+                         sorted([self.mechanic_id, self.mechanic_id] + mechanic_ids))
+        self.assertEqual(response.json['errors'], {"999": "Ticket not found."})
+        counts = {m['id']: m['ticket_count'] for m in self.client.get('/mechanics/popular').json}
+        self.assertEqual(counts, {self.mechanic_id: 2, mechanic_ids[0]: 1})
+
+    def test_auto_assign_errors(self):
+        response = self.client.post('/tickets/999/auto-assign')
+        self.assertEqual(response.status_code, 404)
+        self.client.put(f'/tickets/{self.ticket_id}/assign-mechanic/{self.mechanic_id}')
+        response = self.client.post(f'/tickets/{self.ticket_id}/auto-assign')
+        self.assertEqual(response.status_code, 409)
+        response = self.client.post('/tickets/auto-assign', json={"ticket_ids": []})
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_create_tickets_auto_assign(self):
+        mechanic_ids, _ = self.add_mechanics_and_tickets(1, 0)
+        payload = [{"customer_id": self.customer_id, "ticket_date": str(date.today()), "vin": f"INTAKE{i}"} for i in range(2)]
+        response = self.client.post('/tickets/bulk?auto_assign=true', json=payload)
+        self.assertEqual(response.status_code, 201)
+        assigned = [t['mechanics'][0]['id'] for t in response.json['created']]
+        self.assertEqual(sorted(assigned), sorted([self.mechanic_id] + mechanic_ids))
+
+    def test_ticket_list_etag_follows_nested_changes(self):
+        def etag():
+            return self.client.get('/tickets/').headers['ETag']
+        first = etag()
+        self.assertEqual(self.client.get('/tickets/', headers={'If-None-Match': first}).status_code, 304)
+        self.client.put(f'/tickets/{self.ticket_id}/assign-mechanic/{self.mechanic_id}')
+        second = etag()
+        self.assertNotEqual(first, second)
+        token = self.client.post('/mechanics/login', json={"email": "mech2@example.com", "password": "pw"}).json['auth_token']
+        self.client.patch(f'/mechanics/{self.mechanic_id}', json={"name": "Renamed Mechanic"},  # Embedded in every ticket
+                          headers={'Authorization': f'Bearer {token}'})
+        response = self.client.get('/tickets/', headers={'If-None-Match': second})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json[0]['mechanics'][0]['name'], "Renamed Mechanic")
+        # Filters and pages get their own ETags
+        self.assertNotEqual(self.client.get('/tickets/?vin=VIN123').headers['ETag'], response.headers['ETag'])
+
+    def set_stock(self, stock):
+        with self.app.app_context():
+            db.session.get(Inventory, self.inventory_id).stock_on_hand = stock
+            db.session.commit()
+
+    def stock_and_quantity(self):
+        with self.app.app_context():
+            line = db.session.get(TicketInventory, (self.ticket_id, self.inventory_id))
+            return db.session.get(Inventory, self.inventory_id).stock_on_hand, line.quantity if line else 0
+
+    def test_add_part_reserves_stock(self):
+        self.set_stock(3)
+        self.client.get('/inventory/')  # Warm the cached catalog
+        response = self.client.post(f'/tickets/{self.ticket_id}/add-part', json={"inventory_id": self.inventory_id, "quantity": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stock_and_quantity(), (1, 2))
+        catalog = {p['id']: p for p in self.client.get('/inventory/').json}
+        self.assertEqual(catalog[self.inventory_id]['stock_on_hand'], 1)  # Reservation refreshed the cached catalog
+        response = self.client.post(f'/tickets/{self.ticket_id}/add-part', json={"inventory_id": self.inventory_id, "quantity": 2})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.stock_and_quantity(), (1, 2))
+        response = self.client.post(f'/tickets/{self.ticket_id}/add-part', json={"inventory_id": self.inventory_id, "quantity": 0})
+        self.assertEqual(response.status_code, 400)
+
+    def test_untracked_parts_skip_the_reservation_update(self):
+        with self.app.app_context():
+            catalog_version = tag_versions([CATALOG_TAG])
+        with capture_queries(self.app) as statements:
+            response = self.client.post(f'/tickets/{self.ticket_id}/add-part', json={"inventory_id": self.inventory_id, "quantity": 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stock_and_quantity(), (None, 2))
+        self.assertFalse([s for s in statements if s.startswith('UPDATE inventory')])
+        with self.app.app_context():
+            self.assertEqual(tag_versions([CATALOG_TAG]), catalog_version)  # Nothing in the catalog changed
+
+    def test_add_parts_reservation_is_all_or_nothing(self):
+        self.set_stock(5)
+        with self.app.app_context():
+            scarce = Inventory(name="Scarce", price=1.0, stock_on_hand=1)
+            db.session.add(scarce)
+            db.session.commit()
+            scarce_id = scarce.id
+        response = self.client.post(f'/tickets/{self.ticket_id}/parts',
+                                    json=[{"inventory_id": self.inventory_id, "quantity": 2}, {"inventory_id": scarce_id, "quantity": 2}])
+        self.assertEqual(response.status_code, 409)
+        self.assertIn(str(scarce_id), response.json['error'])
+        self.assertEqual(self.stock_and_quantity(), (5, 0))
+
+    def test_reservation_reports_only_short_parts(self):
+        # The plentiful part would drop below its own quantity once decremented; it must not be reported short
+        self.set_stock(5)
+        with self.app.app_context():
+            scarce = Inventory(name="Scarce", price=1.0, stock_on_hand=1)
+            db.session.add(scarce)
+            db.session.commit()
+            scarce_id = scarce.id
+        response = self.client.post(f'/tickets/{self.ticket_id}/parts',
+                                    json=[{"inventory_id": self.inventory_id, "quantity": 3}, {"inventory_id": scarce_id, "quantity": 2}])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json['error'], f"Insufficient stock for part(s): [{scarce_id}]")
+        self.assertEqual(self.stock_and_quantity(), (5, 0))
+
+        item = lambda vin, part_id, quantity: {"customer_id": self.customer_id, "ticket_date": str(date.today()), "vin": vin,
+                                               "parts": [{"inventory_id": part_id, "quantity": quantity}]}
+        response = self.client.post('/tickets/bulk', json=[item("PLENTY", self.inventory_id, 3), item("SCARCE", scarce_id, 2)])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json['created']), 1)
+        self.assertEqual(sorted(response.json['errors']), ["1"])
+        self.assertEqual(self.stock_and_quantity()[0], 2)
+
+    def test_bulk_create_tickets_reserves_stock(self):
+        self.set_stock(3)
+        item = lambda vin, quantity: {"customer_id": self.customer_id, "ticket_date": str(date.today()), "vin": vin,
+                                      "parts": [{"inventory_id": self.inventory_id, "quantity": quantity}]}
+        # Together the items need more than is in stock, so every item using that part fails
+        response = self.client.post('/tickets/bulk', json=[item("STOCK1", 2), item("STOCK2", 2)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(sorted(response.json['errors']), ["0", "1"])
+        self.assertEqual(self.stock_and_quantity()[0], 3)
+        response = self.client.post('/tickets/bulk', json=[item("STOCK1", 2), {"customer_id": self.customer_id, "ticket_date": str(date.today()), "vin": "NOPARTS"}])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json['created']), 2)
+        self.assertEqual(self.stock_and_quantity()[0], 1)
+
     # --- Negative tests ---
     def test_get_nonexistent_ticket(self):
         response = self.client.get('/tickets/999/mechanics')
@@ -134,4 +548,59 @@ class TestTicket(unittest.TestCase):
     def tearDown(self):
         with self.app.app_context():
             db.session.remove()
-            db.engine.dispose() 
\ No newline at end of file
+            db.engine.dispose() 
+
+class TestStockConcurrency(unittest.TestCase):
+    """Many threads reserving one part through the API must never oversell it."""
+    THREADS = 8
+    ATTEMPTS = 10
+    STOCK = 25
+
+    def setUp(self):
+        # A file database so each thread gets its own connection and transaction
+        fd, self.db_path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+
+        class StockConcurrencyConfig(TestingConfig):
+            SQLALCHEMY_DATABASE_URI = f'sqlite:///{self.db_path}'
+            SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30}}
+        self.app = create_app(StockConcurrencyConfig)
+        limiter.enabled = False  # The limiter is process-wide; tearDown turns it back on
+        with self.app.app_context():
+            db.create_all()
+            customer = Customer(name="Rush", email="rush@example.com", phone="0", password="pw")
+            part = Inventory(name="Battery", price=100.0, stock_on_hand=self.STOCK)
+            db.session.add_all([customer, part])
+            db.session.flush()
+            ticket = Ticket(customer_id=customer.id, ticket_date=date.today(), vin="RUSH")
+            db.session.add(ticket)
+            db.session.commit()
+            self.ticket_id, self.part_id = ticket.id, part.id
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.engine.dispose()
+        limiter.enabled = True
+        os.remove(self.db_path)
+
+    def test_concurrent_add_part_never_oversells(self):
+        statuses, lock = [], threading.Lock()
+        def advisor():
+            client = self.app.test_client()
+            for _ in range(self.ATTEMPTS):
+                status = client.post(f'/tickets/{self.ticket_id}/add-part',
+                                     json={"inventory_id": self.part_id, "quantity": 1}).status_code
+                with lock:
+                    statuses.append(status)
+        threads = [threading.Thread(target=advisor) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(set(statuses)), [200, 409])
+        self.assertEqual(statuses.count(200), self.STOCK)
+        with self.app.app_context():
+            self.assertEqual(db.session.get(Inventory, self.part_id).stock_on_hand, 0)
+            self.assertEqual(db.session.get(TicketInventory, (self.ticket_id, self.part_id)).quantity, self.STOCK)
+            self.assertEqual(db.session.get(Ticket, self.ticket_id).parts_total, self.STOCK * 100.0)
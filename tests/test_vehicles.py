@@ -0,0 +1,73 @@
+from app import create_app
+from app.models import db, Customer, Mechanic, Inventory
+from tests.helpers import capture_queries
+import unittest
+
+class TestVehicle(unittest.TestCase):
+    def setUp(self):
+        # Use in-memory SQLite for isolated testing every run
+        self.app = create_app('TestingConfig')
+        self.client = self.app.test_client()
+        with self.app.app_context():
+            db.drop_all()
+            db.create_all()
+            customer = Customer(name="Car Owner", email="car@example.com", phone="555-0000", password="secret")
+            mechanic = Mechanic(name="History Mechanic", email="hist@example.com", phone="1112223333", salary=40000, password="pw")
+            part = Inventory(name="Spark Plug", price=5.0)
+            db.session.add_all([customer, mechanic, part])
+            db.session.commit()
+            self.customer_id = customer.id
+            self.mechanic_id = mechanic.id
+            self.part_id = part.id
+
+    def create_ticket(self, vin, ticket_date):
+        payload = {"customer_id": self.customer_id, "ticket_date": ticket_date, "vin": vin}
+        response = self.client.post('/tickets/', json=payload)
+        self.assertEqual(response.status_code, 201)
+        return response.json['id']
+
+    def test_vehicle_history(self):
+        first = self.create_ticket("CARVIN1", "2024-01-10")
+        self.create_ticket("CARVIN1", "2024-06-02")
+        self.create_ticket("OTHERVIN", "2024-03-03")
+        self.client.put(f'/tickets/{first}/assign-mechanic/{self.mechanic_id}')
+        self.client.post(f'/tickets/{first}/parts', json=[{"inventory_id": self.part_id, "quantity": 4}])
+
+        response = self.client.get('/vehicles/CARVIN1/history')
+        self.assertEqual(response.status_code, 200)
+        summary = response.json['summary']
+        self.assertEqual(summary['visit_count'], 2)
+        self.assertEqual(summary['last_visit'], "2024-06-02")
+        self.assertAlmostEqual(summary['parts_spend'], 20.0)
+        self.assertEqual(len(response.json['tickets']), 2)
+        self.assertEqual(response.json['tickets'][0]['mechanics'][0]['id'], self.mechanic_id)
+        self.assertEqual(response.json['tickets'][0]['parts'], [{"inventory_id": self.part_id, "quantity": 4}])
+
+    def test_vehicle_summary_follows_ticket_changes(self):
+        ticket_id = self.create_ticket("OLDVIN", "2024-01-10")
+        self.client.post(f'/tickets/{ticket_id}/add-part', json={"inventory_id": self.part_id, "quantity": 2})
+        self.client.patch(f'/inventory/{self.part_id}', json={"price": 7.5})
+        self.assertAlmostEqual(self.client.get('/vehicles/OLDVIN/history').json['summary']['parts_spend'], 15.0)
+
+        self.client.patch(f'/tickets/{ticket_id}', json={"vin": "NEWVIN"})
+        self.assertEqual(self.client.get('/vehicles/OLDVIN/history').status_code, 404)
+        self.assertEqual(self.client.get('/vehicles/NEWVIN/history').json['summary']['visit_count'], 1)
+
+    def test_vehicle_history_query_count_is_bounded(self):
+        for day in range(1, 21):
+            ticket_id = self.create_ticket("BUSYVIN", f"2024-02-{day:02d}")
+            self.client.put(f'/tickets/{ticket_id}/assign-mechanic/{self.mechanic_id}')
+        with self.app.app_context(), capture_queries(self.app) as statements:
+            response = self.client.get('/vehicles/BUSYVIN/history')
+        self.assertEqual(len(response.json['tickets']), 20)
+        self.assertLessEqual(len(statements), 5)
+
+    def test_nonexistent_vehicle(self):
+        response = self.client.get('/vehicles/NOPE/history')
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('not found', response.json.get('error', '').lower())
+
+    def tearDown(self):
+        with self.app.app_context():
+            db.session.remove()
+            db.engine.dispose()